@@ -1,15 +1,23 @@
 """API endpoints for Facebook posts."""
 
-from fastapi import APIRouter, Query, HTTPException, Path
-from typing import Optional
+import csv
+import io
+import json
 
-from app.db import get_posts, get_post_count, get_stats, get_post_by_id
+from fastapi import APIRouter, Query, HTTPException, Path, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Literal, Optional
+
+from app.async_db import get_posts_page, get_stats, get_post_by_id, iter_posts
+from app.cache import cached_response
+from app.db import encode_cursor
 
 router = APIRouter()
 
 
 @router.get("/posts")
 async def list_posts(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     group_url: Optional[str] = Query(default=None),
@@ -17,7 +25,11 @@ async def list_posts(
     search: Optional[str] = Query(default=None),
     only_new: bool = Query(default=False),
     category: Optional[str] = Query(default=None),
-    location: Optional[str] = Query(default=None)
+    location: Optional[str] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    count: Literal["none", "estimated", "exact"] = Query(default="exact"),
+    search_mode: Literal["fts", "substring"] = Query(default="substring"),
+    fields: str = Query(default="full")
 ):
     """
     Get posts with optional filtering.
@@ -28,51 +40,133 @@ async def list_posts(
         - group_url: Filter by specific Facebook group URL
         - group_name: Filter by normalized group name
         - search: Search term for title/text
+        - search_mode: "substring" (default; title/text contains the term,
+          newest first) or "fts" (Norwegian full-text search on whole words,
+          best matches first, supports "phrases", OR and -word; paged with
+          offset only)
         - only_new: Only return posts not yet notified
         - category: Filter by category
         - location: Filter by location
+        - cursor: Opaque cursor from a previous response's next_cursor (keyset
+          pagination, constant cost at any depth; offset is ignored when set)
+        - count: How to compute total: "exact" (default), "estimated" (planner
+          estimate on large tables, much cheaper) or "none" (total is null)
+        - fields: Columns to return: "full" (default, every column), "list"
+          (what the post list shows; text is cut to the first 300 characters,
+          except for posts without an AI category, and auto-message details
+          are left out) or a comma-separated list of
+          column names (id and posted_at are always included)
+
+    Responses are cached until the next write to posts (see app/cache.py) and
+    carry ETag/Last-Modified, so unchanged pages answer 304 to conditional GETs.
     """
-    try:
-        posts = get_posts(
-            limit=limit,
-            offset=offset,
-            group_url=group_url,
-            group_name=group_name,
-            search=search,
-            only_new=only_new,
-            category=category,
-            location=location
-        )
-        
-        total = get_post_count(
-            group_url=group_url,
-            group_name=group_name,
-            search=search,
-            only_new=only_new,
-            category=category,
-            location=location
+    filters = {
+        "group_url": group_url,
+        "group_name": group_name,
+        "search": search,
+        "only_new": only_new,
+        "category": category,
+        "location": location,
+    }
+
+    async def build_page():
+        # Page and total come back from one query
+        posts, total = await get_posts_page(
+            limit=limit, offset=offset, cursor=cursor, count=count, search_mode=search_mode,
+            fields=fields, **filters
         )
-        
+        # Ranked search results are not in cursor order; page them with offset
+        ranked = bool(search) and search_mode == "fts"
         return {
             "posts": posts,
             "total": total,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": encode_cursor(posts[-1]) if len(posts) == limit and not ranked else None
         }
+
+    try:
+        params = dict(
+            filters, limit=limit, offset=offset, cursor=cursor, count=count, search_mode=search_mode, fields=fields
+        )
+        return await cached_response(request, "posts", params, build_page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def _export_lines(batches: AsyncIterator[list[dict]], format: str) -> AsyncIterator[str]:
+    """Encode batches of posts as NDJSON lines or CSV rows (header from the first batch)."""
+    writer = None
+    buffer = io.StringIO()
+    async for posts in batches:
+        if format == "ndjson":
+            yield "".join(json.dumps(post, ensure_ascii=False, default=str) + "\n" for post in posts)
+            continue
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(posts[0].keys()), extrasaction="ignore")
+            writer.writeheader()
+        for post in posts:
+            writer.writerow({
+                key: json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+                for key, value in post.items()
+            })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@router.get("/posts/export")
+async def export_posts(
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    group_url: Optional[str] = Query(default=None),
+    group_name: Optional[str] = Query(default=None),
+    search: Optional[str] = Query(default=None),
+    only_new: bool = Query(default=False),
+    category: Optional[str] = Query(default=None),
+    location: Optional[str] = Query(default=None),
+    batch_size: int = Query(default=1000, ge=1, le=1000)
+):
+    """
+    Stream every matching post (full history by default) as NDJSON or CSV.
+    
+    Rows are read with keyset pagination, batch_size at a time, and written
+    out as they arrive, so memory stays bounded however many posts match.
+    Filters are the same as /posts; search is substring matching.
+    """
+    batches = iter_posts(
+        batch_size=batch_size,
+        group_url=group_url,
+        group_name=group_name,
+        search=search,
+        only_new=only_new,
+        category=category,
+        location=location
+    )
+    return StreamingResponse(
+        _export_lines(batches, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="posts.{format}"'}
+    )
+
+
 @router.get("/posts/{post_id}")
-async def get_single_post(post_id: str = Path(..., description="The unique post identifier")):
+async def get_single_post(request: Request, post_id: str = Path(..., description="The unique post identifier")):
     """
     Get a single post by its ID.
     """
-    try:
-        post = get_post_by_id(post_id)
+    async def build_post():
+        post = await get_post_by_id(post_id)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         return {"post": post}
+
+    try:
+        return await cached_response(request, "post", {"post_id": post_id}, build_post)
     except HTTPException:
         raise
     except Exception as e:
@@ -80,9 +174,14 @@ async def get_single_post(post_id: str = Path(..., description="The unique post
 
 
 @router.get("/stats")
-async def get_statistics():
-    """Get database statistics."""
+async def get_statistics(request: Request, days: int = Query(default=30, ge=1, le=365)):
+    """
+    Get database statistics (one RPC call, flat latency as the table grows).
+    
+    Query params:
+        - days: Number of most recent days with posts to include in by_day
+    """
     try:
-        return get_stats()
+        return await cached_response(request, "stats", {"days": days}, lambda: get_stats(days=days))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
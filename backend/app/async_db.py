@@ -0,0 +1,221 @@
+"""
+Async Supabase access for the API routes.
+
+Queries are built by app.db and sent through the async supabase client so a
+PostgREST round trip doesn't block the event loop and concurrent dashboard
+requests overlap. One client (and its pooled HTTP connection pool, see
+app.supabase_client) is created lazily and reused for the life of the process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+from supabase import AsyncClient
+
+from app.db import (
+    _check_page_args,
+    _count_query,
+    _normalize_posts,
+    _page_query,
+    _parse_search_result,
+    _search_posts_query,
+    encode_cursor,
+    parse_fields,
+)
+from app.supabase_client import acreate_supabase_client
+
+# Load environment variables
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+# Priority: SERVICE_KEY > SECRET_KEY > ANON_KEY (same as Tinder automation)
+SUPABASE_KEY = (
+    os.getenv("SUPABASE_SERVICE_KEY") or 
+    os.getenv("SUPABASE_SECRET_KEY") or 
+    os.getenv("SUPABASE_KEY")
+)
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    raise ValueError("SUPABASE_URL and SUPABASE_KEY (or SUPABASE_SERVICE_KEY) must be set in environment")
+
+_client: Optional[AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+
+async def get_client() -> AsyncClient:
+    """The shared async client, created on first use."""
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = await acreate_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
+
+
+def set_client(client) -> None:
+    """Replace the shared client (e.g. with a stand-in for benchmarks)."""
+    global _client
+    _client = client
+
+
+async def get_posts_page(
+    limit: int = 100,
+    offset: int = 0,
+    group_url: Optional[str] = None,
+    group_name: Optional[str] = None,
+    search: Optional[str] = None,
+    only_new: bool = False,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    search_mode: str = "substring",
+    fields: str = "full"
+) -> tuple[list[dict], Optional[int]]:
+    """
+    Retrieve one page of posts and the total matching count.
+
+    Args:
+        limit: Maximum number of posts to return
+        offset: Number of posts to skip (for pagination, ignored when cursor is set)
+        group_url: Filter by specific Facebook group URL
+        group_name: Filter by normalized group name
+        search: Search term to filter posts (searches title and text)
+        only_new: Only return posts that haven't been notified about
+        category: Filter by category
+        location: Filter by location
+        cursor: Keyset cursor from encode_cursor(); returns the page after it
+        count: "exact", "estimated" (planner estimate on large tables) or "none"
+        search_mode: "substring" (title/text contains the term, most recent first)
+            or "fts" (Norwegian full-text search, best matches first)
+        fields: Columns to return, see parse_fields() ("full", "list" or a column list)
+
+    Returns:
+        (posts sorted by posted_at, most recent first, or by rank for fts search;
+        total or None when count="none").
+        The total is the size of the whole filtered set. It comes back with the
+        page in one round trip; on cursor pages the page and the total are
+        separate requests, run concurrently.
+
+    Raises:
+        ValueError: If the cursor, count mode, search mode or fields are invalid
+    """
+    _check_page_args(count, search_mode)
+    projection = parse_fields(fields)
+    client = await get_client()
+
+    if search and search_mode == "fts":
+        if cursor:
+            raise ValueError("Cursor pagination is not supported for ranked search; use offset")
+        try:
+            result = await _search_posts_query(
+                client, search, limit, offset, group_url, group_name, only_new, category, location,
+                with_count=count != "none", projection=projection
+            ).execute()
+            return _parse_search_result(result.data)
+        except Exception as e:
+            print(f"Error searching posts: {e}")
+            raise
+
+    filters = (group_url, group_name, search, only_new, category, location)
+    inline_count = count if count != "none" and not cursor else None
+
+    try:
+        page_query = _page_query(client, limit, offset, filters, cursor, inline_count, projection)
+        if count != "none" and not inline_count:
+            result, count_result = await asyncio.gather(
+                page_query.execute(),
+                _count_query(client, filters, count).execute()
+            )
+            total = count_result.count or 0
+        else:
+            result = await page_query.execute()
+            total = None if count == "none" else (result.count or 0)
+        return _normalize_posts(result.data or []), total
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Error getting posts: {e}")
+        raise
+
+
+async def iter_posts(
+    batch_size: int = 1000,
+    group_url: Optional[str] = None,
+    group_name: Optional[str] = None,
+    search: Optional[str] = None,
+    only_new: bool = False,
+    category: Optional[str] = None,
+    location: Optional[str] = None
+) -> AsyncIterator[list[dict]]:
+    """
+    Yield every matching post in dashboard order, batch_size rows at a time.
+
+    Pages with keyset cursors, so each batch costs the same however deep the
+    export is and only one batch is held in memory. Search is substring
+    matching (ranked results have no stable keyset order).
+    """
+    client = await get_client()
+    filters = (group_url, group_name, search, only_new, category, location)
+    cursor = None
+    while True:
+        try:
+            result = await _page_query(client, batch_size, 0, filters, cursor, None).execute()
+        except Exception as e:
+            print(f"Error exporting posts: {e}")
+            raise
+        posts = result.data or []
+        if posts:
+            cursor = encode_cursor(posts[-1])
+            yield _normalize_posts(posts)
+        if len(posts) < batch_size:
+            return
+
+
+async def get_post_by_id(post_id: str) -> Optional[dict]:
+    """Get a single post by its post_id, or None if it doesn't exist."""
+    client = await get_client()
+    try:
+        result = await client.table("posts").select("*").eq("post_id", post_id).execute()
+        if result.data:
+            return _normalize_posts(result.data[:1])[0]
+        return None
+    except Exception as e:
+        print(f"Error getting post by id: {e}")
+        raise
+
+
+async def get_data_version() -> tuple[int, datetime]:
+    """
+    Current (version, updated_at) of the data_version row, which is bumped
+    on every write to posts. Used as the response-cache watermark.
+    """
+    client = await get_client()
+    result = await client.table("data_version").select("version, updated_at").eq("id", 1).execute()
+    row = result.data[0]
+    updated_at = datetime.fromisoformat(row["updated_at"].replace("Z", "+00:00"))
+    return int(row["version"]), updated_at.astimezone(timezone.utc)
+
+
+async def get_stats(days: int = 30) -> dict:
+    """
+    Get database statistics in one round trip.
+
+    Reads the trigger-maintained counters through the get_post_stats RPC
+    (migrations/add_post_stats.sql).
+
+    Returns:
+        Dict with total, new, by_group, by_category and by_day (last `days` days with posts)
+    """
+    client = await get_client()
+    try:
+        result = await client.rpc("get_post_stats", {"days": days}).execute()
+        return result.data
+    except Exception as e:
+        print(f"Error getting stats: {e}")
+        raise
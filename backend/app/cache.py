@@ -0,0 +1,170 @@
+"""
+Response cache for the dashboard API.
+
+Responses are cached per normalized query and invalidated by the data_version
+watermark, which a trigger bumps on every write to posts
+(migrations/add_data_version.sql). The watermark is re-read at most every
+RESPONSE_CACHE_WATERMARK_SECONDS; ETag/Last-Modified are derived from it.
+
+The store is pluggable via set_cache_backend() (anything with get/set/clear,
+e.g. a Redis adapter shared between instances); default is an in-process LRU.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from app.async_db import get_data_version
+
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "false"
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+WATERMARK_SECONDS = float(os.getenv("RESPONSE_CACHE_WATERMARK_SECONDS", "5"))
+
+
+class CacheBackend(Protocol):
+    """Minimal store interface; values are JSON-serializable dicts."""
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryLRUCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_backend: CacheBackend = MemoryLRUCache(CACHE_MAX_ENTRIES)
+_watermark: Optional[tuple[int, datetime]] = None
+_watermark_checked_at = 0.0
+_watermark_lock = asyncio.Lock()
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Replace the response store (e.g. with a shared Redis-backed implementation)."""
+    global _backend
+    _backend = backend
+
+
+async def _current_watermark() -> Optional[tuple[int, datetime]]:
+    """(version, last write time), re-read from the database at most every WATERMARK_SECONDS."""
+    global _watermark, _watermark_checked_at
+    if _watermark is not None and time.monotonic() - _watermark_checked_at < WATERMARK_SECONDS:
+        return _watermark
+    # Concurrent requests share one refresh instead of each querying the database
+    async with _watermark_lock:
+        if _watermark is not None and time.monotonic() - _watermark_checked_at < WATERMARK_SECONDS:
+            return _watermark
+        try:
+            _watermark = await get_data_version()
+        except Exception as e:
+            # Without a watermark we can't tell when data changed, so don't cache
+            print(f"Response cache disabled for this request: {e}")
+            _watermark = None
+        _watermark_checked_at = time.monotonic()
+        return _watermark
+
+
+def cache_key(namespace: str, params: dict) -> str:
+    """Stable key for a query: drops unset params, normalizes strings and ordering."""
+    normalized = {}
+    for name, value in sorted(params.items()):
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        normalized[name] = value
+    return f"{namespace}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False)}"
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def cached_response(
+    request: Request,
+    namespace: str,
+    params: dict,
+    compute: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Return the JSON result of awaiting compute(), served from cache while the
+    data watermark is unchanged. Answers conditional requests with 304 Not Modified.
+    """
+    if not CACHE_ENABLED:
+        return JSONResponse(await compute())
+
+    watermark = await _current_watermark()
+    if watermark is None:
+        return JSONResponse(await compute())
+
+    version, last_write = watermark
+    key = cache_key(namespace, params)
+    etag = f'W/"{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_write, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+    if _not_modified(request, etag, last_write):
+        return Response(status_code=304, headers=headers)
+
+    versioned_key = f"{version}:{key}"
+    body = _backend.get(versioned_key)
+    if body is None:
+        body = await compute()
+        _backend.set(versioned_key, body, CACHE_TTL_SECONDS)
+    return JSONResponse(body, headers=headers)
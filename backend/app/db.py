@@ -1,326 +1,229 @@
-"""Supabase database module for Facebook Work Notifier backend."""
+"""
+Query helpers for the Facebook Work Notifier backend: cursors, filters,
+column projections and the PostgREST query builders.
+
+They take a supabase client and return unexecuted queries; app.async_db
+sends them.
+"""
 
 from __future__ import annotations
 
-import os
+import base64
+import json
 import re
-from datetime import datetime, timedelta
-from typing import Optional, TypedDict
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from datetime import datetime
+from typing import Optional
 
 
-def parse_facebook_timestamp(timestamp: str) -> datetime:
-    """Parse Facebook timestamp strings into datetime objects."""
-    now = datetime.now()
-    
-    month_map = {
-        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-        'September': 9, 'October': 10, 'November': 11, 'December': 12
-    }
-    
-    # Handle full format with day name: "Sunday 1 February 2026 at 14:08"
-    match = re.match(r'^(?:Sunday|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday)\s+(\d+)\s+(\w+)\s+(\d{4})\s+at\s+(\d+):(\d+)$', timestamp, re.IGNORECASE)
-    if match:
-        day = int(match.group(1))
-        month_name = match.group(2)
-        year = int(match.group(3))
-        hour = int(match.group(4))
-        minute = int(match.group(5))
-        
-        month = month_map.get(month_name)
-        if month:
-            try:
-                return datetime(year, month, day, hour, minute)
-            except ValueError:
-                pass
-    
-    # Handle "Xm" format (X minutes ago)
-    match = re.match(r'^(\d+)m$', timestamp)
-    if match:
-        minutes = int(match.group(1))
-        return now - timedelta(minutes=minutes)
-    
-    # Handle "Xh" format (X hours ago)
-    match = re.match(r'^(\d+)h$', timestamp)
-    if match:
-        hours = int(match.group(1))
-        return now - timedelta(hours=hours)
-    
-    # Handle "Xd" format (X days ago)
-    match = re.match(r'^(\d+)d$', timestamp)
-    if match:
-        days = int(match.group(1))
-        return now - timedelta(days=days)
-    
-    # Handle "Yesterday at HH:MM" format
-    match = re.match(r'^Yesterday\s+at\s+(\d+):(\d+)$', timestamp)
-    if match:
-        hour = int(match.group(1))
-        minute = int(match.group(2))
-        yesterday = now - timedelta(days=1)
-        return yesterday.replace(hour=hour, minute=minute, second=0, microsecond=0)
-    
-    # Handle "DD Month at HH:MM" format (e.g., "24 January at 08:42")
-    match = re.match(r'^(\d+)\s+(\w+)\s+at\s+(\d+):(\d+)$', timestamp)
-    if match:
-        day = int(match.group(1))
-        month_name = match.group(2)
-        hour = int(match.group(3))
-        minute = int(match.group(4))
-        
-        month = month_map.get(month_name)
-        if month:
-            year = now.year
-            try:
-                date = datetime(year, month, day, hour, minute)
-                # If date is in the future, it's from last year
-                if date > now:
-                    date = datetime(year - 1, month, day, hour, minute)
-                return date
-            except ValueError:
-                pass
-    
-    # Handle "DD Month YYYY at HH:MM" format (e.g., "5 May 2025 at 14:30")
-    match = re.match(r'^(\d+)\s+(\w+)\s+(\d{4})\s+at\s+(\d+):(\d+)$', timestamp)
-    if match:
-        day = int(match.group(1))
-        month_name = match.group(2)
-        year = int(match.group(3))
-        hour = int(match.group(4))
-        minute = int(match.group(5))
-        
-        month = month_map.get(month_name)
-        if month:
-            try:
-                return datetime(year, month, day, hour, minute)
-            except ValueError:
-                pass
-    
-    # Handle "DD Month YYYY" format (e.g., "5 May 2025")
-    match = re.match(r'^(\d+)\s+(\w+)\s+(\d{4})$', timestamp)
-    if match:
-        day = int(match.group(1))
-        month_name = match.group(2)
-        year = int(match.group(3))
-        
-        month = month_map.get(month_name)
-        if month:
-            try:
-                return datetime(year, month, day, 12, 0)
-            except ValueError:
-                pass
-    
-    # Handle "Recently" - treat as very recent
-    if timestamp.lower() == 'recently':
-        return now - timedelta(minutes=1)
-    
-    # Unknown formats - return very old date
-    return datetime(1970, 1, 1)
-
-# Load environment variables
-load_dotenv()
-
-# Post type definition
-class Post(TypedDict):
-    post_id: str
-    title: str
-    text: str
-    url: str
-    timestamp: str
-    group_name: str
-    group_url: str
-
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-# Priority: SERVICE_KEY > SECRET_KEY > ANON_KEY (same as Tinder automation)
-SUPABASE_KEY = (
-    os.getenv("SUPABASE_SERVICE_KEY") or 
-    os.getenv("SUPABASE_SECRET_KEY") or 
-    os.getenv("SUPABASE_KEY")
-)
+def normalize_group_name(name: str) -> str:
+    """Strip '(1) ', '(2) ', etc. prefixes from Facebook tab group names."""
+    return re.sub(r'^\(\d+\)\s*', '', name)
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_KEY (or SUPABASE_SERVICE_KEY) must be set in environment")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def encode_cursor(post: dict) -> str:
+    """Opaque keyset cursor pointing just after `post` in dashboard order (_page_query)."""
+    raw = json.dumps([post.get("posted_at"), post.get("id")])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
 
-def normalize_group_name(name: str) -> str:
-    """Strip '(1) ', '(2) ', etc. prefixes from Facebook tab group names."""
-    return re.sub(r'^\(\d+\)\s*', '', name)
+def _decode_cursor(cursor: str) -> tuple[Optional[str], int]:
+    """Decode a cursor into (posted_at, id). Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        posted_at, row_id = json.loads(raw)
+        if posted_at is not None:
+            datetime.fromisoformat(posted_at.replace("Z", "+00:00"))
+        return posted_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _apply_cursor(query, cursor: str):
+    """Keep only rows after the cursor in (posted_at DESC NULLS LAST, id DESC) order."""
+    posted_at, row_id = _decode_cursor(cursor)
+    if posted_at is None:
+        # Already in the tail of rows without posted_at
+        return query.is_("posted_at", "null").lt("id", row_id)
+    return query.or_(
+        f'posted_at.lt."{posted_at}",'
+        f'and(posted_at.eq."{posted_at}",id.lt.{row_id}),'
+        f'posted_at.is.null'
+    )
+
+
+COUNT_MODES = ("none", "estimated", "exact")
+SEARCH_MODES = ("fts", "substring")
+
+# Column projections for fields= (migrations/add_post_projections.sql).
+# "full" is every column (the detail view); "list" is what the dashboard's
+# post list renders, with `text` cut to LIST_PREVIEW_CHARS characters
+# (uncategorized posts keep their whole text: the dashboard matches
+# category keywords in it).
+POST_COLUMNS = (
+    "id", "post_id", "title", "text", "url", "timestamp", "group_name", "group_name_normalized",
+    "group_url", "scraped_at", "notified", "created_at", "updated_at", "category",
+    "secondary_categories", "location", "ai_processed", "ai_features", "posted_at", "text_hash",
+    "auto_message_sent", "auto_message_text", "auto_message_price_nok", "auto_message_hours",
+    "auto_message_item_summary", "auto_message_sent_at",
+)
+LIST_COLUMNS = (
+    "id", "post_id", "title", "url", "timestamp", "group_name", "group_url", "category",
+    "secondary_categories", "location", "posted_at", "scraped_at", "notified",
+    "auto_message_sent", "auto_message_price_nok",
+)
+LIST_PREVIEW_CHARS = 300
+FIELD_SETS = ("full", "list")
+# Keyset cursors are built from these, so every projection includes them
+CURSOR_COLUMNS = ("id", "posted_at")
+FULL_PROJECTION = (None, False)
 
 
-def get_posts(
-    limit: int = 100,
-    offset: int = 0,
+def _apply_filters(
+    query,
     group_url: Optional[str] = None,
     group_name: Optional[str] = None,
     search: Optional[str] = None,
     only_new: bool = False,
     category: Optional[str] = None,
     location: Optional[str] = None
-) -> list[dict]:
-    """
-    Retrieve posts from the database with optional filtering.
+):
+    """Apply the /api/posts filters to a posts query."""
+    if group_url:
+        query = query.eq("group_url", group_url)
     
-    Args:
-        limit: Maximum number of posts to return
-        offset: Number of posts to skip (for pagination)
-        group_url: Filter by specific Facebook group URL
-        group_name: Filter by normalized group name
-        search: Search term to filter posts (searches title and text)
-        only_new: Only return posts that haven't been notified about
-        category: Filter by category
-        location: Filter by location
+    if group_name:
+        query = query.eq("group_name_normalized", group_name)
     
-    Returns:
-        List of post dictionaries sorted by Facebook timestamp (most recent first)
-    """
-    try:
-        query = supabase.table("posts").select("*")
-        
-        if group_url:
-            query = query.eq("group_url", group_url)
-        
-        if search:
-            # Use ilike for case-insensitive search
-            query = query.or_(f"title.ilike.%{search}%,text.ilike.%{search}%")
-        
-        if only_new:
-            query = query.eq("notified", False)
-        
-        if category:
-            query = query.eq("category", category)
-        
-        if location:
-            query = query.ilike("location", f"%{location}%")
-        
-        # Fetch all matching posts (we'll sort in Python by parsed timestamp)
-        result = query.execute()
-        all_posts = result.data or []
-        
-        # Normalize group names in all posts
-        for post in all_posts:
-            post["group_name"] = normalize_group_name(post.get("group_name", "Unknown"))
-        
-        # Filter by normalized group name (after normalization)
-        if group_name:
-            all_posts = [p for p in all_posts if p.get("group_name") == group_name]
-        
-        # Sort by parsed Facebook timestamp (most recent first)
-        all_posts.sort(
-            key=lambda p: parse_facebook_timestamp(p.get('timestamp', '')),
-            reverse=True
-        )
-        
-        # Apply pagination after sorting
-        paginated_posts = all_posts[offset:offset + limit]
-        
-        return paginated_posts
-    except Exception as e:
-        print(f"Error getting posts: {e}")
-        raise
+    if search:
+        # Case-insensitive substring search (trigram indexes, migrations/add_search_index.sql)
+        query = query.or_(f"title.ilike.%{search}%,text.ilike.%{search}%")
+    
+    if only_new:
+        query = query.eq("notified", False)
+    
+    if category:
+        query = query.eq("category", category)
+    
+    if location:
+        query = query.ilike("location", f"%{location}%")
+    
+    return query
 
 
-def get_post_count(
-    group_url: Optional[str] = None,
-    group_name: Optional[str] = None,
-    search: Optional[str] = None,
-    only_new: bool = False,
-    category: Optional[str] = None,
-    location: Optional[str] = None
-) -> int:
-    """Get total count of posts matching the filters."""
-    try:
-        # If filtering by normalized group_name, we need to count in Python
-        if group_name:
-            query = supabase.table("posts").select("group_name")
-            if search:
-                query = query.or_(f"title.ilike.%{search}%,text.ilike.%{search}%")
-            if only_new:
-                query = query.eq("notified", False)
-            if category:
-                query = query.eq("category", category)
-            if location:
-                query = query.ilike("location", f"%{location}%")
-            result = query.execute()
-            return sum(1 for p in (result.data or []) if normalize_group_name(p.get("group_name", "")) == group_name)
-        
-        query = supabase.table("posts").select("id", count="exact")
-        
-        if group_url:
-            query = query.eq("group_url", group_url)
-        
-        if search:
-            query = query.or_(f"title.ilike.%{search}%,text.ilike.%{search}%")
-        
-        if only_new:
-            query = query.eq("notified", False)
-        
-        if category:
-            query = query.eq("category", category)
-        
-        if location:
-            query = query.ilike("location", f"%{location}%")
-        
-        result = query.execute()
-        return result.count if result.count else 0
-    except Exception as e:
-        print(f"Error getting post count: {e}")
-        raise
-
-
-def get_post_by_id(post_id: str) -> Optional[dict]:
+def _check_page_args(count: str, search_mode: str) -> None:
+    """Raise ValueError for an unknown count or search mode."""
+    if count not in COUNT_MODES:
+        raise ValueError(f"Invalid count mode: {count} (expected one of {', '.join(COUNT_MODES)})")
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"Invalid search mode: {search_mode} (expected one of {', '.join(SEARCH_MODES)})")
+
+
+def parse_fields(fields: str) -> tuple[Optional[tuple[str, ...]], bool]:
     """
-    Get a single post by its post_id.
+    Resolve a fields= value into (columns, text_preview).
     
-    Args:
-        post_id: The unique post identifier
+    "full" selects every column (columns is None), "list" the LIST_COLUMNS
+    plus a text preview; anything else is a comma-separated list of column
+    names. id and posted_at are always included.
     
-    Returns:
-        Post dictionary if found, None otherwise
+    Raises:
+        ValueError: If a column name is unknown
     """
-    try:
-        result = supabase.table("posts").select("*").eq("post_id", post_id).execute()
-        if result.data and len(result.data) > 0:
-            post = result.data[0]
-            post["group_name"] = normalize_group_name(post.get("group_name", "Unknown"))
-            return post
-        return None
-    except Exception as e:
-        print(f"Error getting post by id: {e}")
-        raise
-
-
-def get_stats() -> dict:
-    """Get database statistics."""
-    try:
-        # Total posts
-        total_result = supabase.table("posts").select("id", count="exact").execute()
-        total = total_result.count if total_result.count else 0
-        
-        # New posts (not notified)
-        new_result = supabase.table("posts").select("id", count="exact").eq("notified", False).execute()
-        new_posts = new_result.count if new_result.count else 0
-        
-        # Posts by group - get all posts and group in Python
-        all_posts = supabase.table("posts").select("group_name").execute()
-        
-        group_counts = {}
-        for post in all_posts.data:
-            group_name = normalize_group_name(post.get("group_name", "Unknown"))
-            group_counts[group_name] = group_counts.get(group_name, 0) + 1
-        
-        by_group = [{"group": group, "count": count} for group, count in group_counts.items()]
-        by_group.sort(key=lambda x: x["count"], reverse=True)
-        
-        return {
-            "total": total,
-            "new": new_posts,
-            "by_group": by_group
-        }
-    except Exception as e:
-        print(f"Error getting stats: {e}")
-        raise
+    if fields == "full":
+        return FULL_PROJECTION
+    if fields == "list":
+        return LIST_COLUMNS, True
+    columns = [column.strip() for column in fields.split(",") if column.strip()]
+    unknown = [column for column in columns if column not in POST_COLUMNS]
+    if not columns or unknown:
+        raise ValueError(
+            f"Invalid fields: {', '.join(unknown) or fields!r} "
+            f"(expected {' or '.join(FIELD_SETS)}, or a comma-separated list of post columns)"
+        )
+    return tuple(dict.fromkeys((*CURSOR_COLUMNS, *columns))), False
+
+
+def _select_clause(projection: tuple) -> str:
+    """PostgREST select= for a parse_fields() projection."""
+    columns, text_preview = projection
+    if columns is None:
+        return "*"
+    return ",".join(columns) + (",text:text_preview" if text_preview else "")
+
+
+def _normalize_posts(posts: list[dict]) -> list[dict]:
+    """Normalize group names for display."""
+    for post in posts:
+        if "group_name" in post:
+            post["group_name"] = normalize_group_name(post["group_name"] or "Unknown")
+    return posts
+
+
+# Query builders: they take the client and return an unexecuted query.
+
+def _search_posts_query(
+    client,
+    search: str,
+    limit: int,
+    offset: int,
+    group_url: Optional[str],
+    group_name: Optional[str],
+    only_new: bool,
+    category: Optional[str],
+    location: Optional[str],
+    with_count: bool,
+    projection: tuple = FULL_PROJECTION
+):
+    """Full-text search through the search_posts RPC, best matches first."""
+    params = {
+        "search_query": search,
+        "page_limit": limit,
+        "page_offset": offset,
+        "filter_group_url": group_url,
+        "filter_group_name": group_name,
+        "only_new": only_new,
+        "filter_category": category,
+        "filter_location": location,
+        "with_count": with_count,
+    }
+    columns, text_preview = projection
+    if columns is not None:
+        params["select_columns"] = list(columns)
+        params["with_text_preview"] = text_preview
+    return client.rpc("search_posts", params)
+
+
+def _parse_search_result(data: Optional[dict]) -> tuple[list[dict], Optional[int]]:
+    data = data or {}
+    return _normalize_posts(data.get("posts") or []), data.get("total")
+
+
+def _page_query(
+    client,
+    limit: int,
+    offset: int,
+    filters: tuple,
+    cursor: Optional[str],
+    count: Optional[str],
+    projection: tuple = FULL_PROJECTION
+):
+    """One page of posts in dashboard order, optionally with an inline count."""
+    query = client.table("posts").select(_select_clause(projection), count=count)
+    query = _apply_filters(query, *filters)
+    
+    if cursor:
+        # Keyset pagination: constant cost regardless of how deep the page is
+        query = _apply_cursor(query, cursor)
+        offset = 0
+    
+    # Most recent first by the indexed posted_at column (id keeps ordering stable);
+    # rows without posted_at go last until scripts/reparse_posted_at.py has run
+    query = query.order("posted_at", desc=True, nullsfirst=False).order("id", desc=True)
+    
+    # Paginate in the database so only one page is transferred
+    return query.range(offset, offset + limit - 1)
+
+
+def _count_query(client, filters: tuple, count: str = "exact"):
+    """Count of posts matching the filters; no rows are transferred."""
+    return _apply_filters(client.table("posts").select("id", count=count, head=True), *filters)
@@ -4,6 +4,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import posts
+from app.supabase_client import get_latency_stats
 
 app = FastAPI(
     title="Facebook Work Notifier API",
@@ -34,3 +35,9 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/health/supabase")
+async def supabase_latency():
+    """Supabase request latency per endpoint since startup (histogram summaries)."""
+    return get_latency_stats()
@@ -0,0 +1,210 @@
+"""
+Supabase client factory: connection pool, HTTP/2, timeouts and latency stats.
+
+supabase-py builds its own HTTP client with library defaults (a 120 s
+PostgREST timeout, an unsized pool). Clients made here share one tuned
+httpx client instead:
+
+  - the pool holds pool_size connections, kept alive between requests, so
+    the scraper's worker threads (or the API's concurrent requests) reuse
+    warm TLS connections instead of queuing for one or reconnecting
+  - HTTP/2 multiplexes concurrent requests over those connections (needs
+    the h2 package, i.e. httpx[http2]; falls back to HTTP/1.1 without it)
+  - connect and read timeouts fail fast instead of hanging a cycle
+  - every request's latency (time until the response headers arrive) is
+    recorded in a per-endpoint histogram, see get_latency_stats()
+
+Settings come from the arguments, else from the environment:
+SUPABASE_HTTP2, SUPABASE_TIMEOUT_SECONDS, SUPABASE_CONNECT_TIMEOUT_SECONDS,
+SUPABASE_KEEPALIVE_SECONDS. SUPABASE_POOL_SIZE, when set, overrides the
+pool_size argument (callers size the pool from their thread count).
+
+The scraper uses this module too, through src/database/supabase_client.py
+(the backend is deployed on its own and can't import src, so the factory
+lives here).
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+from supabase import AsyncClient, Client, ClientOptions, create_client
+from supabase import AsyncClientOptions, acreate_client
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_KEEPALIVE_SECONDS = 60.0
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = (1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> float:
+        with self._lock:
+            target = fraction * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= target:
+                    return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+            return 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def _endpoint(request: httpx.Request) -> str:
+    """Histogram key: method and path, e.g. 'POST /rest/v1/rpc/save_posts_batch'."""
+    return f"{request.method} {request.url.path}"
+
+
+def _record(request: httpx.Request, started: float) -> None:
+    key = _endpoint(request)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, LatencyHistogram())
+    histogram.record((time.perf_counter() - started) * 1000)
+
+
+def get_latency_stats() -> dict[str, dict]:
+    """Latency summary per endpoint for every request sent through a factory client."""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {key: histogram.summary() for key, histogram in sorted(histograms.items())}
+
+
+def reset_latency_stats() -> None:
+    with _histograms_lock:
+        _histograms.clear()
+
+
+class _TimedTransport(httpx.HTTPTransport):
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        finally:
+            _record(request, started)
+
+
+class _AsyncTimedTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            _record(request, started)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _transport_settings(pool_size, http2, timeout, connect_timeout) -> dict:
+    """Resolve the settings from arguments and environment."""
+    pool_size = int(_env_float("SUPABASE_POOL_SIZE", pool_size or DEFAULT_POOL_SIZE))
+    if http2 is None:
+        http2 = os.getenv("SUPABASE_HTTP2", "true").lower() not in ("0", "false", "no")
+    if http2 and not _http2_available():
+        print("[DB] HTTP/2 needs the h2 package (pip install 'httpx[http2]'), using HTTP/1.1")
+        http2 = False
+    timeout = timeout or _env_float("SUPABASE_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS)
+    connect_timeout = connect_timeout or _env_float("SUPABASE_CONNECT_TIMEOUT_SECONDS", DEFAULT_CONNECT_TIMEOUT_SECONDS)
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=_env_float("SUPABASE_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS),
+        ),
+        "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+    }
+
+
+def create_supabase_client(
+    url: str,
+    key: str,
+    pool_size: Optional[int] = None,
+    http2: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None
+) -> Client:
+    """
+    A supabase Client whose requests share one pooled, instrumented HTTP client.
+
+    Args:
+        pool_size: Max open connections; match it to the number of threads
+            that use the client at the same time (SUPABASE_POOL_SIZE overrides it)
+        http2: Multiplex requests over HTTP/2 (default: on when h2 is installed)
+        timeout: Seconds to wait for a response
+        connect_timeout: Seconds to wait for a connection
+    """
+    settings = _transport_settings(pool_size, http2, timeout, connect_timeout)
+    http_client = httpx.Client(
+        transport=_TimedTransport(http2=settings["http2"], limits=settings["limits"]),
+        timeout=settings["timeout"],
+        follow_redirects=True,
+    )
+    return create_client(url, key, options=ClientOptions(httpx_client=http_client))
+
+
+async def acreate_supabase_client(
+    url: str,
+    key: str,
+    pool_size: Optional[int] = None,
+    http2: Optional[bool] = None,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None
+) -> AsyncClient:
+    """Async create_supabase_client(): an AsyncClient on one pooled, instrumented HTTP client."""
+    settings = _transport_settings(pool_size, http2, timeout, connect_timeout)
+    http_client = httpx.AsyncClient(
+        transport=_AsyncTimedTransport(http2=settings["http2"], limits=settings["limits"]),
+        timeout=settings["timeout"],
+        follow_redirects=True,
+    )
+    return await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
@@ -28,15 +28,18 @@ export interface Post {
 
 export interface PostsResponse {
   posts: Post[];
-  total: number;
+  total: number | null;  // null when requested with count='none'
   limit: number;
   offset: number;
+  next_cursor: string | null;  // Pass back as `cursor` to fetch the next page
 }
 
 export interface Stats {
   total: number;
   new: number;
   by_group: Array<{ group: string; count: number }>;
+  by_category: Array<{ category: string; count: number }>;
+  by_day: Array<{ day: string; count: number }>;  // Most recent first, YYYY-MM-DD
 }
 
 export const api = {
@@ -47,7 +50,11 @@ export const api = {
     search?: string,
     onlyNew: boolean = false,
     category?: string,
-    location?: string
+    location?: string,
+    cursor?: string,
+    count: 'none' | 'estimated' | 'exact' = 'exact',
+    searchMode: 'fts' | 'substring' = 'substring',  // substring: contains-match, fts: ranked full-text
+    fields: 'full' | 'list' = 'full'  // list: text is a 300-char preview (whole text if uncategorized), no auto-message details
   ): Promise<PostsResponse> {
     const params = new URLSearchParams({
       limit: limit.toString(),
@@ -59,6 +66,10 @@ export const api = {
     if (onlyNew) params.append('only_new', 'true');
     if (category) params.append('category', category);
     if (location) params.append('location', location);
+    if (cursor) params.append('cursor', cursor);
+    if (count !== 'exact') params.append('count', count);
+    if (search && searchMode !== 'substring') params.append('search_mode', searchMode);
+    if (fields !== 'full') params.append('fields', fields);
     
     const response = await fetch(`${API_BASE}/posts?${params}`);
     if (!response.ok) {
@@ -29,7 +29,13 @@ export function PostsPage() {
         0,
         undefined,
         searchFilter || undefined,
-        showOnlyNew
+        showOnlyNew,
+        undefined,
+        undefined,
+        undefined,
+        'exact',
+        'fts',
+        'list'
       );
       
       setAllPosts(response.posts);
@@ -193,7 +199,7 @@ export function PostsPage() {
       return { icon: getIconForCategory(post.category), name: post.category };
     }
 
-    // Fallback: keyword-based categorization
+    // Fallback: keyword-based categorization (the list sends these posts' whole text, not the preview)
     const content = (post.title + ' ' + post.text).toLowerCase();
     // Car Mechanic BEFORE Transport — so vehicle-specific keywords win
     if (content.match(/(tilhengerfeste|bilmekaniker|mekaniker|verksted|bremse|dekk|eu.?kontroll|lakk(?:ering)?.*bil|bil.*lakk|registerreim|clutch|eksosanlegg|motor(?!sykkel.*frakte))/)) return { icon: '🔩', name: 'Car Mechanic' };
@@ -19,9 +19,14 @@ load_dotenv()
 # Import from new structure
 from src.scraper import scrape_facebook_group, filter_posts_by_keywords, print_posts
 from monitor import create_driver
-from src.database import save_posts, mark_as_notified, post_exists, is_duplicate_post, was_auto_message_sent, mark_auto_message_sent
+from src.database import save_posts, mark_as_notified, post_exists, find_duplicates, was_auto_message_sent, mark_auto_message_sent
+from src.database import warm_known_post_cache, clear_known_post_cache, get_cache_stats, archive_old_posts
+from src.database import STORAGE_BACKEND, start_background_sync, stop_background_sync, get_latency_stats, size_connection_pool
 from src.notifications import send_email_notification
-from src.ai.ai_processor import is_service_request, process_post_with_ai, estimate_transport_job, generate_transport_message
+from src.ai.ai_processor import AI_MAX_CONCURRENCY, analyze_posts, estimate_transport_job, generate_transport_message
+from src.ai.local_classifier import LOCAL_CLASSIFIER_SCOPE, LOCAL_CLASSIFIER_THRESHOLD, get_local_classifier
+from src.ai.rate_limiter import OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, get_rate_limiter
+from src.ai.result_cache import get_result_cache
 from src.messaging import send_facebook_dm
 from config.settings import load_facebook_groups, KEYWORDS
 
@@ -159,6 +164,9 @@ AUTO_MESSAGE_ENABLED = True  # True = automatically DM transport post authors wi
 AUTO_MESSAGE_MAX = 1  # Max number of DMs to send per cycle (set to 1 for trial)
 AUTO_MESSAGE_RATE_NOK = 400  # Hourly rate in NOK for price estimation
 AUTO_MESSAGE_STOP_AFTER = True  # True = stop the entire script after first DM attempt (for review)
+KNOWN_POST_CACHE_WARM_DAYS = 3  # Preload post IDs/text hashes from the last N days into the dedup cache (0 = off)
+DB_WRITE_BEHIND = True  # True = queue DB writes in a local outbox and push them to Supabase from a background thread
+POST_RETENTION_DAYS = int(os.getenv("POST_RETENTION_DAYS", "0"))  # Move posts older than N days to posts_archive on start (0 = keep all)
 # =============================================================================
 
 # Thread-safe print lock for parallel mode
@@ -170,10 +178,6 @@ persistent_drivers = {}
 # Global reference to current sequential-mode driver (so cleanup can close it on exit/kill)
 _current_driver = None
 
-# Session-level cache of post hashes that were rejected by the AI filter.
-# Prevents re-evaluating the same offers every cycle (hash-ID posts are never saved to DB).
-_rejected_post_hashes: set[str] = set()
-
 
 def is_post_recent(post: dict, max_hours: int = 24, log_skip: bool = True) -> bool:
     """
@@ -217,9 +221,19 @@ shutdown_requested = False
 
 def clear_database() -> int:
     """Clear all posts from the database. Returns count of deleted posts."""
-    from src.database.supabase_db import supabase
+    if STORAGE_BACKEND == "sqlite":
+        from src.database.sqlite_db import clear_local_posts
+        print(f"[DB] Cleared {clear_local_posts()} posts from the local database")
     
     try:
+        from src.database.supabase_db import supabase, clear_outbox
+        
+        # Queued writes from the last run would re-create the posts being deleted
+        if STORAGE_BACKEND == "supabase":
+            dropped = clear_outbox()
+            if dropped:
+                print(f"[DB] Dropped {dropped} queued writes from the outbox")
+        
         # Get count before deleting (don't use head=True — it can return None in some client versions)
         count_result = supabase.table("posts").select("id", count="exact").execute()
         count = count_result.count if count_result.count else 0
@@ -251,9 +265,11 @@ def clear_database() -> int:
             else:
                 print(f"[DB] Warning: {remaining} posts still remaining after delete")
             
+            clear_known_post_cache()
             return total_deleted
         else:
             print("[DB] Database already empty")
+            clear_known_post_cache()
             return 0
     except Exception as e:
         print(f"[ERROR] Failed to clear database: {e}")
@@ -318,8 +334,14 @@ def print_scrape_metadata(facebook_groups: list) -> None:
     print(f"  Keywords:            {len(KEYWORDS)}")
     print(f"  Scrape interval:     {SCRAPE_INTERVAL_MINUTES} min {'(loop immediately)' if SCRAPE_INTERVAL_MINUTES == 0 else ''}")
     print(f"  Clear DB on start:   {CLEAR_DATABASE_ON_START}")
+    print(f"  Post retention:      {f'{POST_RETENTION_DAYS} days' if POST_RETENTION_DAYS > 0 else 'keep all'}")
     print(f"  Max post age:        {MAX_POST_AGE_HOURS}h")
     print(f"  Mode:                {'Parallel' if PARALLEL_MODE else 'Sequential'}")
+    print(f"  AI concurrency:      {AI_MAX_CONCURRENCY} calls/group ({OPENAI_RPM_LIMIT} RPM, {OPENAI_TPM_LIMIT} TPM)")
+    if get_local_classifier():
+        print(f"  Local classifier:    skips confident {LOCAL_CLASSIFIER_SCOPE} (>= {LOCAL_CLASSIFIER_THRESHOLD:.0%})")
+    else:
+        print(f"  Local classifier:    off (no trained model)")
     print(f"  Verbose output:      {'ON' if VERBOSE_OUTPUT else 'OFF'}")
     print(f"  Email categories:    {EMAIL_CATEGORIES}")
     print(f"{'─'*60}")
@@ -348,6 +370,7 @@ def scrape_single_group(group_config: dict, group_idx: int, total_groups: int, o
         "group_name": group_name,
         "scraped": 0,
         "new_saved": 0,
+        "new_queued": 0,
         "skipped_existing": 0,
         "skipped_unknown": 0,
         "skipped_offers": 0,
@@ -374,13 +397,9 @@ def scrape_single_group(group_config: dict, group_idx: int, total_groups: int, o
         # Filter out existing posts (by ID and text content)
         existing_count = 0
         if posts:
-            new_posts_only = []
-            for post in posts:
-                post_id = post.get('post_id')
-                if is_duplicate_post(post_id, post.get('text', '')):
-                    existing_count += 1
-                else:
-                    new_posts_only.append(post)
+            duplicate_ids = find_duplicates(posts)
+            new_posts_only = [p for p in posts if p.get('post_id') not in duplicate_ids]
+            existing_count = len(posts) - len(new_posts_only)
             result["skipped_existing"] = existing_count
             posts = new_posts_only
         
@@ -393,11 +412,14 @@ def scrape_single_group(group_config: dict, group_idx: int, total_groups: int, o
         
         # AI filtering for service requests
         offers_count = 0
+        request_analyses = []
         if openai_ok and posts:
             filtered_posts = []
-            for post in posts:
-                if is_service_request(post.get('title', ''), post.get('text', '')):
+            # All of the group's posts are analyzed concurrently; results come back in post order
+            for post, analysis in zip(posts, analyze_posts(posts)):
+                if analysis["is_request"]:
                     filtered_posts.append(post)
+                    request_analyses.append(analysis)
                 else:
                     offers_count += 1
             result["skipped_offers"] = offers_count
@@ -407,19 +429,15 @@ def scrape_single_group(group_config: dict, group_idx: int, total_groups: int, o
         notified_count = 0
         
         if openai_ok and posts:
-            for post in posts:
+            # Each request's analysis from the offer filter (one AI pass per group)
+            for post, ai_result in zip(posts, request_analyses):
                 title = post.get('title', '')
                 text = post.get('text', '')
                 
-                # Categorize with AI
-                try:
-                    ai_result = process_post_with_ai(title, text, post.get('post_id', ''))
-                    ai_category = ai_result.get("category", "General")
-                    if ai_result.get("location"):
-                        post["location"] = ai_result.get("location")
-                    post["secondary_categories"] = ai_result.get("secondary_categories", [])
-                except Exception:
-                    ai_category = "General"
+                ai_category = ai_result.get("category", "General")
+                if ai_result.get("location"):
+                    post["location"] = ai_result.get("location")
+                post["secondary_categories"] = ai_result.get("secondary_categories", [])
                 
                 # Apply keyword fallback if AI returned General
                 category = get_category_with_fallback(title, text, ai_category)
@@ -443,11 +461,13 @@ def scrape_single_group(group_config: dict, group_idx: int, total_groups: int, o
         
         # Save to database
         if posts:
-            new_count, _ = save_posts(posts)
+            new_count, _, queued_count = save_posts(posts)
             result["new_saved"] = new_count
+            result["new_queued"] = queued_count
         
+        queued_note = f", queued {result['new_queued']}" if result["new_queued"] else ""
         with print_lock:
-            print(f"[{group_idx}/{total_groups}] {group_name[:40]} - DONE (saved {result['new_saved']})")
+            print(f"[{group_idx}/{total_groups}] {group_name[:40]} - DONE (saved {result['new_saved']}{queued_note})")
         
     except Exception as e:
         result["error"] = str(e)[:100]
@@ -564,6 +584,7 @@ def scrape_group_with_persistent_driver(driver, group_config: dict, group_idx: i
         "group_name": group_name,
         "scraped": 0,
         "new_saved": 0,
+        "new_queued": 0,
         "skipped_existing": 0,
         "skipped_unknown": 0,
         "skipped_offers": 0,
@@ -592,13 +613,9 @@ def scrape_group_with_persistent_driver(driver, group_config: dict, group_idx: i
         # Filter out existing posts (by ID and text content)
         existing_count = 0
         if posts:
-            new_posts_only = []
-            for post in posts:
-                post_id = post.get('post_id')
-                if is_duplicate_post(post_id, post.get('text', '')):
-                    existing_count += 1
-                else:
-                    new_posts_only.append(post)
+            duplicate_ids = find_duplicates(posts)
+            new_posts_only = [p for p in posts if p.get('post_id') not in duplicate_ids]
+            existing_count = len(posts) - len(new_posts_only)
             result["skipped_existing"] = existing_count
             posts = new_posts_only
         
@@ -611,11 +628,14 @@ def scrape_group_with_persistent_driver(driver, group_config: dict, group_idx: i
         
         # AI filtering for service requests
         offers_count = 0
+        request_analyses = []
         if openai_ok and posts:
             filtered_posts = []
-            for post in posts:
-                if is_service_request(post.get('title', ''), post.get('text', '')):
+            # All of the group's posts are analyzed concurrently; results come back in post order
+            for post, analysis in zip(posts, analyze_posts(posts)):
+                if analysis["is_request"]:
                     filtered_posts.append(post)
+                    request_analyses.append(analysis)
                 else:
                     offers_count += 1
             result["skipped_offers"] = offers_count
@@ -625,19 +645,15 @@ def scrape_group_with_persistent_driver(driver, group_config: dict, group_idx: i
         notified_count = 0
         
         if openai_ok and posts:
-            for post in posts:
+            # Each request's analysis from the offer filter (one AI pass per group)
+            for post, ai_result in zip(posts, request_analyses):
                 title = post.get('title', '')
                 text = post.get('text', '')
                 
-                # Categorize with AI
-                try:
-                    ai_result = process_post_with_ai(title, text, post.get('post_id', ''))
-                    ai_category = ai_result.get("category", "General")
-                    if ai_result.get("location"):
-                        post["location"] = ai_result.get("location")
-                    post["secondary_categories"] = ai_result.get("secondary_categories", [])
-                except Exception:
-                    ai_category = "General"
+                ai_category = ai_result.get("category", "General")
+                if ai_result.get("location"):
+                    post["location"] = ai_result.get("location")
+                post["secondary_categories"] = ai_result.get("secondary_categories", [])
                 
                 # Apply keyword fallback if AI returned General
                 category = get_category_with_fallback(title, text, ai_category)
@@ -661,11 +677,13 @@ def scrape_group_with_persistent_driver(driver, group_config: dict, group_idx: i
         
         # Save to database
         if posts:
-            new_count, _ = save_posts(posts)
+            new_count, _, queued_count = save_posts(posts)
             result["new_saved"] = new_count
+            result["new_queued"] = queued_count
         
+        queued_note = f", queued {result['new_queued']}" if result["new_queued"] else ""
         with print_lock:
-            print(f"[{group_idx}/{total_groups}] {group_name[:40]} - DONE (saved {result['new_saved']})")
+            print(f"[{group_idx}/{total_groups}] {group_name[:40]} - DONE (saved {result['new_saved']}{queued_note})")
         
     except Exception as e:
         error_msg = str(e)[:100]
@@ -709,6 +727,7 @@ def run_scrape_cycle_persistent(facebook_groups: list, openai_ok: bool, cycle_nu
         "skipped_unknown": 0,
         "skipped_offers": 0,
         "new_saved": 0,
+        "new_queued": 0,
         "notified": 0,
         "errors": 0
     }
@@ -733,6 +752,7 @@ def run_scrape_cycle_persistent(facebook_groups: list, openai_ok: bool, cycle_nu
         total_stats["skipped_unknown"] += result.get("skipped_unknown", 0)
         total_stats["skipped_offers"] += result.get("skipped_offers", 0)
         total_stats["new_saved"] += result.get("new_saved", 0)
+        total_stats["new_queued"] += result.get("new_queued", 0)
         total_stats["notified"] += result.get("notified", 0)
         if result.get("error"):
             total_stats["errors"] += 1
@@ -745,6 +765,8 @@ def run_scrape_cycle_persistent(facebook_groups: list, openai_ok: bool, cycle_nu
     print(f"  Scraped: {total_stats['scraped']:>4} posts from {num_groups} groups")
     print(f"  Skipped: {total_stats['skipped_unknown']:>4} hash-ID | {total_stats['skipped_existing']:>4} in DB | {total_stats['skipped_offers']:>4} offers")
     print(f"  Saved:   {total_stats['new_saved']:>4} new posts")
+    if total_stats['new_queued']:
+        print(f"  Queued:  {total_stats['new_queued']:>4} posts for the write-behind flusher")
     if total_stats["errors"] > 0:
         print(f"  Errors:  {total_stats['errors']:>4} groups failed")
     
@@ -778,6 +800,7 @@ def run_scrape_cycle_parallel(facebook_groups: list, openai_ok: bool, cycle_num:
         "skipped_unknown": 0,
         "skipped_offers": 0,
         "new_saved": 0,
+        "new_queued": 0,
         "notified": 0,
         "errors": 0
     }
@@ -810,6 +833,7 @@ def run_scrape_cycle_parallel(facebook_groups: list, openai_ok: bool, cycle_num:
                 total_stats["skipped_unknown"] += result.get("skipped_unknown", 0)
                 total_stats["skipped_offers"] += result.get("skipped_offers", 0)
                 total_stats["new_saved"] += result.get("new_saved", 0)
+                total_stats["new_queued"] += result.get("new_queued", 0)
                 total_stats["notified"] += result.get("notified", 0)
                 if result.get("error"):
                     total_stats["errors"] += 1
@@ -826,6 +850,8 @@ def run_scrape_cycle_parallel(facebook_groups: list, openai_ok: bool, cycle_num:
     print(f"  Scraped: {total_stats['scraped']:>4} posts from {num_groups} groups")
     print(f"  Skipped: {total_stats['skipped_unknown']:>4} hash-ID | {total_stats['skipped_existing']:>4} in DB | {total_stats['skipped_offers']:>4} offers")
     print(f"  Saved:   {total_stats['new_saved']:>4} new posts")
+    if total_stats['new_queued']:
+        print(f"  Queued:  {total_stats['new_queued']:>4} posts for the write-behind flusher")
     if total_stats['notified']:
         print(f"  Emails:  {total_stats['notified']:>4} notifications sent")
     if total_stats['errors']:
@@ -857,6 +883,7 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
         "skipped_unknown": 0,
         "skipped_offers": 0,
         "new_saved": 0,
+        "new_queued": 0,
         "notified": 0,
         "errors": 0
     }
@@ -945,13 +972,9 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
             # Filter out existing posts (by ID and text content)
             existing_count = 0
             if posts:
-                new_posts_only = []
-                for post in posts:
-                    post_id = post.get('post_id')
-                    if is_duplicate_post(post_id, post.get('text', '')):
-                        existing_count += 1
-                    else:
-                        new_posts_only.append(post)
+                duplicate_ids = find_duplicates(posts)
+                new_posts_only = [p for p in posts if p.get('post_id') not in duplicate_ids]
+                existing_count = len(posts) - len(new_posts_only)
                 total_stats["skipped_existing"] += existing_count
                 posts = new_posts_only
             
@@ -970,14 +993,17 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
                 posts = [p for p in posts if is_post_recent(p, MAX_POST_AGE_HOURS, log_skip=False)]
             
             # AI filtering for service requests
+            request_analyses = []
             if openai_ok and posts:
                 filtered_posts = []
-                for post in posts:
+                # All of the group's posts are analyzed concurrently; results come back in post order
+                for post, analysis in zip(posts, analyze_posts(posts)):
                     title = post.get('title', '')
                     text = post.get('text', '')
-                    is_request = is_service_request(title, text)
+                    is_request = analysis["is_request"]
                     if is_request:
                         filtered_posts.append(post)
+                        request_analyses.append(analysis)
                         if VERBOSE_OUTPUT:
                             print(f"      [REQUEST] {title[:60]}")
                             print(f"        Text: {text[:150]}{'...' if len(text) > 150 else ''}")
@@ -985,25 +1011,21 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
                     else:
                         total_stats["skipped_offers"] += 1
                         if VERBOSE_OUTPUT:
-                            print(f"      [OFFER] {title[:60]}")
+                            print(f"      [OFFER] ({analysis['rejected_by']}) {title[:60]}")
                             print(f"        Text: {text[:150]}{'...' if len(text) > 150 else ''}")
                 posts = filtered_posts
             
             # Categorize with AI and send emails for relevant categories
             if openai_ok and posts:
-                for post in posts:
+                # Each request's analysis from the offer filter (one AI pass per group)
+                for post, ai_result in zip(posts, request_analyses):
                     title = post.get('title', '')
                     text = post.get('text', '')
                     
-                    # Categorize with AI
-                    try:
-                        ai_result = process_post_with_ai(title, text, post.get('post_id', ''))
-                        ai_category = ai_result.get("category", "General")
-                        if ai_result.get("location"):
-                            post["location"] = ai_result.get("location")
-                        post["secondary_categories"] = ai_result.get("secondary_categories", [])
-                    except Exception:
-                        ai_category = "General"
+                    ai_category = ai_result.get("category", "General")
+                    if ai_result.get("location"):
+                        post["location"] = ai_result.get("location")
+                    post["secondary_categories"] = ai_result.get("secondary_categories", [])
                     
                     # Apply keyword fallback if AI returned General
                     category = get_category_with_fallback(title, text, ai_category)
@@ -1031,9 +1053,10 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
             
             # Save to database
             if posts:
-                new_count, _ = save_posts(posts)
+                new_count, _, queued_count = save_posts(posts)
                 total_stats["new_saved"] += new_count
-                print(f"    Saved {new_count} posts")
+                total_stats["new_queued"] += queued_count
+                print(f"    Saved {new_count} posts" + (f", queued {queued_count}" if queued_count else ""))
             
         except Exception as e:
             print(f"    [ERROR] {str(e)[:50]}")
@@ -1062,6 +1085,8 @@ def run_scrape_cycle_multitab(driver, facebook_groups: list, openai_ok: bool, cy
     print(f"  Scraped: {total_stats['scraped']:>4} posts from {len(facebook_groups)} groups")
     print(f"  Skipped: {total_stats['skipped_unknown']:>4} hash-ID | {total_stats['skipped_existing']:>4} already in DB | {total_stats['skipped_offers']:>4} service offers")
     print(f"  Saved:   {total_stats['new_saved']:>4} new posts to database")
+    if total_stats['new_queued']:
+        print(f"  Queued:  {total_stats['new_queued']:>4} posts for the write-behind flusher")
     if total_stats['notified']:
         print(f"  Emails:  {total_stats['notified']:>4} notifications sent")
     if total_stats['errors']:
@@ -1089,6 +1114,7 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
     skipped_existing = 0
     skipped_unknown = 0
     skipped_offers = 0
+    queued_saves = 0  # Posts queued for the write-behind flusher, not written yet
     auto_messages_sent = 0  # Track DMs sent this cycle
 
     # Loop through all Facebook groups from config
@@ -1129,13 +1155,9 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
         # EARLY CHECK: Filter out posts that already exist in database (by ID and text)
         existing_count = 0
         if posts:
-            new_posts_only = []
-            for post in posts:
-                post_id = post.get('post_id')
-                if is_duplicate_post(post_id, post.get('text', '')):
-                    existing_count += 1
-                else:
-                    new_posts_only.append(post)
+            duplicate_ids = find_duplicates(posts)
+            new_posts_only = [p for p in posts if p.get('post_id') not in duplicate_ids]
+            existing_count = len(posts) - len(new_posts_only)
             skipped_existing += existing_count
             posts = new_posts_only
         
@@ -1153,57 +1175,49 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
         # STEP 1: Filter out SERVICE OFFERS first (keep only requests)
         # ==========================================================================
         offers_count = 0
-        cached_skip_count = 0
+        request_analyses = []  # analyze_post() result of each post kept in `posts`
         if openai_ok and posts:
             print(f"    Filtering offers...", end="" if not VERBOSE_OUTPUT else "\n", flush=True)
             filtered_posts = []
+            # Offers seen before (this session or earlier, under any post ID) are answered
+            # from the AI result cache, so re-evaluating them every cycle costs no API call
+            ai_hits_before = get_result_cache().stats()["hits"]
             
-            for post in posts:
-                post_hash = post.get('post_id', '')
+            # All of the group's posts are analyzed concurrently; results come back in post order
+            for post, analysis in zip(posts, analyze_posts(posts)):
                 title = post.get('title', '')
                 text = post.get('text', '')
                 
-                # Check session cache first — avoids re-evaluating the same rejected posts every cycle
-                if post_hash in _rejected_post_hashes:
-                    cached_skip_count += 1
-                    offers_count += 1
-                    if VERBOSE_OUTPUT:
-                        print(f"      [OFFER-cached] {title[:60]}")
-                    continue
-                
-                is_request = is_service_request(title, text)
+                is_request = analysis["is_request"]
                 if is_request:
                     filtered_posts.append(post)
+                    request_analyses.append(analysis)
                     if VERBOSE_OUTPUT:
                         print(f"      [REQUEST] {title[:60]}")
                         print(f"        Text: {text[:150]}{'...' if len(text) > 150 else ''}")
                         print(f"        Link: {post.get('url', 'N/A')}")
                 else:
                     offers_count += 1
-                    # Cache the rejection so we don't re-evaluate next cycle
-                    _rejected_post_hashes.add(post_hash)
                     if VERBOSE_OUTPUT:
-                        print(f"      [OFFER] {title[:60]}")
+                        print(f"      [OFFER] ({analysis['rejected_by']}) {title[:60]}")
                         print(f"        Text: {text[:150]}{'...' if len(text) > 150 else ''}")
             
             skipped_offers += offers_count
             posts = filtered_posts
-            cache_note = f" ({cached_skip_count} cached)" if cached_skip_count > 0 else ""
+            cached_count = get_result_cache().stats()["hits"] - ai_hits_before
+            cache_note = f" ({cached_count} cached)" if cached_count > 0 else ""
             print(f"    kept {len(posts)} requests, removed {offers_count} offers{cache_note}")
         
         # Filter out old posts BEFORE processing
         if posts:
-            recent_posts = []
-            old_count = 0
-            for post in posts:
-                if is_post_recent(post, MAX_POST_AGE_HOURS, log_skip=False):
-                    recent_posts.append(post)
-                else:
-                    old_count += 1
+            recent = [is_post_recent(post, MAX_POST_AGE_HOURS, log_skip=False) for post in posts]
+            old_count = recent.count(False)
             
             if old_count > 0:
                 print(f"    Filtered {old_count} posts older than {MAX_POST_AGE_HOURS}h")
-            posts = recent_posts
+            posts = [post for post, keep in zip(posts, recent) if keep]
+            if request_analyses:
+                request_analyses = [analysis for analysis, keep in zip(request_analyses, recent) if keep]
         
         # ==========================================================================
         # STEP 2: Categorize posts with AI and send emails for relevant categories
@@ -1211,20 +1225,15 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
         # ==========================================================================
         if openai_ok and posts:
             print(f"    Categorizing {len(posts)} posts...")
-            for post in posts:
+            # Each request's analysis from the offer filter (one AI pass per group)
+            for post, ai_result in zip(posts, request_analyses):
                 title = post.get('title', '')
                 text = post.get('text', '')
                 
-                # Categorize with AI
-                try:
-                    ai_result = process_post_with_ai(title, text, post.get('post_id', ''))
-                    ai_category = ai_result.get("category", "General")
-                    if ai_result.get("location"):
-                        post["location"] = ai_result.get("location")
-                    post["secondary_categories"] = ai_result.get("secondary_categories", [])
-                except Exception as e:
-                    print(f"    [AI ERROR] {str(e)[:50]}")
-                    ai_category = "General"
+                ai_category = ai_result.get("category", "General")
+                if ai_result.get("location"):
+                    post["location"] = ai_result.get("location")
+                post["secondary_categories"] = ai_result.get("secondary_categories", [])
                 
                 # Apply keyword fallback if AI returned General
                 category = get_category_with_fallback(title, text, ai_category)
@@ -1363,9 +1372,10 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
         saved_count = 0
         if posts:
             print(f"    Saving...", end=" ", flush=True)
-            new_count, db_skipped_count = save_posts(posts)
+            new_count, db_skipped_count, queued_count = save_posts(posts)
             saved_count = new_count
-            print(f"saved {new_count} posts")
+            queued_saves += queued_count
+            print(f"saved {new_count} posts" + (f", queued {queued_count}" if queued_count else ""))
             
             if new_count > 0:
                 all_new_posts.extend(posts[:new_count])
@@ -1386,6 +1396,8 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
     print(f"  Scraped: {len(all_scraped_posts):>4} posts from {len(facebook_groups)} groups")
     print(f"  Skipped: {skipped_unknown:>4} hash-ID | {skipped_existing:>4} already in DB | {skipped_offers:>4} service offers")
     print(f"  Saved:   {len(all_new_posts):>4} new posts to database")
+    if queued_saves:
+        print(f"  Queued:  {queued_saves:>4} posts for the write-behind flusher")
     print(f"  Matches: {len(all_relevant_posts):>4} posts match keywords")
     if new_relevant_posts:
         print(f"  Emails:  {len(new_relevant_posts):>4} notifications sent")
@@ -1398,6 +1410,7 @@ def run_scrape_cycle(driver, facebook_groups: list, openai_ok: bool, cycle_num:
         "skipped_unknown": skipped_unknown,
         "skipped_offers": skipped_offers,
         "new_saved": len(all_new_posts),
+        "new_queued": queued_saves,
         "relevant": len(all_relevant_posts),
         "notified": len(new_relevant_posts),
         "auto_messages": auto_messages_sent,
@@ -1457,6 +1470,14 @@ def main() -> int:
     print("Press Ctrl+C to stop gracefully")
     print("="*80)
     
+    # Load Facebook groups from config
+    facebook_groups = load_facebook_groups()
+    
+    # One database connection per scraper thread (all groups at once in parallel
+    # mode), plus the write-behind flusher; before anything uses the database
+    scrape_workers = max(len(facebook_groups), MAX_PARALLEL_BROWSERS) if PARALLEL_MODE else 1
+    size_connection_pool(scrape_workers)
+    
     # Clear database FIRST if toggle is enabled
     if CLEAR_DATABASE_ON_START:
         print("\n" + "="*80)
@@ -1465,14 +1486,30 @@ def main() -> int:
         clear_database()
     else:
         print("\n[CONFIG] CLEAR_DATABASE_ON_START = False (keeping existing posts)")
+        if POST_RETENTION_DAYS > 0:
+            archived = archive_old_posts(POST_RETENTION_DAYS)
+            print(f"[DB] Archived {archived} posts older than {POST_RETENTION_DAYS} days")
+    
+    # Preload known posts so the first cycle doesn't re-check the whole feed over the network
+    if KNOWN_POST_CACHE_WARM_DAYS > 0:
+        loaded = warm_known_post_cache(KNOWN_POST_CACHE_WARM_DAYS)
+        print(f"[CACHE] Warmed known-post cache with {loaded} posts from the last {KNOWN_POST_CACHE_WARM_DAYS} days")
+    
+    # Local storage: push saved posts to Supabase in the background (write-behind)
+    if STORAGE_BACKEND == "sqlite":
+        if start_background_sync():
+            print("[DB] Local SQLite storage, syncing to Supabase in the background")
+        else:
+            print("[DB] Local SQLite storage only (Supabase not configured)")
+    # Supabase storage: queue writes in the outbox so scraping never waits on the database
+    elif DB_WRITE_BEHIND:
+        if start_background_sync():
+            print("[DB] Write-behind enabled, database writes are flushed from the outbox in the background")
     
     # Check OpenAI API key
     print("\n[CONFIG] Checking API keys...")
     openai_ok = check_openai_api_key()
     
-    # Load Facebook groups from config
-    facebook_groups = load_facebook_groups()
-    
     if not facebook_groups:
         print("No enabled Facebook groups found in config/groups.json")
         return 1
@@ -1540,6 +1577,27 @@ def main() -> int:
             total_stats["total_new"] += stats.get("new_saved", 0)
             total_stats["total_notified"] += stats.get("notified", 0)
             
+            cache_stats = get_cache_stats()["known_posts"]
+            print(f"[CACHE] Known posts: {cache_stats['size']} cached | "
+                  f"{cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
+            
+            ai_stats = get_result_cache().stats()
+            print(f"[CACHE] AI results: {ai_stats['disk_size']} stored | "
+                  f"{ai_stats['hits']} hits / {ai_stats['misses']} misses ({ai_stats['hit_rate']:.0%} hit rate)")
+            local_classifier = get_local_classifier()
+            if local_classifier:
+                local_stats = local_classifier.stats()
+                print(f"[AI] Local classifier: {local_stats['decided']} of {local_stats['decided'] + local_stats['passed']} "
+                      f"posts decided without an AI call ({local_stats['decided_rate']:.0%})")
+            
+            limiter = get_rate_limiter()
+            if limiter.retries or limiter.waited_seconds:
+                print(f"[AI] Rate limit: calls waited {limiter.waited_seconds:.1f}s in total | {limiter.retries} retries (429/5xx)")
+            
+            for endpoint, latency in get_latency_stats().items():
+                print(f"[DB] {endpoint}: {latency['count']} requests | "
+                      f"p50 {latency['p50_ms']:g} ms, p99 {latency['p99_ms']:g} ms, max {latency['max_ms']:g} ms")
+            
             if shutdown_requested:
                 break
             
@@ -1596,6 +1654,10 @@ def cleanup_on_exit():
         close_persistent_browsers()
     # Kill any remaining scraper Edge instances (profile-specific)
     close_scraper_edge_instances()
+    # Push whatever the write-behind sync hasn't sent yet
+    unsynced = stop_background_sync()
+    if unsynced:
+        print(f"[DB] {unsynced} pending writes not yet synced to Supabase (will sync on next start)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+-- Write watermark for the dashboard API response cache.
+-- A single row whose version is bumped once per statement that writes to
+-- posts (save_posts batch, mark_as_notified, deletes, ...). The backend
+-- compares it to decide whether cached responses are still valid.
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO data_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE data_version ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations on data_version" ON data_version;
+CREATE POLICY "Allow all operations on data_version" ON data_version
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+CREATE OR REPLACE FUNCTION bump_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1, updated_at = NOW() WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level: one bump per write request, not per row
+DROP TRIGGER IF EXISTS bump_posts_data_version ON posts;
+CREATE TRIGGER bump_posts_data_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON posts
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_data_version();
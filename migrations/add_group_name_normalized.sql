@@ -0,0 +1,38 @@
+-- Normalized group name for server-side group filtering and grouping.
+-- Facebook tab titles carry unread-count prefixes like "(1) " / "(12) ";
+-- same rule as normalize_group_name() in Python.
+
+ALTER TABLE posts 
+ADD COLUMN IF NOT EXISTS group_name_normalized TEXT;
+
+-- Backfill existing rows
+UPDATE posts 
+SET group_name_normalized = regexp_replace(group_name, '^\(\d+\)\s*', '')
+WHERE group_name_normalized IS NULL;
+
+-- Keep it in sync for every writer, including ones that don't set it
+-- (e.g. the save_posts_batch RPC)
+CREATE OR REPLACE FUNCTION set_group_name_normalized()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.group_name_normalized = regexp_replace(NEW.group_name, '^\(\d+\)\s*', '');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_posts_group_name_normalized ON posts;
+CREATE TRIGGER set_posts_group_name_normalized
+    BEFORE INSERT OR UPDATE OF group_name ON posts
+    FOR EACH ROW
+    EXECUTE FUNCTION set_group_name_normalized();
+
+CREATE INDEX IF NOT EXISTS idx_posts_group_name_normalized ON posts(group_name_normalized);
+
+-- Post counts per normalized group (used for stats by_group)
+CREATE OR REPLACE VIEW posts_by_group AS
+SELECT group_name_normalized AS group_name, COUNT(*) AS count
+FROM posts
+GROUP BY group_name_normalized
+ORDER BY count DESC;
+
+COMMENT ON COLUMN posts.group_name_normalized IS 'group_name without the "(N) " Facebook tab prefix';
@@ -0,0 +1,24 @@
+-- Partial indexes for "what still needs action" lookups.
+-- Only the rows still pending (or, for auto-messages, the few that were
+-- messaged) are indexed, so these stay small and cheap to scan as most of
+-- the table becomes historical. They replace the full boolean indexes.
+
+-- Posts not yet notified, in dashboard order: the "only new" list and count
+CREATE INDEX IF NOT EXISTS idx_posts_pending_notification
+    ON posts (posted_at DESC NULLS LAST, id DESC)
+    WHERE notified = false;
+
+DROP INDEX IF EXISTS idx_posts_notified;
+
+-- Auto-message dedup (was_auto_message_sent): "has this post, or one with
+-- the same text, been messaged?" only ever looks at messaged rows
+CREATE INDEX IF NOT EXISTS idx_posts_messaged_text_hash
+    ON posts (text_hash)
+    WHERE auto_message_sent = true;
+
+DROP INDEX IF EXISTS idx_posts_auto_message_sent;
+
+-- The notifier emails posts as they are categorized and never read the
+-- pending_notifications queue; remove it where an earlier version created it
+DROP FUNCTION IF EXISTS get_pending_notifications(TEXT[], INTEGER, INTEGER);
+DROP VIEW IF EXISTS pending_notifications;
@@ -0,0 +1,81 @@
+-- Column projections for the dashboard API (/api/posts?fields=...).
+-- The list view only needs metadata and the start of each post, so it reads
+-- the text_preview computed column instead of the full body, and search
+-- results can be narrowed to the requested columns in the database.
+
+-- First 300 characters of a post (backend/app/db.py LIST_PREVIEW_CHARS)
+CREATE OR REPLACE FUNCTION post_text_preview(body TEXT)
+RETURNS TEXT AS $$
+    SELECT left(body, 300);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Text for the post list: the preview, except for posts without an AI
+-- category, which the dashboard categorizes by keywords found anywhere in
+-- the post (frontend getCategoryDisplay), so they keep the whole body
+CREATE OR REPLACE FUNCTION post_list_text(body TEXT, category TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN category IS NULL OR category IN ('Other', 'General')
+                THEN body ELSE post_text_preview(body) END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Computed column: select=...,text_preview (or text:text_preview)
+CREATE OR REPLACE FUNCTION text_preview(posts)
+RETURNS TEXT AS $$
+    SELECT post_list_text($1.text, $1.category);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- search_posts gains select_columns / with_text_preview; drop the old
+-- signature so PostgREST doesn't see two overloads
+DROP FUNCTION IF EXISTS search_posts(TEXT, INTEGER, INTEGER, TEXT, TEXT, BOOLEAN, TEXT, TEXT, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION search_posts(
+    search_query TEXT,
+    page_limit INTEGER DEFAULT 100,
+    page_offset INTEGER DEFAULT 0,
+    filter_group_url TEXT DEFAULT NULL,
+    filter_group_name TEXT DEFAULT NULL,
+    only_new BOOLEAN DEFAULT FALSE,
+    filter_category TEXT DEFAULT NULL,
+    filter_location TEXT DEFAULT NULL,
+    with_count BOOLEAN DEFAULT TRUE,
+    select_columns TEXT[] DEFAULT NULL,      -- NULL = every column (and rank)
+    with_text_preview BOOLEAN DEFAULT FALSE  -- add text = post_list_text(text, category)
+)
+RETURNS JSON AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('norwegian'::regconfig, search_query) AS query
+    ),
+    matches AS (
+        SELECT p.*, ts_rank(post_search_vector(p.title, p.text), q.query) AS rank
+        FROM posts p, q
+        WHERE post_search_vector(p.title, p.text) @@ q.query
+          AND (filter_group_url IS NULL OR p.group_url = filter_group_url)
+          AND (filter_group_name IS NULL OR p.group_name_normalized = filter_group_name)
+          AND (NOT only_new OR p.notified = FALSE)
+          AND (filter_category IS NULL OR p.category = filter_category)
+          AND (filter_location IS NULL OR p.location ILIKE '%' || filter_location || '%')
+    ),
+    page AS (
+        SELECT * FROM matches
+        ORDER BY rank DESC, posted_at DESC NULLS LAST, id DESC
+        LIMIT page_limit OFFSET page_offset
+    )
+    SELECT json_build_object(
+        'posts', COALESCE((
+            SELECT json_agg(
+                CASE WHEN select_columns IS NULL THEN to_jsonb(page)
+                ELSE COALESCE((
+                    SELECT jsonb_object_agg(key, value)
+                    FROM jsonb_each(to_jsonb(page))
+                    WHERE key = ANY (select_columns)
+                ), '{}'::jsonb)
+                END
+                || CASE WHEN with_text_preview
+                   THEN jsonb_build_object('text', post_list_text(page.text, page.category))
+                   ELSE '{}'::jsonb END
+                ORDER BY rank DESC, posted_at DESC NULLS LAST, id DESC
+            ) FROM page
+        ), '[]'::json),
+        'total', CASE WHEN with_count THEN (SELECT count(*) FROM matches) END
+    );
+$$ LANGUAGE sql STABLE;
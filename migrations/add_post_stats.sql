@@ -0,0 +1,109 @@
+-- Incrementally maintained dashboard statistics.
+-- A small counter table is kept up to date by a trigger on posts, and
+-- get_post_stats() returns total, new, by_group, by_category and by_day
+-- in one round trip, so /api/stats stays flat-latency as posts grows.
+-- Requires migrations/add_group_name_normalized.sql.
+
+CREATE TABLE IF NOT EXISTS post_stats (
+    dimension TEXT NOT NULL,          -- 'all', 'group', 'category' or 'day'
+    key TEXT NOT NULL,                -- '' for 'all', otherwise the group/category/YYYY-MM-DD
+    total BIGINT NOT NULL DEFAULT 0,
+    new_total BIGINT NOT NULL DEFAULT 0,  -- rows with notified = false
+    PRIMARY KEY (dimension, key)
+);
+
+ALTER TABLE post_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations on post_stats" ON post_stats;
+CREATE POLICY "Allow all operations on post_stats" ON post_stats
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+-- Add (sign = 1) or remove (sign = -1) one post from every counter it belongs to
+CREATE OR REPLACE FUNCTION bump_post_stats(p posts, sign INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    is_new INTEGER := CASE WHEN p.notified = FALSE THEN sign ELSE 0 END;
+BEGIN
+    INSERT INTO post_stats (dimension, key, total, new_total)
+    VALUES
+        ('all', '', sign, is_new),
+        ('group', COALESCE(p.group_name_normalized, 'Unknown'), sign, is_new),
+        ('category', COALESCE(NULLIF(p.category, ''), 'General'), sign, is_new),
+        ('day', to_char(COALESCE(p.posted_at, p.scraped_at) AT TIME ZONE 'UTC', 'YYYY-MM-DD'), sign, is_new)
+    ON CONFLICT (dimension, key) DO UPDATE
+    SET total = post_stats.total + EXCLUDED.total,
+        new_total = post_stats.new_total + EXCLUDED.new_total;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_post_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_post_stats(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_post_stats(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_posts_stats_insert_delete ON posts;
+CREATE TRIGGER update_posts_stats_insert_delete
+    AFTER INSERT OR DELETE ON posts
+    FOR EACH ROW
+    EXECUTE FUNCTION update_post_stats();
+
+-- Only updates that move a post between counters
+DROP TRIGGER IF EXISTS update_posts_stats_update ON posts;
+CREATE TRIGGER update_posts_stats_update
+    AFTER UPDATE ON posts
+    FOR EACH ROW
+    WHEN (OLD.notified IS DISTINCT FROM NEW.notified
+          OR OLD.category IS DISTINCT FROM NEW.category
+          OR OLD.group_name_normalized IS DISTINCT FROM NEW.group_name_normalized
+          OR OLD.posted_at IS DISTINCT FROM NEW.posted_at)
+    EXECUTE FUNCTION update_post_stats();
+
+-- Rebuild all counters from scratch (initial population, or repair after bulk SQL edits)
+CREATE OR REPLACE FUNCTION refresh_post_stats()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM post_stats;
+    PERFORM bump_post_stats(p, 1) FROM posts p;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Everything /api/stats needs, in one call
+CREATE OR REPLACE FUNCTION get_post_stats(days INTEGER DEFAULT 30)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total', COALESCE((SELECT total FROM post_stats WHERE dimension = 'all'), 0),
+        'new', COALESCE((SELECT new_total FROM post_stats WHERE dimension = 'all'), 0),
+        'by_group', COALESCE((
+            SELECT json_agg(json_build_object('group', key, 'count', total) ORDER BY total DESC)
+            FROM post_stats WHERE dimension = 'group' AND total > 0
+        ), '[]'::json),
+        'by_category', COALESCE((
+            SELECT json_agg(json_build_object('category', key, 'count', total) ORDER BY total DESC)
+            FROM post_stats WHERE dimension = 'category' AND total > 0
+        ), '[]'::json),
+        'by_day', COALESCE((
+            SELECT json_agg(json_build_object('day', key, 'count', total) ORDER BY key DESC)
+            FROM (
+                SELECT key, total FROM post_stats
+                WHERE dimension = 'day' AND total > 0
+                ORDER BY key DESC
+                LIMIT days
+            ) recent
+        ), '[]'::json)
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Superseded by get_post_stats()
+DROP VIEW IF EXISTS posts_by_group;
+
+SELECT refresh_post_stats();
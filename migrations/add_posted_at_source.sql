@@ -0,0 +1,40 @@
+-- Track how each post's posted_at was derived, so scripts/reparse_posted_at.py
+-- only re-parses rows it hasn't resolved yet.
+--   NULL          not resolved yet: parsed at save time (or never), not checked
+--                 against scraped_at
+--   'timestamp'   parsed from the Facebook timestamp, relative formats ("7h")
+--                 anchored on scraped_at
+--   'scraped_at'  timestamp not parseable (unknown format, hash id):
+--                 posted_at = scraped_at; re-parse with --retry-unparsed
+--                 after teaching the parser a new format
+
+ALTER TABLE posts
+ADD COLUMN IF NOT EXISTS posted_at_source TEXT;
+
+-- Rows the re-parse job still has to look at; stays small once resolved
+CREATE INDEX IF NOT EXISTS idx_posts_posted_at_unresolved
+    ON posts (id)
+    WHERE posted_at_source IS NULL OR posted_at_source = 'scraped_at';
+
+-- Write back a batch of re-parsed rows in one statement:
+-- updates = [{"id": 1, "posted_at": "...", "posted_at_source": "timestamp"}, ...]
+-- Returns the number of rows updated.
+CREATE OR REPLACE FUNCTION set_posted_at_batch(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE posts
+    SET posted_at = u.posted_at,
+        posted_at_source = u.posted_at_source
+    FROM jsonb_to_recordset(updates) AS u(id BIGINT, posted_at TIMESTAMPTZ, posted_at_source TEXT)
+    WHERE posts.id = u.id
+      AND (posts.posted_at IS DISTINCT FROM u.posted_at
+           OR posts.posted_at_source IS DISTINCT FROM u.posted_at_source);
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$;
@@ -0,0 +1,107 @@
+-- Retention: move old posts out of the live posts table into an archive
+-- partitioned by month, so dedup lookups and dashboard queries only touch
+-- recent rows however long the scraper has been running.
+--
+-- posts itself stays unpartitioned: a unique index on a partitioned table
+-- must include the partition key, and dedup relies on post_id being unique
+-- across all live posts (save_posts_batch upserts ON CONFLICT (post_id)).
+--
+-- Archived rows keep a few columns for lookups and the whole original row as
+-- JSONB (large values are TOAST-compressed), so the archive doesn't need to
+-- change when posts gains a column.
+
+CREATE TABLE IF NOT EXISTS posts_archive (
+    id BIGINT NOT NULL,
+    post_id TEXT NOT NULL,
+    text_hash TEXT,
+    category TEXT,
+    posted_at TIMESTAMPTZ,
+    scraped_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    data JSONB NOT NULL,
+    PRIMARY KEY (id, scraped_at)
+) PARTITION BY RANGE (scraped_at);
+
+CREATE INDEX IF NOT EXISTS idx_posts_archive_post_id ON posts_archive (post_id);
+
+ALTER TABLE posts_archive ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations on posts_archive" ON posts_archive;
+CREATE POLICY "Allow all operations on posts_archive" ON posts_archive
+    FOR ALL
+    USING (true)
+    WITH CHECK (true);
+
+-- Monthly partition posts_archive_YYYY_MM holding scraped_at in [month, month + 1)
+CREATE OR REPLACE FUNCTION ensure_posts_archive_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', month)::date;
+    partition_name TEXT := 'posts_archive_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF posts_archive FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, (month_start + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Move up to batch_size posts scraped more than older_than_days days ago into
+-- the archive (oldest first). Returns the number moved; call again until it
+-- returns less than batch_size.
+CREATE OR REPLACE FUNCTION archive_old_posts(older_than_days INTEGER, batch_size INTEGER DEFAULT 5000)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := NOW() - make_interval(days => older_than_days);
+    month_start DATE;
+    moved INTEGER;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', batch.scraped_at)::date
+        FROM (
+            SELECT scraped_at FROM posts
+            WHERE scraped_at < cutoff
+            ORDER BY scraped_at
+            LIMIT batch_size
+        ) batch
+    LOOP
+        PERFORM ensure_posts_archive_partition(month_start);
+    END LOOP;
+
+    WITH moved_rows AS (
+        DELETE FROM posts
+        WHERE id IN (
+            SELECT id FROM posts
+            WHERE scraped_at < cutoff
+            ORDER BY scraped_at
+            LIMIT batch_size
+        )
+        RETURNING *
+    )
+    INSERT INTO posts_archive (id, post_id, text_hash, category, posted_at, scraped_at, data)
+    SELECT id, post_id, text_hash, category, posted_at, scraped_at, to_jsonb(moved_rows)
+    FROM moved_rows;
+
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop one month of the archive (e.g. after exporting it to Parquet with
+-- scripts/archive_posts.py). Returns false if the partition didn't exist.
+CREATE OR REPLACE FUNCTION drop_posts_archive_partition(month DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    partition_name TEXT := 'posts_archive_' || to_char(date_trunc('month', month), 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('DROP TABLE %I', partition_name);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
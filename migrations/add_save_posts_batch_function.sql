@@ -0,0 +1,83 @@
+-- Batched save for save_posts(): one RPC call per scraped batch instead of
+-- 3-5 requests per post. Mirrors the rules in save_post():
+--   * post_id already exists  -> keep row, update category if the new one is better
+--   * same text_hash, new ID  -> skip, update category on the existing row if better
+--   * otherwise               -> insert
+-- "Better" = non-generic (not '', 'General', 'Other') and different,
+-- or any category when the existing row has none.
+-- Returns the number of newly inserted posts.
+-- Requires migrations/add_text_hash_column.sql.
+
+CREATE OR REPLACE FUNCTION save_posts_batch(new_posts JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted_count INTEGER;
+BEGIN
+    DROP TABLE IF EXISTS pg_temp.incoming, pg_temp.text_dups;
+
+    CREATE TEMP TABLE incoming ON COMMIT DROP AS
+    SELECT *
+    FROM jsonb_to_recordset(new_posts) AS p(
+        post_id TEXT,
+        title TEXT,
+        text TEXT,
+        url TEXT,
+        "timestamp" TEXT,
+        group_name TEXT,
+        group_url TEXT,
+        category TEXT,
+        location TEXT,
+        secondary_categories TEXT,
+        posted_at TIMESTAMPTZ,
+        text_hash TEXT
+    );
+
+    -- Same post already saved under a different ID (e.g. hash ID vs real Facebook ID)
+    CREATE TEMP TABLE text_dups ON COMMIT DROP AS
+    SELECT i.post_id AS new_post_id, e.post_id AS existing_post_id, e.category AS existing_category,
+           i.category, i.location, i.secondary_categories
+    FROM incoming i
+    JOIN LATERAL (
+        SELECT posts.post_id, posts.category
+        FROM posts
+        WHERE posts.text_hash = i.text_hash
+        LIMIT 1
+    ) e ON TRUE
+    WHERE i.text_hash IS NOT NULL
+      AND length(btrim(i.text)) >= 20
+      AND NOT EXISTS (SELECT 1 FROM posts x WHERE x.post_id = i.post_id);
+
+    UPDATE posts
+    SET category = d.category,
+        location = COALESCE(d.location, posts.location),
+        secondary_categories = COALESCE(d.secondary_categories, posts.secondary_categories)
+    FROM text_dups d
+    WHERE posts.post_id = d.existing_post_id
+      AND d.category NOT IN ('', 'General', 'Other')
+      AND d.category IS DISTINCT FROM d.existing_category;
+
+    WITH upserted AS (
+        INSERT INTO posts (
+            post_id, title, text, url, "timestamp", group_name, group_url,
+            category, location, secondary_categories, posted_at, text_hash, notified
+        )
+        SELECT i.post_id, i.title, i.text, i.url, i."timestamp", i.group_name, i.group_url,
+               COALESCE(i.category, 'General'), i.location, i.secondary_categories,
+               i.posted_at, i.text_hash, FALSE
+        FROM incoming i
+        WHERE NOT EXISTS (SELECT 1 FROM text_dups d WHERE d.new_post_id = i.post_id)
+        ON CONFLICT (post_id) DO UPDATE
+        SET category = EXCLUDED.category,
+            location = COALESCE(EXCLUDED.location, posts.location),
+            secondary_categories = COALESCE(EXCLUDED.secondary_categories, posts.secondary_categories)
+        WHERE (EXCLUDED.category NOT IN ('', 'General', 'Other') AND EXCLUDED.category IS DISTINCT FROM posts.category)
+           OR (COALESCE(EXCLUDED.category, '') <> '' AND COALESCE(posts.category, '') = '')
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted) INTO inserted_count FROM upserted;
+
+    RETURN inserted_count;
+END;
+$$;
@@ -0,0 +1,62 @@
+-- Indexed search for the dashboard `search` parameter.
+--   * search_mode=fts:       Norwegian full-text search, ranked, via search_posts()
+--   * search_mode=substring: title/text ILIKE '%q%', served by trigram indexes
+-- The tsvector is an index expression rather than a stored column so that
+-- select("*") responses don't carry a second copy of every post body.
+-- Requires migrations/add_group_name_normalized.sql.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Title words weigh more than body words when ranking
+CREATE OR REPLACE FUNCTION post_search_vector(title TEXT, body TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('norwegian'::regconfig, COALESCE(title, '')), 'A')
+        || setweight(to_tsvector('norwegian'::regconfig, COALESCE(body, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE INDEX IF NOT EXISTS idx_posts_search_vector
+    ON posts USING GIN (post_search_vector(title, text));
+
+-- Leading-wildcard ILIKE can use these (queries of 3+ characters)
+CREATE INDEX IF NOT EXISTS idx_posts_title_trgm ON posts USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_posts_text_trgm ON posts USING GIN (text gin_trgm_ops);
+
+-- Ranked full-text search with the /api/posts filters; page and total in one call.
+-- search_query uses web search syntax: words, "quoted phrases", OR, -excluded.
+CREATE OR REPLACE FUNCTION search_posts(
+    search_query TEXT,
+    page_limit INTEGER DEFAULT 100,
+    page_offset INTEGER DEFAULT 0,
+    filter_group_url TEXT DEFAULT NULL,
+    filter_group_name TEXT DEFAULT NULL,
+    only_new BOOLEAN DEFAULT FALSE,
+    filter_category TEXT DEFAULT NULL,
+    filter_location TEXT DEFAULT NULL,
+    with_count BOOLEAN DEFAULT TRUE
+)
+RETURNS JSON AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('norwegian'::regconfig, search_query) AS query
+    ),
+    matches AS (
+        SELECT p.*, ts_rank(post_search_vector(p.title, p.text), q.query) AS rank
+        FROM posts p, q
+        WHERE post_search_vector(p.title, p.text) @@ q.query
+          AND (filter_group_url IS NULL OR p.group_url = filter_group_url)
+          AND (filter_group_name IS NULL OR p.group_name_normalized = filter_group_name)
+          AND (NOT only_new OR p.notified = FALSE)
+          AND (filter_category IS NULL OR p.category = filter_category)
+          AND (filter_location IS NULL OR p.location ILIKE '%' || filter_location || '%')
+    ),
+    page AS (
+        SELECT * FROM matches
+        ORDER BY rank DESC, posted_at DESC NULLS LAST, id DESC
+        LIMIT page_limit OFFSET page_offset
+    )
+    SELECT json_build_object(
+        'posts', COALESCE((
+            SELECT json_agg(page ORDER BY rank DESC, posted_at DESC NULLS LAST, id DESC) FROM page
+        ), '[]'::json),
+        'total', CASE WHEN with_count THEN (SELECT count(*) FROM matches) END
+    );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,14 @@
+-- Add normalized-text hash column for duplicate detection
+-- (sha256 of the post text with whitespace stripped/collapsed, see _normalize_text)
+
+ALTER TABLE posts 
+ADD COLUMN IF NOT EXISTS text_hash TEXT;
+
+-- Partial index: dedup lookups only ever ask for non-null hashes.
+-- Not UNIQUE because older rows may already contain text duplicates saved under different IDs.
+CREATE INDEX IF NOT EXISTS idx_posts_text_hash ON posts(text_hash) WHERE text_hash IS NOT NULL;
+
+-- Existing rows are backfilled from Python (same normalization rules as the scraper):
+--   python scripts/backfill_text_hash.py
+
+COMMENT ON COLUMN posts.text_hash IS 'sha256 hex of normalized post text, used for duplicate detection';
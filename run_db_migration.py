@@ -25,10 +25,50 @@ with open("migrations/add_ai_columns.sql", "r") as f:
 with open("migrations/add_auto_message_columns.sql", "r") as f:
     auto_msg_sql = f.read()
 
+with open("migrations/add_text_hash_column.sql", "r") as f:
+    text_hash_sql = f.read()
+
+with open("migrations/add_save_posts_batch_function.sql", "r") as f:
+    save_batch_sql = f.read()
+
+with open("migrations/add_group_name_normalized.sql", "r") as f:
+    group_name_sql = f.read()
+
+with open("migrations/add_post_stats.sql", "r") as f:
+    post_stats_sql = f.read()
+
+with open("migrations/add_data_version.sql", "r") as f:
+    data_version_sql = f.read()
+
+with open("migrations/add_search_index.sql", "r") as f:
+    search_index_sql = f.read()
+
+with open("migrations/add_pending_indexes.sql", "r") as f:
+    pending_indexes_sql = f.read()
+
+with open("migrations/add_post_projections.sql", "r") as f:
+    post_projections_sql = f.read()
+
+with open("migrations/add_posts_archive.sql", "r") as f:
+    posts_archive_sql = f.read()
+
+with open("migrations/add_posted_at_source.sql", "r") as f:
+    posted_at_source_sql = f.read()
+
 print("\nMigrations to run:")
 print("  1. AI columns (category, location, etc.)")
 print("  2. posted_at column")
 print("  3. Auto-message columns (auto_message_sent, price, hours, etc.)")
+print("  4. text_hash column (normalized-text dedup)")
+print("  5. save_posts_batch function (batched save_posts)")
+print("  6. group_name_normalized column")
+print("  7. post_stats counters + get_post_stats function")
+print("  8. data_version watermark (API response cache invalidation)")
+print("  9. Full-text + trigram search indexes, search_posts function")
+print(" 10. Partial indexes for pending posts and messaged posts")
+print(" 11. text_preview computed column, search_posts column projection")
+print(" 12. posts_archive (monthly partitions) + archive_old_posts function")
+print(" 13. posted_at_source column + set_posted_at_batch function")
 
 # Print all SQL for user to run in Supabase
 try:
@@ -41,14 +81,36 @@ try:
     print(posted_at_sql)
     print("\n-- Migration 3: Auto-message columns")
     print(auto_msg_sql)
+    print("\n-- Migration 4: text_hash column")
+    print(text_hash_sql)
+    print("\n-- Migration 5: save_posts_batch function")
+    print(save_batch_sql)
+    print("\n-- Migration 6: group_name_normalized column")
+    print(group_name_sql)
+    print("\n-- Migration 7: post_stats counters")
+    print(post_stats_sql)
+    print("\n-- Migration 8: data_version watermark")
+    print(data_version_sql)
+    print("\n-- Migration 9: search indexes")
+    print(search_index_sql)
+    print("\n-- Migration 10: pending-post partial indexes")
+    print(pending_indexes_sql)
+    print("\n-- Migration 11: post projections")
+    print(post_projections_sql)
+    print("\n-- Migration 12: posts archive")
+    print(posts_archive_sql)
+    print("\n-- Migration 13: posted_at source")
+    print(posted_at_source_sql)
     print("="*70)
     
     input("\nPress Enter after running the SQL in Supabase...")
     
     # Verify columns exist
-    result = supabase.table("posts").select("category, location, posted_at, auto_message_sent").limit(1).execute()
+    result = supabase.table("posts").select("category, location, posted_at, auto_message_sent, text_hash").limit(1).execute()
     print("\n[OK] Migration successful! All columns are accessible.")
     print(f"Sample: {result.data[0] if result.data else 'No posts yet'}")
+    print("\nNext: python scripts/backfill_text_hash.py  (fills text_hash for existing rows)")
+    print("      python scripts/reparse_posted_at.py   (resolves posted_at for existing rows)")
     
 except Exception as e:
     print(f"\n[ERROR] {e}")
@@ -0,0 +1,145 @@
+"""
+Move old posts into posts_archive and export archived months to Parquet.
+
+Run migrations/add_posts_archive.sql first, then:
+    python scripts/archive_posts.py --days 90
+    python scripts/archive_posts.py --parquet data/archive [--drop-exported]
+
+--days moves posts scraped more than N days ago out of the posts table
+(the same as main.py with POST_RETENTION_DAYS set). --parquet writes each
+closed archived month to DIR/posts_YYYY_MM.parquet (zstd-compressed, needs
+pyarrow); with --drop-exported the month's archive partition is dropped
+once its file is written.
+
+A month is closed once it ends at or before the oldest post still in the
+posts table: archiving can't add rows to it any more. Months the retention
+cutoff has only partly passed are left in posts_archive until a later run.
+
+Safe to re-run: a month exported again is merged into its existing file
+(by id), so rows from an earlier export are never lost.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.supabase_db import supabase, archive_old_posts
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _oldest_archived_month() -> date | None:
+    result = supabase.table("posts_archive").select("scraped_at").order("scraped_at").limit(1).execute()
+    if not result.data:
+        return None
+    return date.fromisoformat(result.data[0]["scraped_at"][:7] + "-01")
+
+
+def _first_open_month() -> date:
+    """
+    First month archiving can still add rows to: the month of the oldest
+    post left in posts (or the current month when posts is empty).
+    """
+    current_month = date.today().replace(day=1)
+    result = supabase.table("posts").select("scraped_at").order("scraped_at").limit(1).execute()
+    if not result.data:
+        return current_month
+    return min(date.fromisoformat(result.data[0]["scraped_at"][:7] + "-01"), current_month)
+
+
+def _fetch_month(month: date, page_size: int) -> list[dict]:
+    """Every archived row of one month (the original posts rows), oldest id first."""
+    rows = []
+    last_id = 0
+    while True:
+        result = (
+            supabase.table("posts_archive")
+            .select("id, data")
+            .gte("scraped_at", month.isoformat())
+            .lt("scraped_at", _next_month(month).isoformat())
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
+            .execute()
+        )
+        page = result.data or []
+        rows.extend(row["data"] for row in page)
+        if len(page) < page_size:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def export_parquet(out_dir: str, drop_exported: bool = False, page_size: int = 1000) -> int:
+    """Write each closed archived month to Parquet (see _first_open_month). Returns number of posts written."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("[ERROR] Parquet export needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"EXPORT posts_archive -> {out_dir}")
+    print("=" * 60)
+
+    month = _oldest_archived_month()
+    first_open_month = _first_open_month()
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    while month is not None and month < first_open_month:
+        rows = _fetch_month(month, page_size)
+        if rows:
+            path = Path(out_dir) / f"posts_{month:%Y_%m}.parquet"
+            exported = len(rows)
+            if path.exists():
+                # Keep rows from an earlier export whose partition has since been dropped
+                archived_ids = {row["id"] for row in rows}
+                kept = [row for row in pq.read_table(path).to_pylist() if row.get("id") not in archived_ids]
+                rows = sorted(kept + rows, key=lambda row: row["id"])
+            pq.write_table(pa.Table.from_pylist(rows), path, compression="zstd")
+            written += exported
+            print(f"  {month:%Y-%m}: {exported} posts -> {path} ({len(rows)} in file, "
+                  f"{path.stat().st_size / 1024:.0f} KB)")
+            if drop_exported:
+                dropped = supabase.rpc("drop_posts_archive_partition", {"month": month.isoformat()}).execute()
+                print(f"  {month:%Y-%m}: archive partition {'dropped' if dropped.data else 'not found'}")
+        month = _next_month(month)
+
+    if month is not None and month >= first_open_month:
+        print(f"  From {first_open_month:%Y-%m} on: still has posts in the posts table, exported once fully archived")
+    print(f"\n[OK] Exported {written} archived posts")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old posts and export the archive to Parquet")
+    parser.add_argument("--days", type=int, help="Archive posts scraped more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--parquet", metavar="DIR", help="Export archived months to DIR/posts_YYYY_MM.parquet")
+    parser.add_argument("--drop-exported", action="store_true", help="Drop each archive partition once exported")
+    args = parser.parse_args()
+
+    if args.days is None and args.parquet is None:
+        parser.error("nothing to do: pass --days and/or --parquet")
+
+    try:
+        if args.days is not None:
+            moved = archive_old_posts(args.days, args.batch_size)
+            print(f"[OK] Archived {moved} posts older than {args.days} days")
+        if args.parquet:
+            export_parquet(args.parquet, args.drop_exported)
+    except Exception as e:
+        if "posts_archive" in str(e):
+            print("[ERROR] posts_archive missing. Run migrations/add_posts_archive.sql first.")
+        else:
+            print(f"[ERROR] {e}")
+        sys.exit(1)
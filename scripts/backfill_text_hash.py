@@ -0,0 +1,74 @@
+"""
+Backfill posts.text_hash for rows saved before the text_hash column existed.
+
+Run migrations/add_text_hash_column.sql first, then:
+    python scripts/backfill_text_hash.py [--batch-size 1000] [--workers 8]
+
+Safe to re-run: only rows with a NULL text_hash are touched.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.supabase_db import supabase, compute_text_hash
+
+
+def _update_hash(row: dict) -> bool:
+    text_hash = compute_text_hash(row.get("text", ""))
+    if not text_hash:
+        return False
+    supabase.table("posts").update({"text_hash": text_hash}).eq("id", row["id"]).execute()
+    return True
+
+
+def backfill_text_hash(batch_size: int = 1000, workers: int = 8) -> int:
+    """Compute text_hash for every row missing it. Returns number of rows updated."""
+    print("=" * 60)
+    print("BACKFILL text_hash")
+    print("=" * 60)
+
+    updated = 0
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Keyset pagination on id: rows with empty text keep a NULL hash,
+            # so filtering on text_hash alone would never terminate.
+            result = (
+                supabase.table("posts")
+                .select("id, text")
+                .is_("text_hash", "null")
+                .gt("id", last_id)
+                .order("id")
+                .limit(batch_size)
+                .execute()
+            )
+            rows = result.data or []
+            if not rows:
+                break
+
+            updated += sum(pool.map(_update_hash, rows))
+            last_id = rows[-1]["id"]
+            print(f"  Updated {updated} posts (last id: {last_id})...")
+
+    print(f"\n[OK] Backfilled text_hash for {updated} posts")
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill posts.text_hash")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    try:
+        backfill_text_hash(args.batch_size, args.workers)
+    except Exception as e:
+        if "text_hash" in str(e):
+            print("[ERROR] text_hash column missing. Run migrations/add_text_hash_column.sql first.")
+        else:
+            print(f"[ERROR] {e}")
+        sys.exit(1)
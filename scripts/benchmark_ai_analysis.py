@@ -0,0 +1,355 @@
+"""
+Benchmark: AI latency and token cost per post, before and after analyze_post().
+
+"legacy" replays the previous flow: is_service_request() asked for a
+one-word REQUEST/OFFER answer, then process_post_with_ai() sent requests
+again with the category prompt (two round trips per kept post). "combined"
+is the current flow, is_service_request() + process_post_with_ai() as thin
+views over analyze_post(): one structured-output call per post. Both apply
+the same deterministic offer pre-filter first. "reposted" runs the current
+flow once more over the same posts with the AI result cache kept, as for a
+repost or cross-post of a job already seen. Finally the posts are treated as
+one group's new posts and analyzed one at a time, with analyze_posts() one
+post per call (concurrent), and with analyze_posts() batched (several posts
+per call), to compare the group's wall-clock time and tokens per post.
+
+With OPENAI_API_KEY set, real requests are made (a few cents for the
+built-in sample) and the two flows' answers are compared. With --standin
+nothing leaves the machine: a stand-in answers, tokens are counted with
+tiktoken when installed (else ~4 characters per token), latency is modelled
+as --latency-ms per call plus --ms-per-token per output token, and OpenAI's
+prompt caching (repeated prefixes of 1024+ tokens, in 128-token steps) is
+simulated.
+
+Usage:
+    python scripts/benchmark_ai_analysis.py [--standin] [--from-db 50] [--repeat 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The OpenAI client is built at import time; --standin replaces it
+os.environ.setdefault("OPENAI_API_KEY", "standin")
+
+from src.ai import ai_processor
+from src.ai.local_classifier import set_local_classifier
+from src.ai.result_cache import AIResultCache, get_result_cache, set_result_cache
+
+# gpt-4o-mini list prices, USD per 1M tokens
+PRICE_PER_M = {"input": 0.15, "cached_input": 0.075, "output": 0.60}
+
+SAMPLE_POSTS = [
+    ("Flyttehjelp", "Trenger hjelp med å flytte en sofa fra 3. etasje ned til bilen. Bor på Grünerløkka, helst lørdag."),
+    ("Bære gipsplater", "Hei! Trenger to sterke personer til å bære 40 gipsplater opp til 2. etasje i Asker på torsdag ettermiddag."),
+    ("Flyttevask", "Trenger hjelp med flyttevask av 3-roms leilighet på Majorstuen, 70 kvm. Innbo skal kastes, men noen ting må gå til loppemarked."),
+    ("Tilhengerfeste", "Noen som kan montere tilhengerfeste med software på en Volvo XC90 2019? Drammen."),
+    ("Maling", "Sparkle, slipe og male et soverom + montere ny taklampe. Vi bor på Lambertseter. Send pris."),
+    ("Sjåfør", "Jeg trenger sjåfør til Sprinter 9-seter med rullestoltilpassing, tilknyttet Asker Taxi 07000."),
+    ("Kjøleskap", "Skal hente et kjøleskap på Finn i Lillestrøm og kjøre det til Sagene. Noen med varebil ledig i kveld?"),
+    ("Servering", "Søker serveringshjelp med erfaring til privat kinesisk nyttår selskap, 20 gjester, Bærum."),
+    ("Rørlegger", "Ønsker pris på rørleggerarbeid til bad, samt opplegg og montering av rør til kjøkken som skal flyttes fra naborom til stue."),
+    ("Hjelp søkes", "Hei, jeg har erfaring med flytting og bæring, har egen bil og er ledig hele uka. Rimelige priser!"),
+    ("Vaskehjelp", "Trenger vaske hjelp liten 43 kvm leilighet. Trenger vask av gulv bytte av sengetøy. Vasking av kjøkken ned med søppel vasking av overflater."),
+    ("Snekker", "Trenger snekker til å bygge sammenleggbare veggpaneler til et lagerrom i Groruddalen, ca 6 paneler."),
+]
+
+# The previous two prompts, rebuilt from the shared guides
+LEGACY_REQUEST_OFFER_SYSTEM = ai_processor.REQUEST_OFFER_GUIDE + "\n\nRespond with ONLY one word: REQUEST or OFFER"
+LEGACY_CLASSIFIER_SYSTEM = ("You are a Norwegian job posting classifier. Classify posts with a primary category "
+                            "and optional secondary categories. Always respond with valid JSON only.")
+LEGACY_JSON_FORMAT = """Respond in JSON format only:
+{
+  "category": "one of the exact category names listed above",
+  "secondary_categories": ["other relevant category names, or empty array if none"],
+  "location": "city or area name, or Unknown",
+  "features": {
+    "urgency": "urgent/normal/flexible",
+    "price_mentioned": true/false,
+    "contact_method": "pm/phone/comment/not_specified"
+  }
+}"""
+
+
+def _legacy_classify_prompt(title: str, text: str) -> str:
+    return f"""Analyze this Norwegian job posting and classify it into categories.
+
+AVAILABLE CATEGORIES:
+{ai_processor.CATEGORY_DESCRIPTIONS}
+
+Post Title: {title}
+Post Content: {text}
+
+{ai_processor.CATEGORY_GUIDE}
+
+{LEGACY_JSON_FORMAT}"""
+
+
+def legacy_analysis(title: str, text: str) -> tuple[bool, str | None]:
+    """The previous flow: REQUEST/OFFER call, then a category call for requests."""
+    if ai_processor._is_obvious_offer(title, text):
+        return False, None
+    client = ai_processor.client
+    response = client.chat.completions.create(
+        model=ai_processor.AI_MODEL,
+        messages=[
+            {"role": "system", "content": LEGACY_REQUEST_OFFER_SYSTEM},
+            {"role": "user", "content": f"{title}\n{text}"}
+        ],
+        temperature=0.1,
+        max_tokens=10
+    )
+    if "REQUEST" not in response.choices[0].message.content.strip().upper():
+        return False, None
+    response = client.chat.completions.create(
+        model=ai_processor.AI_MODEL,
+        messages=[
+            {"role": "system", "content": LEGACY_CLASSIFIER_SYSTEM},
+            {"role": "user", "content": _legacy_classify_prompt(title, text)}
+        ],
+        temperature=0.1,
+        max_tokens=250
+    )
+    result = json.loads(response.choices[0].message.content.strip())
+    category, _ = ai_processor._normalize_categories(result.get("category", "Other"), [])
+    return True, category
+
+
+def combined_analysis(title: str, text: str) -> tuple[bool, str | None]:
+    """The current flow in main.py: the two views, sharing one analyze_post() call."""
+    if not ai_processor.is_service_request(title, text):
+        return False, None
+    return True, ai_processor.process_post_with_ai(title, text, "")["category"]
+
+
+class _Recorder:
+    """Wraps client.chat.completions.create to record latency and token usage per call."""
+
+    def __init__(self, client):
+        self._create = client.chat.completions.create
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        started = time.perf_counter()
+        response = self._create(**kwargs)
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.calls.append({
+            "seconds": time.perf_counter() - started,
+            "prompt": usage.prompt_tokens,
+            "cached": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+            "completion": usage.completion_tokens,
+        })
+        return response
+
+
+class _StandInOpenAI:
+    """Answers chat.completions.create locally with modelled tokens, caching and latency."""
+
+    def __init__(self, latency_ms: float, ms_per_token: float):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self._prompts: list[str] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding("o200k_base")
+            self.count_tokens = lambda s: len(encoding.encode(s))
+        except Exception:
+            self.count_tokens = lambda s: max(1, len(s) // 4)
+
+    def _cached_tokens(self, prompt: str) -> int:
+        shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._prompts), default=0)
+        tokens = self.count_tokens(prompt[:shared]) if shared else 0
+        self._prompts = (self._prompts + [prompt])[-50:]
+        return tokens // 128 * 128 if tokens >= 1024 else 0
+
+    @staticmethod
+    def _classify(post: str) -> tuple[bool, dict]:
+        post = post.lower()
+        is_request = "trenger" in post or "noen som" in post or "søker" in post or "ønsker" in post
+        return is_request, {
+            "category": "Transport / Moving" if ("flytt" in post or "kjør" in post) else "Other",
+            "secondary_categories": [],
+            "location": "Oslo",
+            "features": {"urgency": "normal", "price_mentioned": False, "contact_method": "pm"},
+        }
+
+    def create(self, messages, max_tokens, response_format=None, **_ignored):
+        is_request, result = self._classify(messages[-1]["content"])
+        schema_name = response_format["json_schema"]["name"] if response_format else None
+        if max_tokens == 10:
+            answer = "REQUEST" if is_request else "OFFER"
+        elif schema_name == "post_batch_analysis":
+            results = []
+            for post in json.loads(messages[-1]["content"]):
+                is_request, result = self._classify(post["title"] + " " + post["text"])
+                results.append({"post_id": post["post_id"], "post_type": "REQUEST" if is_request else "OFFER", **result})
+            answer = json.dumps({"results": results}, ensure_ascii=False)
+        elif response_format:
+            # Structured outputs come back compact; the old prompt got pretty-printed JSON
+            answer = json.dumps({"post_type": "REQUEST" if is_request else "OFFER", **result}, ensure_ascii=False)
+        else:
+            answer = json.dumps(result, ensure_ascii=False, indent=2)
+        prompt = "".join(m["content"] for m in messages)
+        completion = self.count_tokens(answer)
+        time.sleep((self.latency_ms + completion * self.ms_per_token) / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer))],
+            usage=SimpleNamespace(
+                prompt_tokens=self.count_tokens(prompt),
+                completion_tokens=completion,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=self._cached_tokens(prompt)),
+            ),
+        )
+
+
+def _load_posts(from_db: int) -> list[tuple[str, str]]:
+    if not from_db:
+        return SAMPLE_POSTS
+    from src.database.supabase_db import supabase
+    result = supabase.table("posts").select("title, text").order("id", desc=True).limit(from_db).execute()
+    return [(row.get("title") or "", row.get("text") or "") for row in result.data or []]
+
+
+def run(name: str, analysis, posts: list[tuple[str, str]], repeat: int, base_client,
+        cold: bool = True) -> tuple[dict, list]:
+    """Run one flow over the posts; cold=True clears the AI result cache before every post."""
+    recorder = _Recorder(base_client)
+    ai_processor.client = recorder
+    per_post = []
+    answers = []
+    for _ in range(repeat):
+        for title, text in posts:
+            if cold:
+                get_result_cache().clear()
+            first_call = len(recorder.calls)
+            started = time.perf_counter()
+            answers.append(analysis(title, text))
+            calls = recorder.calls[first_call:]
+            per_post.append({
+                "seconds": time.perf_counter() - started,
+                "calls": len(calls),
+                "prompt": sum(c["prompt"] for c in calls),
+                "cached": sum(c["cached"] for c in calls),
+                "completion": sum(c["completion"] for c in calls),
+            })
+    ai_processor.client = base_client
+
+    n = len(per_post)
+    latencies = sorted(p["seconds"] * 1000 for p in per_post)
+    prompt = sum(p["prompt"] for p in per_post)
+    cached = sum(p["cached"] for p in per_post)
+    completion = sum(p["completion"] for p in per_post)
+    cost = ((prompt - cached) * PRICE_PER_M["input"] + cached * PRICE_PER_M["cached_input"]
+            + completion * PRICE_PER_M["output"]) / 1e6
+    return {
+        "name": name,
+        "calls": sum(p["calls"] for p in per_post) / n,
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))],
+        "prompt": prompt / n,
+        "cached": cached / n,
+        "completion": completion / n,
+        "usd_per_1000": cost / n * 1000,
+    }, answers
+
+
+def group_wall_time(posts: list[tuple[str, str]], base_client) -> list[dict]:
+    """
+    One group's posts, cache cleared before each run: analyze_post() one at a
+    time, analyze_posts() with one post per call, and analyze_posts() batched.
+    """
+    group = [{"title": title, "text": text, "post_id": str(i)} for i, (title, text) in enumerate(posts)]
+    runs = [
+        ("one at a time", lambda: [ai_processor.analyze_post(p["title"], p["text"], p["post_id"]) for p in group]),
+        ("concurrent", lambda: ai_processor.analyze_posts(group, batch_size=1)),
+        (f"batched x{ai_processor.AI_BATCH_SIZE}", lambda: ai_processor.analyze_posts(group)),
+    ]
+    rows = []
+    reference = None
+    for name, analyze in runs:
+        recorder = _Recorder(base_client)
+        ai_processor.client = recorder
+        get_result_cache().clear()
+        started = time.perf_counter()
+        results = analyze()
+        wall_ms = (time.perf_counter() - started) * 1000
+        ai_processor.client = base_client
+        reference = reference or results
+        calls = recorder.calls
+        prompt = sum(c["prompt"] for c in calls)
+        cached = sum(c["cached"] for c in calls)
+        completion = sum(c["completion"] for c in calls)
+        cost = ((prompt - cached) * PRICE_PER_M["input"] + cached * PRICE_PER_M["cached_input"]
+                + completion * PRICE_PER_M["output"]) / 1e6
+        rows.append({
+            "name": name,
+            "calls": len(calls),
+            "wall_ms": wall_ms,
+            "slowest_call_ms": max((c["seconds"] * 1000 for c in calls), default=0),
+            "prompt": prompt / len(group),
+            "completion": completion / len(group),
+            "usd_per_1000": cost / len(group) * 1000,
+            "same_answers": results == reference,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark AI calls per post: two calls vs analyze_post()")
+    parser.add_argument("--standin", action="store_true", help="Use a local stand-in instead of the OpenAI API")
+    parser.add_argument("--latency-ms", type=float, default=350, help="Stand-in latency per call")
+    parser.add_argument("--ms-per-token", type=float, default=10, help="Stand-in latency per output token")
+    parser.add_argument("--from-db", type=int, default=0, metavar="N", help="Use the N newest posts from Supabase")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the posts (later passes hit the prompt cache)")
+    args = parser.parse_args()
+
+    if not args.standin and os.getenv("OPENAI_API_KEY") == "standin":
+        parser.error("OPENAI_API_KEY is not set: pass --standin to run without the API")
+
+    posts = _load_posts(args.from_db)
+    set_result_cache(AIResultCache(":memory:"))  # leave data/ai_cache.db alone
+    set_local_classifier(None)  # measure the AI calls themselves
+    base_client = _StandInOpenAI(args.latency_ms, args.ms_per_token) if args.standin else ai_processor.client
+
+    print(f"{len(posts)} posts x {args.repeat} pass(es), {'stand-in' if args.standin else ai_processor.AI_MODEL}")
+    legacy, legacy_answers = run("legacy", legacy_analysis, posts, args.repeat, base_client)
+    combined, combined_answers = run("combined", combined_analysis, posts, args.repeat, base_client)
+    # Same posts again once all have been seen: reposts and cross-posts
+    ai_processor.client = base_client
+    for title, text in posts:
+        combined_analysis(title, text)
+    reposted, _ = run("reposted", combined_analysis, posts, 1, base_client, cold=False)
+
+    print(f"\n{'flow':<10}{'calls':>7}{'mean ms':>10}{'p95 ms':>9}{'prompt':>9}{'cached':>9}{'output':>8}{'$/1000 posts':>14}")
+    for r in (legacy, combined, reposted):
+        print(f"{r['name']:<10}{r['calls']:>7.2f}{r['mean_ms']:>10.0f}{r['p95_ms']:>9.0f}"
+              f"{r['prompt']:>9.0f}{r['cached']:>9.0f}{r['completion']:>8.1f}{r['usd_per_1000']:>14.3f}")
+    print("(calls, latency and tokens are per post)")
+
+    print(f"\nOne group of {len(posts)} new posts:")
+    print(f"{'run':<15}{'calls':>6}{'wall ms':>9}{'slowest':>9}{'prompt':>8}{'output':>8}{'$/1000 posts':>14}")
+    for r in group_wall_time(posts, base_client):
+        print(f"{r['name']:<15}{r['calls']:>6}{r['wall_ms']:>9.0f}{r['slowest_call_ms']:>9.0f}{r['prompt']:>8.0f}"
+              f"{r['completion']:>8.1f}{r['usd_per_1000']:>14.3f}{'' if r['same_answers'] else '  (answers differ)'}")
+    print("(prompt and output tokens are per post)")
+
+    if not args.standin:
+        same_type = sum(a[0] == b[0] for a, b in zip(legacy_answers, combined_answers))
+        both_requests = [(a, b) for a, b in zip(legacy_answers, combined_answers) if a[0] and b[0]]
+        same_category = sum(a[1] == b[1] for a, b in both_requests)
+        print(f"\nAgreement: request/offer {same_type}/{len(legacy_answers)}, "
+              f"category {same_category}/{len(both_requests)} (posts both kept)")
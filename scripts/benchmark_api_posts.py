@@ -0,0 +1,164 @@
+"""
+Benchmark: /api/posts latency at different table sizes.
+
+Seeds an in-memory PostgREST stand-in with N synthetic posts and calls the
+FastAPI route through TestClient. "legacy" swaps in the old get_posts
+(download every row, regex-parse timestamps in Python, sort, slice, then a
+second request for the count) for comparison with the current single-query
+database-side ordering/pagination. The response cache is disabled so every
+request reaches the data layer.
+
+Reported times exclude the stand-in's own query execution (which a real
+Postgres does with indexes) but include JSON decoding of every transferred
+row, i.e. what the API process itself pays.
+
+Usage:
+    python scripts/benchmark_api_posts.py [--sizes 10000 100000] [--requests 5] [--latency-ms 0]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The backend builds a real client at import time; it is replaced below.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+
+from fastapi.testclient import TestClient
+
+from postgrest_standin import StandInClient
+from src.scraper.timestamp_parser import parse_facebook_timestamp
+from app import async_db, cache, db
+from app.api import posts as posts_api
+from app.main import app
+
+GROUPS = ["Flyttehjelp Oslo", "(1) Småjobber Bergen", "Transport Norge", "(3) Hjelp søkes Trondheim"]
+CATEGORIES = ["Transport / Moving", "Manual Labor", "Cleaning / Garden", "Other"]
+
+# Synchronous stand-in client used by the legacy_* baselines (set in main())
+legacy_client = None
+
+
+def seed(client: StandInClient, size: int) -> None:
+    rng = random.Random(42)
+    now = datetime(2026, 2, 1, 12, 0)
+    rows = []
+    for i in range(size):
+        posted = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        timestamp = posted.strftime("%A %-d %B %Y at %H:%M") if i % 3 else f"{rng.randint(1, 23)}h"
+        group = rng.choice(GROUPS)
+        rows.append({
+            "id": i + 1,
+            "post_id": f"{10_000_000 + i}",
+            "title": f"Trenger hjelp med flytting #{i}",
+            "text": "Hei! Trenger hjelp til å flytte en sofa og noen esker fra Grünerløkka til Majorstuen. " * 3,
+            "url": f"https://www.facebook.com/groups/x/posts/{10_000_000 + i}",
+            "timestamp": timestamp,
+            "group_name": group,
+            "group_name_normalized": db.normalize_group_name(group),
+            "group_url": f"https://www.facebook.com/groups/{GROUPS.index(group)}",
+            "category": rng.choice(CATEGORIES),
+            "location": "Oslo",
+            "notified": rng.random() < 0.1,
+            "posted_at": posted.isoformat(),
+            "scraped_at": posted.isoformat(),
+        })
+    client.tables["posts"] = rows
+    client._id = size
+
+
+def legacy_get_posts(limit=100, offset=0, group_url=None, group_name=None, search=None,
+                     only_new=False, category=None, location=None, **_ignored):
+    """The original implementation: fetch everything, parse and sort in Python."""
+    query = legacy_client.table("posts").select("*")
+    if group_url:
+        query = query.eq("group_url", group_url)
+    if search:
+        query = query.or_(f"title.ilike.%{search}%,text.ilike.%{search}%")
+    if only_new:
+        query = query.eq("notified", False)
+    if category:
+        query = query.eq("category", category)
+    if location:
+        query = query.ilike("location", f"%{location}%")
+    all_posts = query.execute().data or []
+    for post in all_posts:
+        post["group_name"] = db.normalize_group_name(post.get("group_name", "Unknown"))
+    if group_name:
+        all_posts = [p for p in all_posts if p.get("group_name") == group_name]
+    all_posts.sort(key=lambda p: parse_facebook_timestamp(p.get("timestamp", "")) or datetime(1970, 1, 1), reverse=True)
+    return all_posts[offset:offset + limit]
+
+
+async def legacy_get_posts_page(count="exact", **filters):
+    """Original list + count path: two round trips, the count transferring every matching id.
+    Synchronous client calls inside the async route, as before."""
+    posts = legacy_get_posts(**filters)
+    query = legacy_client.table("posts").select("id", count="exact")
+    if filters.get("group_url"):
+        query = query.eq("group_url", filters["group_url"])
+    if filters.get("group_name"):
+        query = query.eq("group_name_normalized", filters["group_name"])
+    return posts, query.execute().count or 0
+
+
+def measure(http: TestClient, standin: StandInClient, params: dict, requests: int) -> tuple[float, float, int, int]:
+    """Returns (p50 ms, max ms, rows transferred per request, round trips per request)."""
+    samples = []
+    rows = round_trips = 0
+    for _ in range(requests):
+        standin.reset_counters()
+        start = time.perf_counter()
+        response = http.get("/api/posts", params=params)
+        elapsed = time.perf_counter() - start - standin.server_seconds
+        response.raise_for_status()
+        samples.append(elapsed * 1000)
+        rows = standin.rows_transferred
+        round_trips = standin.round_trips
+    return statistics.median(samples), max(samples), rows, round_trips
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /api/posts latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    global legacy_client
+    standin = StandInClient(latency_ms=args.latency_ms)
+    legacy_client = standin
+    async_db.set_client(standin.async_view())
+    cache.CACHE_ENABLED = False
+    http = TestClient(app)
+    current_get_posts_page = posts_api.get_posts_page
+    scenarios = {
+        "first page": {"limit": 20},
+        "page 50": {"limit": 20, "offset": 1000},
+        "group filter": {"limit": 20, "group_name": "Småjobber Bergen"},
+        "no count": {"limit": 20, "count": "none"},
+    }
+
+    for size in args.sizes:
+        seed(standin, size)
+        print(f"\n/api/posts with {size:,} rows")
+        for label, params in scenarios.items():
+            for impl_name, impl in (("legacy", legacy_get_posts_page), ("current", current_get_posts_page)):
+                posts_api.get_posts_page = impl
+                p50, worst, rows, round_trips = measure(http, standin, params, args.requests)
+                print(f"  {label:<12} {impl_name:<8} p50={p50:>8.1f} ms  max={worst:>8.1f} ms  "
+                      f"rows transferred={rows:>7,}  round trips={round_trips}")
+        posts_api.get_posts_page = current_get_posts_page
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: duplicate detection round trips per scrape cycle.
+
+Compares the old per-post is_duplicate_post() loop with the bulk
+find_duplicates() call against an in-memory PostgREST stand-in.
+
+Usage:
+    python scripts/benchmark_dedup.py [--groups 10] [--posts 40] [--latency-ms 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The module builds a real client at import time; it is replaced below.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+
+from postgrest_standin import StandInClient
+from src.database import supabase_db
+
+
+def make_post(i: int, group: int) -> dict:
+    return {
+        "post_id": f"{1000000 + i}",
+        "title": f"Trenger hjelp #{i}",
+        "text": f"Trenger hjelp til flytting av sofa og kjøleskap, post nummer {i} i gruppe {group}.",
+        "url": f"https://www.facebook.com/groups/{group}/posts/{1000000 + i}",
+        "timestamp": "2h",
+        "group_name": f"Group {group}",
+        "group_url": f"https://www.facebook.com/groups/{group}",
+    }
+
+
+def build_cycle(client: StandInClient, groups: int, per_group: int) -> list[list[dict]]:
+    """Seed the stand-in so ~80% of each group's feed is already known."""
+    cycle = []
+    for g in range(groups):
+        feed = [make_post(g * per_group + i, g) for i in range(per_group)]
+        known = feed[: int(per_group * 0.8)]
+        for k, post in enumerate(known):
+            row = dict(post, notified=False, text_hash=supabase_db.compute_text_hash(post["text"]))
+            # Every 4th known post was previously saved under a hash ID
+            if k % 4 == 0:
+                row["post_id"] = f"h_{post['post_id']}"
+            client.tables.setdefault("posts", []).append(row)
+        cycle.append(feed)
+    return cycle
+
+
+def run(label: str, client: StandInClient, cycle: list[list[dict]], check, cold: bool = True) -> None:
+    if cold:
+        supabase_db.clear_known_post_cache()
+    client.reset_counters()
+    start = time.perf_counter()
+    duplicates = sum(check(feed) for feed in cycle)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} round trips={client.round_trips:>5}  rows={client.rows_transferred:>5}  duplicates={duplicates:>4}  time={elapsed:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--posts", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    client = StandInClient(latency_ms=args.latency_ms)
+    supabase_db.supabase = client
+    cycle = build_cycle(client, args.groups, args.posts)
+
+    print(f"Dedup benchmark: {args.groups} groups x {args.posts} posts, {args.latency_ms:.0f} ms per request")
+    run("per-post is_duplicate_post", client, cycle,
+        lambda feed: sum(supabase_db.is_duplicate_post(p["post_id"], p["text"]) for p in feed))
+    run("bulk find_duplicates", client, cycle,
+        lambda feed: len(supabase_db.find_duplicates(feed)))
+    # Next cycle: same feed again, known posts now answered from the in-process cache
+    run("bulk, known-post cache warm", client, cycle,
+        lambda feed: len(supabase_db.find_duplicates(feed)), cold=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark: dashboard search latency at 100k posts on a real Postgres.
+
+Search cost is all inside the database (index vs sequential scan), so unlike
+the other benchmarks this one needs a Postgres connection rather than the
+in-memory stand-in. It works in a scratch schema and never touches the real
+posts table:
+
+  1. create search_bench.posts and seed N synthetic Norwegian posts
+  2. time the old search (title/text ILIKE '%q%', list + count = 2 scans)
+  3. apply migrations/add_search_index.sql inside the scratch schema
+  4. time substring mode (same ILIKE, now trigram-indexed) and
+     fts mode (search_posts RPC: ranked page + total in one call)
+  5. drop the schema (unless --keep)
+
+Needs psycopg2 (pip install psycopg2-binary) and DATABASE_URL, e.g. the
+Supabase "Connection string" from Project Settings -> Database.
+
+Usage:
+    python scripts/benchmark_search.py [--rows 100000] [--requests 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = "search_bench"
+
+WORDS = [
+    "hei", "trenger", "hjelp", "med", "flytting", "sofa", "esker", "fra", "til", "Oslo",
+    "Bergen", "Trondheim", "bil", "henger", "i", "morgen", "helg", "betaler", "godt", "kontant",
+    "vipps", "maling", "vask", "hage", "klipping", "plen", "montering", "IKEA", "skap", "seng",
+    "kjøleskap", "vaskemaskin", "bære", "trapp", "tredje", "etasje", "haster", "pris", "timer", "jobb",
+]
+QUERIES = {
+    "common word": "flytting",
+    "rare word": "vaskemaskin",
+    "two words": "montering skap",
+}
+
+SEED_SQL = """
+CREATE TABLE posts (
+    id BIGINT PRIMARY KEY,
+    post_id TEXT UNIQUE NOT NULL,
+    title TEXT,
+    text TEXT,
+    url TEXT,
+    "timestamp" TEXT,
+    group_name TEXT,
+    group_name_normalized TEXT,
+    group_url TEXT,
+    category TEXT,
+    location TEXT,
+    notified BOOLEAN DEFAULT FALSE,
+    posted_at TIMESTAMPTZ,
+    scraped_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+INSERT INTO posts (id, post_id, title, text, url, group_name, group_name_normalized,
+                   group_url, category, location, notified, posted_at)
+SELECT g,
+       (10000000 + g)::text,
+       (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+          FROM generate_series(1, 6) WHERE g > 0),
+       (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+          FROM generate_series(1, 60) WHERE g > 0),
+       'https://www.facebook.com/groups/x/posts/' || (10000000 + g),
+       'Flyttehjelp Oslo', 'Flyttehjelp Oslo', 'https://www.facebook.com/groups/1',
+       'Transport / Moving', 'Oslo', random() < 0.1,
+       NOW() - random() * INTERVAL '90 days'
+FROM generate_series(1, %(rows)s) AS g, (SELECT %(words)s::text[] AS w) AS words;
+
+CREATE INDEX idx_posts_posted_at ON posts (posted_at DESC);
+ANALYZE posts;
+"""
+
+LEGACY_LIST = """
+SELECT * FROM posts WHERE title ILIKE %(pattern)s OR text ILIKE %(pattern)s
+ORDER BY posted_at DESC NULLS LAST, id DESC LIMIT 20
+"""
+LEGACY_COUNT = "SELECT count(*) FROM posts WHERE title ILIKE %(pattern)s OR text ILIKE %(pattern)s"
+FTS_PAGE = "SELECT search_posts(%(query)s, 20, 0)"
+
+
+def time_queries(cursor, statements: list[str], params: dict, requests: int) -> tuple[float, float]:
+    """Run the statements as one "request" `requests` times; returns (p50 ms, max ms)."""
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        for statement in statements:
+            cursor.execute(statement, params)
+            cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def report(cursor, label: str, statements: list[str], requests: int) -> None:
+    for name, query in QUERIES.items():
+        params = {"pattern": f"%{query}%", "query": query}
+        p50, worst = time_queries(cursor, statements, params, requests)
+        print(f"  {label:<22} {name:<12} p50={p50:>8.1f} ms  max={worst:>8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dashboard search on Postgres")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("[ERROR] DATABASE_URL must be set (Supabase: Project Settings -> Database -> Connection string)")
+        sys.exit(1)
+    try:
+        import psycopg2
+    except ImportError:
+        print("[ERROR] psycopg2 is required: pip install psycopg2-binary")
+        sys.exit(1)
+
+    with open(os.path.join(ROOT, "migrations", "add_search_index.sql"), "r", encoding="utf-8") as f:
+        search_index_sql = f.read()
+
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        # Supabase installs extensions (pg_trgm) into the "extensions" schema
+        cursor.execute(f"SET search_path = {SCHEMA}, public, extensions")
+
+        print(f"Seeding {args.rows:,} posts into {SCHEMA}.posts...")
+        started = time.perf_counter()
+        cursor.execute(SEED_SQL, {"rows": args.rows, "words": WORDS})
+        print(f"  done in {time.perf_counter() - started:.1f} s")
+
+        print(f"\nSearch with {args.rows:,} rows ({args.requests} requests each)")
+        report(cursor, "legacy ILIKE (2 scans)", [LEGACY_LIST, LEGACY_COUNT], args.requests)
+
+        print("\nApplying migrations/add_search_index.sql...")
+        started = time.perf_counter()
+        cursor.execute(search_index_sql)
+        cursor.execute("ANALYZE posts")
+        print(f"  done in {time.perf_counter() - started:.1f} s")
+
+        report(cursor, "substring (trigram)", [LEGACY_LIST, LEGACY_COUNT], args.requests)
+        report(cursor, "fts (ranked, 1 call)", [FTS_PAGE], args.requests)
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: per-request overhead of the default supabase client vs the
+tuned client from backend/app/supabase_client.py (src/database/supabase_client.py).
+
+The scraper sends Supabase requests in bursts (one per group, from up to
+MAX_PARALLEL_BROWSERS threads) with seconds of browser work in between.
+This replays that pattern: --threads workers each send --requests small
+selects, then everyone idles for --idle-seconds, for --rounds rounds.
+
+By default the requests go to a local HTTP server that answers "[]" after
+--latency-ms and charges --connect-ms once per new connection, standing in
+for the TCP + TLS handshake with Supabase. Overhead is the measured
+latency minus --latency-ms; the server also counts the connections each
+client opened. The local server speaks HTTP/1.1 only.
+
+With --url the same load goes to a real Supabase project (SUPABASE_URL /
+SUPABASE_KEY from .env) as single-row selects on posts, which also measures
+HTTP/2 and real handshakes.
+
+Usage:
+    python scripts/benchmark_supabase_client.py [--threads 9] [--requests 20] [--rounds 3] [--idle-seconds 6]
+    python scripts/benchmark_supabase_client.py --url
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# src.database builds the scraper's client at import time; it isn't used here.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+
+from supabase import create_client
+
+from src.database.supabase_client import create_supabase_client, get_latency_stats, reset_latency_stats
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    latency_s = 0.0
+    connect_s = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        # Runs once per TCP connection
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+        time.sleep(self.connect_s)
+        super().setup()
+        # Headers and body are written separately; don't let Nagle delay the body
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        time.sleep(self.latency_s)
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(latency_ms: float, connect_ms: float) -> tuple[ThreadingHTTPServer, str]:
+    StandInHandler.latency_s = latency_ms / 1000
+    StandInHandler.connect_s = connect_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_workload(client, args) -> list[float]:
+    """Latency samples in ms over all rounds."""
+    samples: list[float] = []
+    lock = threading.Lock()
+
+    def worker(worker_id: int) -> None:
+        for i in range(args.requests):
+            start = time.perf_counter()
+            client.table("posts").select("post_id").eq("post_id", f"{worker_id}-{i}").limit(1).execute()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                samples.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for round_number in range(args.rounds):
+            if round_number:
+                time.sleep(args.idle_seconds)
+            list(pool.map(worker, range(args.threads)))
+    return samples
+
+
+def print_result(label: str, samples: list[float], baseline_ms: float, connections: int = None) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    line = (f"  {label:<8} mean={statistics.mean(ordered):>7.1f} ms  p50={statistics.median(ordered):>7.1f} ms  "
+            f"p99={p99:>7.1f} ms")
+    if baseline_ms is not None:
+        line += f"  overhead={statistics.mean(ordered) - baseline_ms:>6.1f} ms/request"
+    if connections is not None:
+        line += f"  connections={connections}"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Supabase client per-request overhead")
+    parser.add_argument("--threads", type=int, default=9, help="Concurrent workers (MAX_PARALLEL_BROWSERS)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per worker per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--idle-seconds", type=float, default=6.0,
+                        help="Pause between rounds (httpx drops idle connections after 5 s by default)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in server time per request")
+    parser.add_argument("--connect-ms", type=float, default=60.0, help="Stand-in cost of opening a connection")
+    parser.add_argument("--url", action="store_true", help="Benchmark against SUPABASE_URL instead")
+    args = parser.parse_args()
+
+    if args.url:
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_SECRET_KEY") or os.getenv("SUPABASE_KEY")
+        baseline_ms = None
+        print(f"{url}, {args.threads} threads x {args.requests} requests x {args.rounds} rounds")
+    else:
+        server, url = start_server(args.latency_ms, args.connect_ms)
+        key = "bench.bench.bench"
+        baseline_ms = args.latency_ms
+        print(f"Local stand-in ({args.latency_ms:g} ms per request, {args.connect_ms:g} ms per new connection), "
+              f"{args.threads} threads x {args.requests} requests x {args.rounds} rounds, "
+              f"{args.idle_seconds:g} s idle between rounds")
+
+    clients = (
+        ("default", lambda: create_client(url, key)),
+        ("factory", lambda: create_supabase_client(url, key, pool_size=args.threads + 1)),
+    )
+    for label, make_client in clients:
+        StandInHandler.connections = 0
+        reset_latency_stats()
+        samples = run_workload(make_client(), args)
+        print_result(label, samples, baseline_ms, None if args.url else StandInHandler.connections)
+
+    # Histogram recorded by the factory client, as the scraper prints it after each cycle
+    for endpoint, latency in get_latency_stats().items():
+        print(f"  factory histogram {endpoint}: {latency}")
+
+    if not args.url:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
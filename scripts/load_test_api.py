@@ -0,0 +1,154 @@
+"""
+Load test: /api/posts latency under concurrent dashboard clients.
+
+By default the app is served by uvicorn on a background thread, backed by the
+in-memory PostgREST stand-in with a fixed per-request latency standing in for
+the network round trip to Supabase. Two data layers are compared:
+
+  blocking  the old path: the async route calls the synchronous client, so
+            every round trip blocks the event loop and requests queue up
+  async     app.async_db: round trips are awaited and overlap
+
+With --url the same load is sent to a running server instead (e.g. uvicorn
+against the real Supabase project) and only that server is measured.
+
+Usage:
+    python scripts/load_test_api.py [--clients 50] [--requests 10] [--latency-ms 30]
+    python scripts/load_test_api.py --url http://localhost:8000 --clients 50
+
+Needs uvicorn (backend/requirements.txt).
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The backend builds a real client at import time; it is replaced below.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+
+PARAMS = [
+    {"limit": 20},
+    {"limit": 20, "offset": 200},
+    {"limit": 20, "group_name": "Flyttehjelp Oslo"},
+    {"limit": 20, "only_new": "true"},
+]
+
+
+async def client_session(http: httpx.AsyncClient, requests: int, offset: int, samples: list) -> None:
+    """One dashboard user issuing `requests` sequential page loads."""
+    for i in range(requests):
+        params = PARAMS[(offset + i) % len(PARAMS)]
+        start = time.perf_counter()
+        response = await http.get("/api/posts", params=params)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+
+async def run_load(http: httpx.AsyncClient, clients: int, requests: int) -> tuple[list, float]:
+    """Returns (latency samples in ms, wall-clock seconds)."""
+    # Open every client's connection first so setup cost isn't in the samples
+    await asyncio.gather(*(client_session(http, 1, c, []) for c in range(clients)))
+    samples: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client_session(http, requests, c, samples) for c in range(clients)))
+    return samples, time.perf_counter() - start
+
+
+def print_result(label: str, samples: list, elapsed: float) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<9} p50={statistics.median(ordered):>8.1f} ms  p99={p99:>8.1f} ms  "
+          f"throughput={len(ordered) / elapsed:>7.1f} req/s")
+
+
+def start_server(app) -> tuple[uvicorn.Server, str]:
+    """Serve the app on a free local port from a daemon thread."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def load_test_in_process(args) -> None:
+    from postgrest_standin import StandInClient
+    from benchmark_api_posts import seed
+    from app import async_db, cache, db
+    from app.api import posts as posts_api
+    from app.main import app
+
+    standin = StandInClient(latency_ms=args.latency_ms)
+    seed(standin, args.rows)
+    async_db.set_client(standin.async_view())
+    # Every request should reach the data layer
+    cache.CACHE_ENABLED = False
+
+    async def blocking_get_posts_page(limit, offset, cursor, count, search_mode, fields, **filters):
+        # The same page query, executed with the synchronous client on the event loop
+        filter_args = tuple(filters[key] for key in
+                            ("group_url", "group_name", "search", "only_new", "category", "location"))
+        inline_count = count if count != "none" else None
+        result = db._page_query(
+            standin, limit, offset, filter_args, cursor, inline_count, db.parse_fields(fields)
+        ).execute()
+        return db._normalize_posts(result.data or []), result.count
+
+    current_get_posts_page = posts_api.get_posts_page
+    print(f"/api/posts, {args.clients} concurrent clients x {args.requests} requests, "
+          f"{args.rows:,} rows, {args.latency_ms:g} ms per round trip")
+    server, url = start_server(app)
+    limits = httpx.Limits(max_connections=args.clients)
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as http:
+            for label, impl in (("blocking", blocking_get_posts_page), ("async", current_get_posts_page)):
+                posts_api.get_posts_page = impl
+                samples, elapsed = await run_load(http, args.clients, args.requests)
+                print_result(label, samples, elapsed)
+    finally:
+        posts_api.get_posts_page = current_get_posts_page
+        server.should_exit = True
+
+
+async def load_test_server(args) -> None:
+    print(f"{args.url}/api/posts, {args.clients} concurrent clients x {args.requests} requests")
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as http:
+        samples, elapsed = await run_load(http, args.clients, args.requests)
+    print_result("server", samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test /api/posts")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Stand-in round-trip latency")
+    parser.add_argument("--rows", type=int, default=1_000,
+                        help="Stand-in table size (its in-memory filtering runs on the server's CPU)")
+    parser.add_argument("--url", help="Load test a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(load_test_server(args))
+    else:
+        asyncio.run(load_test_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+In-memory PostgREST stand-in for benchmarks.
+
+Mimics the subset of the supabase-py query builder used by this project
+(table().select().eq().in_()...execute(), rpc()) over a plain list of dict rows,
+counting every execute() as one HTTP round trip and optionally sleeping a
+fixed latency per request so results resemble a real network.
+
+Usage:
+    from postgrest_standin import StandInClient   # scripts/ is on sys.path
+    client = StandInClient(latency_ms=20)
+    supabase_db.supabase = client
+    async_db.set_client(client.async_view())   # backend async access layer
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class StandInResponse:
+    data: list
+    count: Optional[int] = None
+
+
+class StandInQuery:
+    """Chainable query over one in-memory table."""
+
+    def __init__(self, client: "StandInClient", table: str, asynchronous: bool = False):
+        self.client = client
+        self.table = table
+        self.asynchronous = asynchronous
+        self.columns = "*"
+        self.count_mode: Optional[str] = None
+        self.head = False
+        self.filters: list = []
+        self.orders: list[tuple[str, bool]] = []
+        self.offset = 0
+        self.limit_n: Optional[int] = None
+        self.action = "select"
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+
+    # --- select / write actions ---
+    def select(self, columns: str = "*", count: Optional[str] = None, head: bool = False):
+        self.columns = columns
+        self.count_mode = count
+        self.head = head
+        return self
+
+    def insert(self, payload):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = "id", ignore_duplicates: bool = False):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    # --- filters ---
+    def eq(self, column, value):
+        self.filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda r: r.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda r: r.get(column) in values)
+        return self
+
+    def is_(self, column, value):
+        target = None if value in (None, "null") else value
+        self.filters.append(lambda r: r.get(column) is target)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r.get(column) >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda r: r.get(column) is not None and r.get(column) <= value)
+        return self
+
+    def ilike(self, column, pattern):
+        needle = pattern.strip("%").lower()
+        self.filters.append(lambda r: needle in str(r.get(column) or "").lower())
+        return self
+
+    def or_(self, expression: str):
+        """Supports comma-separated `col.op.value` terms (ilike/eq/lt/gt/is,
+        optionally double-quoted values) and nested `and(...)` groups."""
+        terms = _parse_logic_terms(expression)
+        self.filters.append(lambda row: any(_match_term(row, term) for term in terms))
+        return self
+
+    # --- shaping ---
+    def order(self, column, desc: bool = False, nullsfirst: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n: int):
+        self.limit_n = n
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset = start
+        self.limit_n = end - start + 1
+        return self
+
+    def execute(self):
+        """StandInResponse, or a coroutine resolving to one for async clients."""
+        if self.asynchronous:
+            return self._execute_async()
+        self.client._round_trip()
+        return self._respond()
+
+    async def _execute_async(self) -> StandInResponse:
+        await self.client._round_trip_async()
+        return self._respond()
+
+    def _respond(self) -> StandInResponse:
+        started = time.perf_counter()
+        response = self._execute()
+        body = json.dumps(response.data, default=str)
+        self.client.server_seconds += time.perf_counter() - started
+        # Decoding the HTTP body is client-side work, like in supabase-py
+        response.data = json.loads(body)
+        return response
+
+    def _execute(self) -> StandInResponse:
+        rows = self.client.tables.setdefault(self.table, [])
+
+        if self.action in ("insert", "upsert"):
+            return self._write(rows)
+
+        matched = [r for r in rows if all(f(r) for f in self.filters)]
+
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return StandInResponse(data=copy.deepcopy(matched))
+        if self.action == "delete":
+            doomed = {id(r) for r in matched}
+            self.client.tables[self.table] = [r for r in rows if id(r) not in doomed]
+            return StandInResponse(data=matched)
+
+        for column, desc in reversed(self.orders):
+            present = [r for r in matched if r.get(column) is not None]
+            missing = [r for r in matched if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            matched = present + missing if desc else missing + present
+
+        count = len(matched) if self.count_mode else None
+        if self.head:
+            return StandInResponse(data=[], count=count)
+
+        end = None if self.limit_n is None else self.offset + self.limit_n
+        page = matched[self.offset:end]
+        data = [self._project(r) for r in page]
+        self.client.rows_transferred += len(data)
+        return StandInResponse(data=data, count=count)
+
+    def _project(self, row: dict) -> dict:
+        if self.columns.strip() == "*":
+            return dict(row)
+        projected = {}
+        for column in (c.strip() for c in self.columns.split(",") if c.strip()):
+            # alias:column, where column may be a computed column (client.computed)
+            alias, _, source = column.rpartition(":")
+            computed = self.client.computed.get(source)
+            projected[alias or source] = computed(row) if computed else row.get(source)
+        return projected
+
+    def _write(self, rows: list) -> StandInResponse:
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        written = []
+        for item in payload:
+            key = self.on_conflict
+            existing = None
+            if key:
+                existing = next((r for r in rows if r.get(key) == item.get(key)), None)
+            elif "post_id" in item:
+                if any(r.get("post_id") == item["post_id"] for r in rows):
+                    raise Exception("duplicate key value violates unique constraint \"posts_post_id_key\"")
+            if existing is not None:
+                if not self.ignore_duplicates:
+                    existing.update(item)
+                    written.append(dict(existing))
+                continue
+            row = {"id": self.client._next_id(), **item}
+            rows.append(row)
+            written.append(dict(row))
+        return StandInResponse(data=written)
+
+
+def _split_top_level(expression: str) -> list[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _parse_logic_terms(expression: str) -> list:
+    terms = []
+    for part in _split_top_level(expression):
+        if part.startswith("and(") and part.endswith(")"):
+            terms.append(("and", _parse_logic_terms(part[4:-1])))
+        else:
+            column, op, value = part.split(".", 2)
+            terms.append((column, op, value.strip('"')))
+    return terms
+
+
+def _match_term(row: dict, term) -> bool:
+    if term[0] == "and":
+        return all(_match_term(row, sub) for sub in term[1])
+    column, op, value = term
+    cell = row.get(column)
+    if op == "is":
+        return cell is None if value == "null" else str(cell).lower() == value
+    if op == "ilike":
+        return value.strip("%").lower() in str(cell or "").lower()
+    if cell is None:
+        return False
+    typed = type(cell)(value) if isinstance(cell, (int, float)) and not isinstance(cell, bool) else value
+    if op == "eq":
+        return str(cell) == value if isinstance(cell, (str, bool)) else cell == typed
+    if op == "lt":
+        return cell < typed
+    if op == "gt":
+        return cell > typed
+    raise NotImplementedError(f"or_ operator {op!r}")
+
+
+class StandInRpc:
+    """A stored-function call; the Python implementation lives in client.functions."""
+
+    def __init__(self, client: "StandInClient", name: str, params: dict, asynchronous: bool = False):
+        self.client = client
+        self.name = name
+        self.params = params
+        self.asynchronous = asynchronous
+
+    def execute(self):
+        """StandInResponse, or a coroutine resolving to one for async clients."""
+        if self.asynchronous:
+            return self._execute_async()
+        self.client._round_trip()
+        return self._respond()
+
+    async def _execute_async(self) -> StandInResponse:
+        await self.client._round_trip_async()
+        return self._respond()
+
+    def _respond(self) -> StandInResponse:
+        function = self.client.functions.get(self.name)
+        if function is None:
+            raise Exception(f"Could not find the function public.{self.name} in the schema cache")
+        started = time.perf_counter()
+        body = json.dumps(function(self.client, **self.params), default=str)
+        self.client.server_seconds += time.perf_counter() - started
+        return StandInResponse(data=json.loads(body))
+
+
+class StandInClient:
+    """Drop-in replacement for the supabase Client used in benchmarks."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.tables: dict[str, list[dict]] = {}
+        # name -> function(client, **params) standing in for a Postgres function
+        self.functions: dict[str, Callable[..., Any]] = {}
+        # name -> function(row) standing in for a computed column (a function taking posts)
+        self.computed: dict[str, Callable[[dict], Any]] = {
+            "text_preview": lambda row: (row.get("text") or "")[:300],
+        }
+        self.round_trips = 0
+        self.rows_transferred = 0
+        self.server_seconds = 0.0  # time spent "inside the database" (excluded from client timings)
+        self._id = 0
+
+    def table(self, name: str) -> StandInQuery:
+        return StandInQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> StandInRpc:
+        return StandInRpc(self, name, params or {})
+
+    def async_view(self) -> "AsyncStandInClient":
+        """Async-client facade over the same tables and counters."""
+        return AsyncStandInClient(self)
+
+    def reset_counters(self) -> None:
+        self.round_trips = 0
+        self.rows_transferred = 0
+        self.server_seconds = 0.0
+
+    def _round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    async def _round_trip_async(self) -> None:
+        self.round_trips += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def _next_id(self) -> int:
+        self._id += 1
+        return self._id
+
+
+class AsyncStandInClient:
+    """Stands in for supabase's AsyncClient: execute() must be awaited and
+    latency is spent in asyncio.sleep, so concurrent requests overlap."""
+
+    def __init__(self, client: StandInClient):
+        self.client = client
+
+    def table(self, name: str) -> StandInQuery:
+        return StandInQuery(self.client, name, asynchronous=True)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> StandInRpc:
+        return StandInRpc(self.client, name, params or {}, asynchronous=True)
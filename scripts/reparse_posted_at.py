@@ -0,0 +1,112 @@
+"""
+Resolve posts.posted_at for rows whose value isn't trustworthy yet.
+
+save_post parses the Facebook timestamp once, at save time. Rows saved
+before that, with a relative timestamp ("7h") parsed against the wrong
+clock, or with a timestamp the parser didn't understand (hash ids, new
+formats) have a missing or approximate posted_at. This job re-parses each
+such row's timestamp relative to its scraped_at (so "7h" means 7 hours
+before the scrape, not before now), falls back to scraped_at when the
+format is unknown, and writes the results back one batch per statement.
+
+Run migrations/add_posted_at_source.sql first, then:
+    python scripts/reparse_posted_at.py [--batch-size 1000] [--retry-unparsed]
+
+Incremental: every row it resolves is marked in posts.posted_at_source, so
+a re-run only looks at rows saved since the last one. --retry-unparsed also
+re-parses rows that fell back to scraped_at (after adding a format to
+src/scraper/timestamp_parser.py).
+
+Run it on a machine in the scraper's timezone: Facebook timestamps are
+local times.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.supabase_db import supabase
+from src.scraper.timestamp_parser import parse_posted_at
+
+
+def _parse_db_time(value: str) -> datetime:
+    """Convert a timestamptz string from PostgREST to naive UTC (same convention as save_post)."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def derive_posted_at(row: dict) -> tuple[str, str]:
+    """(posted_at, posted_at_source) for a stored row: its timestamp parsed relative to scraped_at."""
+    scraped_at = _parse_db_time(row["scraped_at"]) if row.get("scraped_at") else datetime.utcnow()
+    parsed = parse_posted_at(row.get("timestamp") or "", scraped_at)
+    if parsed is None:
+        return scraped_at.isoformat(), "scraped_at"
+    return parsed.isoformat(), "timestamp"
+
+
+def reparse_posted_at(batch_size: int = 1000, retry_unparsed: bool = False) -> dict:
+    """Re-parse posted_at for every unresolved row. Returns counts per outcome."""
+    print("=" * 60)
+    print("RE-PARSE posted_at")
+    print("=" * 60)
+
+    unresolved = "posted_at_source.is.null"
+    if retry_unparsed:
+        unresolved += ",posted_at_source.eq.scraped_at"
+
+    counts = {"checked": 0, "timestamp": 0, "scraped_at": 0, "updated": 0}
+    last_id = 0
+    while True:
+        # Keyset pagination on id: --retry-unparsed rows that still don't
+        # parse stay in the filter, so re-reading the first page would loop
+        result = (
+            supabase.table("posts")
+            .select("id, timestamp, scraped_at")
+            .or_(unresolved)
+            .gt("id", last_id)
+            .order("id")
+            .limit(batch_size)
+            .execute()
+        )
+        rows = result.data or []
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            posted_at, source = derive_posted_at(row)
+            updates.append({"id": row["id"], "posted_at": posted_at, "posted_at_source": source})
+            counts[source] += 1
+
+        written = supabase.rpc("set_posted_at_batch", {"updates": updates}).execute()
+        counts["checked"] += len(rows)
+        counts["updated"] += int(written.data or 0)
+        last_id = rows[-1]["id"]
+        print(f"  Checked {counts['checked']} posts (last id: {last_id})...")
+
+    print(f"\n[OK] Resolved posted_at for {counts['checked']} posts: "
+          f"{counts['timestamp']} from the timestamp, {counts['scraped_at']} fell back to scraped_at "
+          f"({counts['updated']} rows written)")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-parse posts.posted_at for unresolved rows")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--retry-unparsed", action="store_true",
+                        help="Also re-parse rows whose timestamp fell back to scraped_at")
+    args = parser.parse_args()
+
+    try:
+        reparse_posted_at(args.batch_size, args.retry_unparsed)
+    except Exception as e:
+        if "posted_at_source" in str(e) or "set_posted_at_batch" in str(e):
+            print("[ERROR] posted_at_source missing. Run migrations/add_posted_at_source.sql first.")
+        else:
+            print(f"[ERROR] {e}")
+        sys.exit(1)
@@ -0,0 +1,235 @@
+"""
+Train the local pre-classifier (src/ai/local_classifier.py) from posts the AI
+has already labeled.
+
+Labeled examples come from:
+  - the AI result cache (AI_CACHE_PATH, data/ai_cache.db): every post
+    analyze_post() sent to OpenAI, offers and requests, with its title and
+    text. Offers are never saved to posts, so this is the only source of
+    offer labels.
+  - Supabase posts with ai_processed = true: requests with their category.
+
+A deterministic share of the examples (by text hash, --holdout) is held
+out: the models are trained on the rest, then the held-out set reports
+accuracy and the share of AI calls the local stage would avoid at a range
+of confidence thresholds. The model is saved to LOCAL_CLASSIFIER_PATH
+(data/local_classifier.json), where main.py picks it up on the next start.
+
+Usage:
+    python scripts/train_local_classifier.py [--no-supabase] [--holdout 0.2] [--threshold 0.9] [--scope offers|all]
+
+Re-run it now and then: the cache keeps collecting labeled posts.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# The OpenAI client is built at import time; training makes no API calls
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from src.ai.ai_processor import CATEGORY_LIST
+from src.ai.local_classifier import (
+    LOCAL_CLASSIFIER_PATH, LOCAL_CLASSIFIER_SCOPE, LOCAL_CLASSIFIER_THRESHOLD,
+    LocalClassifier, SoftmaxModel, extract_features, is_confident,
+)
+from src.ai.result_cache import AI_CACHE_PATH, AIResultCache
+from src.database.post_rows import _normalize_text
+
+THRESHOLDS = [0.6, 0.7, 0.8, 0.9, 0.95, 0.99]
+
+
+def _example_id(title: str, text: str) -> str:
+    return hashlib.sha1(f"{_normalize_text(title)}\n{_normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def load_cache_examples(path: str) -> list[dict]:
+    """Offers and requests the AI analyzed, from the result cache file."""
+    if not os.path.exists(path):
+        print(f"  [WARN] No AI result cache at {path}")
+        return []
+    cache = AIResultCache(path, memory_size=0)
+    try:
+        examples = []
+        for source, result in cache.labeled("analysis"):
+            if not result.get("ai_processed"):
+                continue
+            examples.append({
+                "title": source.get("title") or "",
+                "text": source.get("text") or "",
+                "is_request": bool(result.get("is_request")),
+                "category": result.get("category") if result.get("is_request") else None,
+            })
+        return examples
+    finally:
+        cache.close()
+
+
+def load_posts_examples(batch_size: int = 1000) -> list[dict]:
+    """Requests the AI categorized, from Supabase posts (keyset pages on id)."""
+    from src.database.supabase_db import supabase
+
+    examples = []
+    last_id = 0
+    while True:
+        result = (
+            supabase.table("posts")
+            .select("id, title, text, category")
+            .eq("ai_processed", True)
+            .gt("id", last_id)
+            .order("id")
+            .limit(batch_size)
+            .execute()
+        )
+        rows = result.data or []
+        if not rows:
+            break
+        for row in rows:
+            examples.append({
+                "title": row.get("title") or "",
+                "text": row.get("text") or "",
+                "is_request": True,
+                "category": row.get("category"),
+            })
+        last_id = rows[-1]["id"]
+    return examples
+
+
+def split_examples(examples: list[dict], holdout: float) -> tuple[list[dict], list[dict]]:
+    """(train, held-out), split on the text hash so reruns hold out the same posts."""
+    train, heldout = [], []
+    for example in examples:
+        bucket = int(example["id"][:8], 16) % 1000
+        (heldout if bucket < holdout * 1000 else train).append(example)
+    return train, heldout
+
+
+def train(examples: list[dict], epochs: int, min_examples: int) -> LocalClassifier:
+    """Fit the offer/request model and the category model (each only if it has enough examples)."""
+    offers = sum(1 for e in examples if not e["is_request"])
+    requests = len(examples) - offers
+    offer_model = None
+    if offers >= min_examples and requests >= min_examples:
+        offer_model = SoftmaxModel(["OFFER", "REQUEST"])
+        offer_model.fit([(e["features"], "REQUEST" if e["is_request"] else "OFFER") for e in examples], epochs=epochs)
+    else:
+        print(f"  [WARN] Offer model skipped: {offers} offers / {requests} requests (need {min_examples} of each)")
+
+    categorized = [e for e in examples if e["is_request"] and e["category"] in CATEGORY_LIST]
+    category_model = None
+    if len(categorized) >= min_examples:
+        category_model = SoftmaxModel(sorted({e["category"] for e in categorized}))
+        category_model.fit([(e["features"], e["category"]) for e in categorized], epochs=epochs)
+    else:
+        print(f"  [WARN] Category model skipped: {len(categorized)} categorized requests (need {min_examples})")
+    return LocalClassifier(offer_model, category_model)
+
+
+def evaluate(classifier: LocalClassifier, heldout: list[dict], scope: str) -> dict:
+    """Held-out accuracy of each model, and per threshold: share decided locally and their accuracy."""
+    predictions = [(e, classifier.predict(e["title"], e["text"])) for e in heldout]
+    metrics = {"heldout": len(heldout), "offer_accuracy": None, "category_accuracy": None, "thresholds": {}}
+
+    if classifier.offer_model and predictions:
+        correct = sum(p["is_request"] == e["is_request"] for e, p in predictions)
+        metrics["offer_accuracy"] = correct / len(predictions)
+    categorized = [(e, p) for e, p in predictions if e["is_request"] and e["category"] in CATEGORY_LIST]
+    if classifier.category_model and categorized:
+        metrics["category_accuracy"] = sum(p["category"] == e["category"] for e, p in categorized) / len(categorized)
+
+    for threshold in THRESHOLDS:
+        decided = [(e, p) for e, p in predictions if is_confident(p, threshold, scope)]
+        correct = sum(
+            p["is_request"] == e["is_request"] and (not e["is_request"] or p["category"] == e["category"])
+            for e, p in decided
+        )
+        metrics["thresholds"][str(threshold)] = {
+            "calls_avoided": len(decided) / len(predictions) if predictions else 0.0,
+            "accuracy": correct / len(decided) if decided else None,
+        }
+    return metrics
+
+
+def _pct(value) -> str:
+    return f"{value:.1%}" if value is not None else "-"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local offer/category pre-classifier")
+    parser.add_argument("--cache", default=AI_CACHE_PATH, help="AI result cache file with labeled posts")
+    parser.add_argument("--no-supabase", action="store_true", help="Train from the AI result cache only")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--min-examples", type=int, default=50, help="Fewest examples per class to train a model")
+    parser.add_argument("--threshold", type=float, default=LOCAL_CLASSIFIER_THRESHOLD,
+                        help="Confidence threshold to report (set LOCAL_CLASSIFIER_THRESHOLD to use it)")
+    parser.add_argument("--scope", choices=["offers", "all"], default=LOCAL_CLASSIFIER_SCOPE)
+    parser.add_argument("--output", default=LOCAL_CLASSIFIER_PATH)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TRAIN LOCAL PRE-CLASSIFIER")
+    print("=" * 60)
+
+    cache_examples = load_cache_examples(args.cache)
+    posts_examples = []
+    if not args.no_supabase:
+        try:
+            posts_examples = load_posts_examples()
+        except Exception as e:
+            print(f"  [WARN] Could not read posts from Supabase: {str(e)[:60]}")
+
+    # One example per text; the cache (newest prompt) wins over posts
+    examples = {}
+    for example in posts_examples + cache_examples:
+        example["id"] = _example_id(example["title"], example["text"])
+        examples[example["id"]] = example
+    examples = list(examples.values())
+    offers = sum(1 for e in examples if not e["is_request"])
+    print(f"[*] {len(examples)} labeled posts ({len(cache_examples)} from the AI cache, "
+          f"{len(posts_examples)} from posts): {len(examples) - offers} requests, {offers} offers")
+    if not examples:
+        print("[ERROR] Nothing to train on yet: run the scraper with OPENAI_API_KEY set first.")
+        sys.exit(1)
+
+    for example in examples:
+        example["features"] = extract_features(example["title"], example["text"])
+    train_set, heldout = split_examples(examples, args.holdout)
+
+    started = time.perf_counter()
+    classifier = train(train_set, args.epochs, args.min_examples)
+    print(f"[*] Trained on {len(train_set)} posts in {time.perf_counter() - started:.1f}s, "
+          f"evaluating on {len(heldout)} held-out posts (scope: {args.scope})")
+    if not classifier.offer_model:
+        print("[ERROR] No offer model, so the local stage could never skip an AI call. Not saved.")
+        sys.exit(1)
+
+    metrics = evaluate(classifier, heldout, args.scope)
+    print(f"\n  Offer/request accuracy: {_pct(metrics['offer_accuracy'])} | "
+          f"category accuracy: {_pct(metrics['category_accuracy'])} (all held-out posts, no threshold)")
+    print(f"\n  {'threshold':>9}  {'AI calls avoided':>16}  {'accuracy of those':>17}")
+    for threshold, row in metrics["thresholds"].items():
+        marker = "  <-" if float(threshold) == args.threshold else ""
+        print(f"  {threshold:>9}  {_pct(row['calls_avoided']):>16}  {_pct(row['accuracy']):>17}{marker}")
+
+    classifier.metadata = {
+        "trained_at": datetime.utcnow().isoformat(),
+        "examples": len(train_set),
+        "offers": sum(1 for e in train_set if not e["is_request"]),
+        "scope": args.scope,
+        "threshold": args.threshold,
+        "heldout": metrics,
+    }
+    classifier.save(args.output)
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"\n[OK] Saved to {args.output} ({size_mb:.1f} MB)")
+    if str(args.threshold) not in metrics["thresholds"]:
+        print(f"     (threshold {args.threshold} is not in the table above)")
@@ -1,6 +1,8 @@
 """AI module - OpenAI-powered post analysis and categorization."""
 
 from .ai_processor import (
+    analyze_post,
+    analyze_posts,
     process_post_with_ai,
     should_process_with_ai,
     is_service_request,
@@ -9,6 +11,8 @@ from .ai_processor import (
 )
 
 __all__ = [
+    'analyze_post',
+    'analyze_posts',
     'process_post_with_ai',
     'should_process_with_ai',
     'is_service_request',
@@ -8,17 +8,35 @@ AI-powered post processor using OpenAI to extract:
 
 import os
 import json
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from .local_classifier import get_local_classifier
+from .rate_limiter import call_with_retries, get_rate_limiter
+from .result_cache import cache_key, get_result_cache
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Retries are handled by _chat_completion (shared rate limiter + jittered backoff)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
 # Model to use for all AI calls (must be a valid OpenAI model)
 AI_MODEL = "gpt-4o-mini"
 
+# Calls analyze_posts() runs at once (per group; the rate limiter is shared)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+
+# analyze_posts() sends up to AI_BATCH_SIZE posts per call, with at most
+# ~AI_BATCH_TOKEN_BUDGET tokens of post text; AI_BATCH_SIZE=1 disables batching
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+AI_BATCH_TOKEN_BUDGET = int(os.getenv("AI_BATCH_TOKEN_BUDGET", "2000"))
+
+# Bump a prompt's version when changing it, so cached results from the old
+# prompt are no longer used (see result_cache.py)
+PROMPT_VERSIONS = {"analysis": 1, "estimate": 1, "message": 1}
+
 # Define available categories with descriptions for AI classification
 CATEGORIES = {
     "Electrical": "Electrician work, wiring, lights, mirrors with electrical connections, outlets, fuse boxes, stove guards",
@@ -35,6 +53,163 @@ CATEGORIES = {
 }
 
 CATEGORY_LIST = list(CATEGORIES.keys())
+CATEGORY_DESCRIPTIONS = "\n".join(f"- {cat}: {desc}" for cat, desc in CATEGORIES.items())
+
+# How to tell a REQUEST (someone needs a job done) from an OFFER (advertising, job seeking)
+REQUEST_OFFER_GUIDE = """You are an expert at analyzing Norwegian/English job postings from Facebook groups. Your job is to determine whether a post is someone ASKING for a service (REQUEST) or someone OFFERING/ADVERTISING a service or SEEKING EMPLOYMENT (OFFER).
+
+OFFER (return "OFFER") — The poster is OFFERING services, ADVERTISING themselves, or SEEKING EMPLOYMENT:
+- They describe what services THEY can provide
+- They list their skills, qualifications, experience, or equipment
+- They mention prices, rates, or competitive pricing
+- They invite people to contact them for services ("send PM", "ta kontakt", "ring meg")
+- They ask rhetorical questions like "Trenger du/noen hjelp?" (Do you/anyone need help?) — this is advertising, NOT requesting
+- They use language like "Vi/Jeg tilbyr...", "Vi/Jeg utfører...", "Vi/Jeg kan...", "Vi fikser..."
+- They describe their business, company, or professional background
+- They list MULTIPLE services they provide
+- They cover a WIDE geographic area (e.g. "Oslo og omegn", "Østfold & Oslo") — real requests are at a specific address/location
+- Companies looking to HIRE workers for their business
+- **JOB SEEKERS**: Someone LOOKING FOR WORK, applying for a job, seeking employment ("søker jobb", "søknad om jobb", "leter etter jobb", "på utkikk etter jobb", "looking for work")
+- **CV/RESUME posts**: Someone presenting themselves, their experience, and contact info to get hired
+- People saying "I can do X, Y, Z — contact me" or "I'm available for work"
+- People describing themselves and asking others to hire them
+- Short/vague posts that just advertise a service without a specific task (e.g. "Need cleaning? Send PM")
+
+REQUEST (return "REQUEST") — The poster NEEDS someone to do a specific job for them:
+- They describe a SPECIFIC task they need done (e.g., "need help moving a sofa", "need a plumber for my bathroom", "looking for someone to paint my apartment")
+- They mention a SPECIFIC location where the work needs to happen (an address, building, apartment, specific neighborhood)
+- They use language like "Trenger hjelp med...", "Ser etter noen som kan...", "Noen som kan...?"
+- They are an individual person needing a specific service performed
+- They ask for price quotes or availability FOR A SPECIFIC JOB
+- The post contains DETAILS about the job (dimensions, materials, what exactly needs to be done)
+
+KEY DISTINCTIONS:
+- "Trenger du/noen hjelp med...?" (Do you/someone need help with...?) = OFFER (advertising to potential customers)
+- "Trenger noen hjelp til å vaske huset?" = OFFER (asking if anyone needs cleaning — they're offering the service)
+- "Trenger hjelp med..." / "Trenger hjelp til..." (I need help with...) = REQUEST (the poster needs help)
+- "Søker jobb" / "Leter etter jobb" / "Søknad om jobb" = OFFER (seeking employment)
+- "Jeg kan gjøre X" (I can do X) = OFFER (advertising skills)
+- "Trenger noen til å gjøre X" (Need someone to do X) = REQUEST (looking for a worker)
+- Short post + "send PM" + wide area = OFFER (advertising)
+- Detailed post + specific location + specific task = REQUEST (genuine job)
+
+When in doubt, classify as OFFER — we only want genuine requests where someone needs a specific job done.
+
+EXAMPLES:
+- "Trenger noen hjelp til å vaske huset? Østfold & Oslo og omegn. Send gjerne en pm" → OFFER (asking if anyone needs cleaning, advertising)
+- "Hei! Vi utfører alt av maling, sparkling og tapetsering. Ta kontakt!" → OFFER (advertising services)
+- "Søknad om jobb. Mitt navn er X, jeg har erfaring med Y..." → OFFER (job seeker)
+- "Trenger hjelp med å flytte en sofa fra 3. etasje ned til bilen. Bor på Grünerløkka." → REQUEST (specific task, specific location)
+- "Noen som kan skifte registerreim på en Peugeot 106?" → REQUEST (specific task needed)
+- "Hei! Trenger hjelp til å legge gips i et kjellerrom over panel" → REQUEST (specific task)"""
+
+# Category rules and examples
+CATEGORY_GUIDE = """Instructions:
+- Choose exactly ONE primary category — the MAIN task the person needs done.
+- Also list any secondary categories if the post involves additional tasks from other categories. Only include secondary categories that are clearly mentioned — don't guess.
+- "Car Mechanic" is for work DONE ON a vehicle (repairs, brakes, tires, engine, inspections, tow bar/tilhengerfeste installation, car painting/lakkering, software updates on cars). If someone needs something installed or fixed ON their car, it's Car Mechanic.
+- "Transport / Moving" is ONLY for physically moving/transporting items from place A to place B, helping someone relocate to a new address, or needing a driver/sjåfør for transport/taxi. NOT for installing parts on vehicles. NOT for relocating a kitchen/bathroom/room within a home — that's a renovation/plumbing job.
+- "IT / Tech" is ONLY for computer/phone/smart-home/technical support. Posts mentioning vehicles, drivers, taxis, vans (Sprinter, etc.) are NEVER IT/Tech.
+- "Plumbing" includes any rørlegger/rørleggerarbeid, setting up pipes for kitchens or bathrooms, AND relocating plumbing to a different room within a home (e.g. "kjøkken som skal flyttes fra et rom til et annet").
+- "Painting / Renovation" covers carpentry (snekker), building custom items, woodwork, construction. NOT for cleaning/washing apartments.
+- "Cleaning / Garden" is for ANY apartment/house cleaning task: vasking, gulvvask, utvask, rengjøring, sengetøy, taking out trash, surface wiping, window washing. If the post asks for help CLEANING, it's Cleaning / Garden.
+- "Assembly / Furniture" is for assembling pre-made/flat-pack items (IKEA, shelves, TV mounting).
+- "Manual Labor" is for heavy lifting, carrying, demolition, removal work.
+- Use "Other" for posts that genuinely don't fit any specific category.
+- Extract the location if mentioned (city, area, or district name).
+
+EXAMPLES:
+- "Trenger hjelp med flyttevask, innbo skal kastes, men noen ting må gamles til loppemarked" → primary: "Cleaning / Garden", secondary: ["Transport / Moving"]
+- "Trenger å flytte en sofa fra 3.etg ned til bilen" → primary: "Transport / Moving", secondary: ["Manual Labor"]
+- "Sparkle, slipe og male et rom + montere ny lampe" → primary: "Painting / Renovation", secondary: ["Electrical"]
+- "Trenger hjelp til å kaste søppel, noe bæring involvert" → primary: "Manual Labor", secondary: ["Transport / Moving"]
+- "Montere tilhengerfeste med software på en Volvo XC90" → primary: "Car Mechanic", secondary: [] (work ON a vehicle)
+- Building foldable wall panels by a carpenter → primary: "Painting / Renovation", secondary: []
+- "Ønsker pris på rørleggerarbeid til bad, samt opplegg og montering av rør til kjøkken som skal flyttes fra naborom til stue" → primary: "Plumbing", secondary: [] (rørlegger work + relocating kitchen plumbing within a home is NOT transport)
+- "Jeg trenger sjåfør til Sprinter 9-seter med rullestoltilpassing, tilknyttet Asker Taxi 07000" → primary: "Transport / Moving", secondary: [] (driver/taxi/vehicle = Transport, NOT IT/Tech)
+- "Søker serveringshjelp med erfaring til privat kinesisk nyttår selskap" → primary: "Other", secondary: [] (catering/serving/event staffing = Other, NOT Assembly)
+- "Trenger vaske hjelp liten 43 kvm leilighet. Trenger vask av gulv bytte av sengetøy. Vasking av kjøkken ned med søppel vasking av overflater." → primary: "Cleaning / Garden", secondary: [] (apartment cleaning/washing = Cleaning, NOT Painting/Renovation)"""
+
+# System prompt of analyze_post(); contains nothing post-specific, so every
+# call shares the same (cacheable) prefix
+ANALYSIS_SYSTEM_PROMPT = f"""{REQUEST_OFFER_GUIDE}
+
+Classify the post as REQUEST or OFFER using the rules above. Then, whatever the answer, classify it into categories.
+
+AVAILABLE CATEGORIES:
+{CATEGORY_DESCRIPTIONS}
+
+{CATEGORY_GUIDE}"""
+
+# Answer budget per post (a batch gets this times its size)
+ANALYSIS_MAX_TOKENS = 250
+
+# Structured output of analyze_post()
+ANALYSIS_SCHEMA = {
+    "name": "post_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "post_type": {"type": "string", "enum": ["REQUEST", "OFFER"]},
+            "category": {"type": "string", "enum": CATEGORY_LIST},
+            "secondary_categories": {"type": "array", "items": {"type": "string", "enum": CATEGORY_LIST}},
+            "location": {"type": "string", "description": "city or area name, or Unknown"},
+            "features": {
+                "type": "object",
+                "properties": {
+                    "urgency": {"type": "string", "enum": ["urgent", "normal", "flexible"]},
+                    "price_mentioned": {"type": "boolean"},
+                    "contact_method": {"type": "string", "enum": ["pm", "phone", "comment", "not_specified"]},
+                },
+                "required": ["urgency", "price_mentioned", "contact_method"],
+                "additionalProperties": False,
+            },
+        },
+        "required": ["post_type", "category", "secondary_categories", "location", "features"],
+        "additionalProperties": False,
+    },
+}
+
+# Batch variant: same prompt prefix (shares the prompt cache with single calls),
+# posts sent as a JSON array, one answer per post echoed back by post_id
+ANALYSIS_BATCH_SYSTEM_PROMPT = f"""{ANALYSIS_SYSTEM_PROMPT}
+
+You will receive several posts as a JSON array of objects with post_id, title and text. Classify each post on its own, exactly as if it were the only one, and return one entry per post in "results" with its post_id copied unchanged."""
+
+ANALYSIS_BATCH_SCHEMA = {
+    "name": "post_batch_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"post_id": {"type": "string"}, **ANALYSIS_SCHEMA["schema"]["properties"]},
+                    "required": ["post_id", *ANALYSIS_SCHEMA["schema"]["required"]],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _chat_completion(**kwargs):
+    """
+    client.chat.completions.create() under the shared rate limiter, retrying
+    429/5xx/connection errors with jittered backoff (rate_limiter.py).
+
+    The token budget counts the prompt (~4 characters per token) plus
+    max_tokens, as OpenAI's TPM limit does.
+    """
+    prompt_chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+    tokens = prompt_chars // 4 + kwargs.get("max_tokens", 0)
+    return call_with_retries(lambda: client.chat.completions.create(**kwargs), get_rate_limiter(), tokens)
 
 
 def _is_obvious_offer(title: str, text: str) -> bool:
@@ -106,217 +281,342 @@ def _is_obvious_offer(title: str, text: str) -> bool:
     return False
 
 
-def is_service_request(title: str, text: str) -> bool:
+def _match_category(name) -> Optional[str]:
+    """Map a model-provided category name onto CATEGORY_LIST (exact, then fuzzy), or None."""
+    if name in CATEGORY_LIST:
+        return name
+    name_lower = name.lower() if isinstance(name, str) else ""
+    if not name_lower:
+        return None
+    for valid_cat in CATEGORY_LIST:
+        if valid_cat.lower() in name_lower or name_lower in valid_cat.lower():
+            return valid_cat
+    return None
+
+
+def _normalize_categories(raw_category, raw_secondary) -> tuple[str, list[str]]:
+    """Validated (primary, secondary) categories; unknown primaries become "Other"."""
+    category = _match_category(raw_category) or "Other"
+    secondary_categories = []
+    if isinstance(raw_secondary, list):
+        for sec in raw_secondary:
+            valid_cat = _match_category(sec)
+            if valid_cat and valid_cat != category and valid_cat not in secondary_categories:
+                secondary_categories.append(valid_cat)
+    return category, secondary_categories
+
+
+def _analysis_result(is_request: bool, rejected_by: Optional[str] = None, category: str = "Other",
+                     secondary_categories: Optional[list] = None, location: str = "Unknown",
+                     ai_features: Optional[dict] = None, ai_processed: bool = False) -> Dict[str, any]:
+    return {
+        "is_request": is_request,
+        "rejected_by": rejected_by,
+        "category": category,
+        "secondary_categories": secondary_categories or [],
+        "location": location,
+        "ai_features": ai_features or {},
+        "ai_processed": ai_processed,
+    }
+
+
+def _analysis_key(title: str, text: str) -> str:
+    """Result cache key of a post's analysis (shared by single and batch calls)."""
+    return cache_key("analysis", PROMPT_VERSIONS["analysis"], AI_MODEL, title, text)
+
+
+def _analysis_from_answer(answer: Dict) -> Dict[str, any]:
+    """analyze_post() result from one structured-output answer (single or batch element)."""
+    is_request = answer.get("post_type") == "REQUEST"
+    category, secondary_categories = _normalize_categories(
+        answer.get("category", "Other"), answer.get("secondary_categories", [])
+    )
+    return _analysis_result(
+        is_request=is_request,
+        rejected_by=None if is_request else "ai",
+        category=category,
+        secondary_categories=secondary_categories,
+        location=answer.get("location") or "Unknown",
+        ai_features=answer.get("features", {}),
+        ai_processed=True,
+    )
+
+
+def _local_analysis(title: str, text: str) -> Optional[Dict[str, any]]:
     """
-    Determine if a post is a SERVICE REQUEST (someone needs help)
-    vs a SERVICE OFFER (someone offering their services).
+    Result from the local pre-classifier (local_classifier.py) when it's
+    confident enough to skip the AI call, else None.
     
-    Uses a fast deterministic pre-filter first, then falls back to AI.
-    
-    Returns True if it's a request for service (we want to keep these).
-    Returns False if it's an offer/advertisement (we want to filter these out).
+    Not cached and not marked ai_processed, so these posts are never used
+    to train the local model itself.
     """
-    # Fast pre-filter: catch obvious offers without calling AI
-    if _is_obvious_offer(title, text):
-        print(f"    [AI FILTER] Rejected as OFFER (pre-filter)")
-        return False
-    
-    content = f"{title}\n{text}"
-    
+    classifier = get_local_classifier()
+    prediction = classifier.confident_prediction(title, text) if classifier else None
+    if prediction is None:
+        return None
+    if not prediction["is_request"]:
+        return _analysis_result(is_request=False, rejected_by="local")
+    return _analysis_result(is_request=True, category=prediction["category"])
+
+
+def _analyze_with_ai(title: str, text: str, key: str) -> Dict[str, any]:
+    """One structured-output call for one post; caches the result under `key`."""
     try:
-        response = client.chat.completions.create(
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
-                {"role": "system", "content": """You are an expert at analyzing Norwegian/English job postings from Facebook groups. Your job is to determine whether a post is someone ASKING for a service (REQUEST) or someone OFFERING/ADVERTISING a service or SEEKING EMPLOYMENT (OFFER).
-
-OFFER (return "OFFER") — The poster is OFFERING services, ADVERTISING themselves, or SEEKING EMPLOYMENT:
-- They describe what services THEY can provide
-- They list their skills, qualifications, experience, or equipment
-- They mention prices, rates, or competitive pricing
-- They invite people to contact them for services ("send PM", "ta kontakt", "ring meg")
-- They ask rhetorical questions like "Trenger du/noen hjelp?" (Do you/anyone need help?) — this is advertising, NOT requesting
-- They use language like "Vi/Jeg tilbyr...", "Vi/Jeg utfører...", "Vi/Jeg kan...", "Vi fikser..."
-- They describe their business, company, or professional background
-- They list MULTIPLE services they provide
-- They cover a WIDE geographic area (e.g. "Oslo og omegn", "Østfold & Oslo") — real requests are at a specific address/location
-- Companies looking to HIRE workers for their business
-- **JOB SEEKERS**: Someone LOOKING FOR WORK, applying for a job, seeking employment ("søker jobb", "søknad om jobb", "leter etter jobb", "på utkikk etter jobb", "looking for work")
-- **CV/RESUME posts**: Someone presenting themselves, their experience, and contact info to get hired
-- People saying "I can do X, Y, Z — contact me" or "I'm available for work"
-- People describing themselves and asking others to hire them
-- Short/vague posts that just advertise a service without a specific task (e.g. "Need cleaning? Send PM")
-
-REQUEST (return "REQUEST") — The poster NEEDS someone to do a specific job for them:
-- They describe a SPECIFIC task they need done (e.g., "need help moving a sofa", "need a plumber for my bathroom", "looking for someone to paint my apartment")
-- They mention a SPECIFIC location where the work needs to happen (an address, building, apartment, specific neighborhood)
-- They use language like "Trenger hjelp med...", "Ser etter noen som kan...", "Noen som kan...?"
-- They are an individual person needing a specific service performed
-- They ask for price quotes or availability FOR A SPECIFIC JOB
-- The post contains DETAILS about the job (dimensions, materials, what exactly needs to be done)
-
-KEY DISTINCTIONS:
-- "Trenger du/noen hjelp med...?" (Do you/someone need help with...?) = OFFER (advertising to potential customers)
-- "Trenger noen hjelp til å vaske huset?" = OFFER (asking if anyone needs cleaning — they're offering the service)
-- "Trenger hjelp med..." / "Trenger hjelp til..." (I need help with...) = REQUEST (the poster needs help)
-- "Søker jobb" / "Leter etter jobb" / "Søknad om jobb" = OFFER (seeking employment)
-- "Jeg kan gjøre X" (I can do X) = OFFER (advertising skills)
-- "Trenger noen til å gjøre X" (Need someone to do X) = REQUEST (looking for a worker)
-- Short post + "send PM" + wide area = OFFER (advertising)
-- Detailed post + specific location + specific task = REQUEST (genuine job)
-
-When in doubt, classify as OFFER — we only want genuine requests where someone needs a specific job done.
-
-EXAMPLES:
-- "Trenger noen hjelp til å vaske huset? Østfold & Oslo og omegn. Send gjerne en pm" → OFFER (asking if anyone needs cleaning, advertising)
-- "Hei! Vi utfører alt av maling, sparkling og tapetsering. Ta kontakt!" → OFFER (advertising services)
-- "Søknad om jobb. Mitt navn er X, jeg har erfaring med Y..." → OFFER (job seeker)
-- "Trenger hjelp med å flytte en sofa fra 3. etasje ned til bilen. Bor på Grünerløkka." → REQUEST (specific task, specific location)
-- "Noen som kan skifte registerreim på en Peugeot 106?" → REQUEST (specific task needed)
-- "Hei! Trenger hjelp til å legge gips i et kjellerrom over panel" → REQUEST (specific task)
-
-Respond with ONLY one word: REQUEST or OFFER"""},
-                {"role": "user", "content": content}
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Post Title: {title}\nPost Content: {text}"}
             ],
+            response_format={"type": "json_schema", "json_schema": ANALYSIS_SCHEMA},
             temperature=0.1,
-            max_tokens=10
+            max_tokens=ANALYSIS_MAX_TOKENS
         )
         
-        result = response.choices[0].message.content.strip().upper()
-        is_request = "REQUEST" in result
-        if not is_request:
-            print(f"    [AI FILTER] Rejected as OFFER")
-        return is_request
+        result = _analysis_from_answer(json.loads(response.choices[0].message.content))
+        get_result_cache().put("analysis", key, result, source={"title": title, "text": text})
+        return result
         
     except Exception as e:
-        print(f"    [AI FILTER] Error: {str(e)[:50]} - keeping post")
-        # Default to keeping the post if AI fails
-        return True
+        print(f"    [AI ANALYZE] Error: {str(e)[:50]} - keeping post")
+        # Default to keeping the post if AI fails (not cached, so the next call retries)
+        return _analysis_result(is_request=True)
 
 
-def process_post_with_ai(title: str, text: str, post_id: str) -> Dict[str, any]:
+def analyze_post(title: str, text: str, post_id: str = "") -> Dict[str, any]:
     """
-    Use AI to classify a post into a category and extract location/features.
+    Classify a post in one AI call: request vs offer, category, secondary
+    categories, location and features.
+    
+    Obvious offers are caught by the deterministic pre-filter without an API
+    call. Otherwise one structured-output request (ANALYSIS_SCHEMA) answers
+    everything; the system prompt is identical for every post, so OpenAI can
+    serve it from its prompt cache.
     
-    This is 100% AI-driven — no keyword matching. The AI receives the full list
-    of available categories and picks the best match.
+    Results are cached by content (result_cache.py), so the same text seen
+    again, reposted or cross-posted under another ID, costs no second call.
+    On a cache miss the local pre-classifier (local_classifier.py) answers
+    if it's confident, again without a call.
     
     Args:
         title: Post title
         text: Post content
-        post_id: Post ID (for caching/tracking)
+        post_id: Post ID (for tracking; the cache is keyed on content)
     
     Returns:
-        Dictionary with: category, location, features
+        Dictionary with: is_request, rejected_by ("pre-filter", "local", "ai" or None),
+        category, secondary_categories, location, ai_features, ai_processed.
+        If the AI call fails the post is kept (is_request True) as "Other".
     """
-    try:
-        # Build category descriptions for the prompt
-        category_desc = "\n".join([f"- {cat}: {desc}" for cat, desc in CATEGORIES.items()])
-        
-        prompt = f"""Analyze this Norwegian job posting and classify it into categories.
-
-AVAILABLE CATEGORIES:
-{category_desc}
+    # Fast pre-filter: catch obvious offers without calling AI
+    if _is_obvious_offer(title, text):
+        return _analysis_result(is_request=False, rejected_by="pre-filter")
+    
+    key = _analysis_key(title, text)
+    cached = get_result_cache().get("analysis", key)
+    if cached is not None:
+        return cached
+    
+    # Local model: confident predictions skip the API call
+    local = _local_analysis(title, text)
+    if local is not None:
+        return local
+    
+    return _analyze_with_ai(title, text, key)
 
-Post Title: {title}
-Post Content: {text}
 
-Instructions:
-- Choose exactly ONE primary category — the MAIN task the person needs done.
-- Also list any secondary categories if the post involves additional tasks from other categories. Only include secondary categories that are clearly mentioned — don't guess.
-- "Car Mechanic" is for work DONE ON a vehicle (repairs, brakes, tires, engine, inspections, tow bar/tilhengerfeste installation, car painting/lakkering, software updates on cars). If someone needs something installed or fixed ON their car, it's Car Mechanic.
-- "Transport / Moving" is ONLY for physically moving/transporting items from place A to place B, helping someone relocate to a new address, or needing a driver/sjåfør for transport/taxi. NOT for installing parts on vehicles. NOT for relocating a kitchen/bathroom/room within a home — that's a renovation/plumbing job.
-- "IT / Tech" is ONLY for computer/phone/smart-home/technical support. Posts mentioning vehicles, drivers, taxis, vans (Sprinter, etc.) are NEVER IT/Tech.
-- "Plumbing" includes any rørlegger/rørleggerarbeid, setting up pipes for kitchens or bathrooms, AND relocating plumbing to a different room within a home (e.g. "kjøkken som skal flyttes fra et rom til et annet").
-- "Painting / Renovation" covers carpentry (snekker), building custom items, woodwork, construction. NOT for cleaning/washing apartments.
-- "Cleaning / Garden" is for ANY apartment/house cleaning task: vasking, gulvvask, utvask, rengjøring, sengetøy, taking out trash, surface wiping, window washing. If the post asks for help CLEANING, it's Cleaning / Garden.
-- "Assembly / Furniture" is for assembling pre-made/flat-pack items (IKEA, shelves, TV mounting).
-- "Manual Labor" is for heavy lifting, carrying, demolition, removal work.
-- Use "Other" for posts that genuinely don't fit any specific category.
-- Extract the location if mentioned (city, area, or district name).
+def _is_valid_batch_answer(answer) -> bool:
+    """A batch element is usable if it has a post type and a category CATEGORY_LIST recognizes."""
+    return (isinstance(answer, dict)
+            and answer.get("post_type") in ("REQUEST", "OFFER")
+            and _match_category(answer.get("category")) is not None)
 
-EXAMPLES:
-- "Trenger hjelp med flyttevask, innbo skal kastes, men noen ting må gamles til loppemarked" → primary: "Cleaning / Garden", secondary: ["Transport / Moving"]
-- "Trenger å flytte en sofa fra 3.etg ned til bilen" → primary: "Transport / Moving", secondary: ["Manual Labor"]
-- "Sparkle, slipe og male et rom + montere ny lampe" → primary: "Painting / Renovation", secondary: ["Electrical"]
-- "Trenger hjelp til å kaste søppel, noe bæring involvert" → primary: "Manual Labor", secondary: ["Transport / Moving"]
-- "Montere tilhengerfeste med software på en Volvo XC90" → primary: "Car Mechanic", secondary: [] (work ON a vehicle)
-- Building foldable wall panels by a carpenter → primary: "Painting / Renovation", secondary: []
-- "Ønsker pris på rørleggerarbeid til bad, samt opplegg og montering av rør til kjøkken som skal flyttes fra naborom til stue" → primary: "Plumbing", secondary: [] (rørlegger work + relocating kitchen plumbing within a home is NOT transport)
-- "Jeg trenger sjåfør til Sprinter 9-seter med rullestoltilpassing, tilknyttet Asker Taxi 07000" → primary: "Transport / Moving", secondary: [] (driver/taxi/vehicle = Transport, NOT IT/Tech)
-- "Søker serveringshjelp med erfaring til privat kinesisk nyttår selskap" → primary: "Other", secondary: [] (catering/serving/event staffing = Other, NOT Assembly)
-- "Trenger vaske hjelp liten 43 kvm leilighet. Trenger vask av gulv bytte av sengetøy. Vasking av kjøkken ned med søppel vasking av overflater." → primary: "Cleaning / Garden", secondary: [] (apartment cleaning/washing = Cleaning, NOT Painting/Renovation)
-
-Respond in JSON format only:
-{{
-  "category": "one of the exact category names listed above",
-  "secondary_categories": ["other relevant category names, or empty array if none"],
-  "location": "city or area name, or Unknown",
-  "features": {{
-    "urgency": "urgent/normal/flexible",
-    "price_mentioned": true/false,
-    "contact_method": "pm/phone/comment/not_specified"
-  }}
-}}"""
 
-        response = client.chat.completions.create(
+def _analyze_batch(batch: List[tuple]) -> List[Dict[str, any]]:
+    """
+    Classify several posts in one call (ANALYSIS_BATCH_SCHEMA).
+    
+    `batch` holds (batch_id, title, text, cache_key) tuples; results come back
+    in the same order. Posts missing from the answer, or whose element fails
+    validation, are sent again one by one with _analyze_with_ai().
+    """
+    if len(batch) == 1:
+        _, title, text, key = batch[0]
+        return [_analyze_with_ai(title, text, key)]
+    
+    answers = {}
+    try:
+        posts_json = json.dumps(
+            [{"post_id": batch_id, "title": title, "text": text} for batch_id, title, text, _ in batch],
+            ensure_ascii=False
+        )
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
-                {"role": "system", "content": "You are a Norwegian job posting classifier. Classify posts with a primary category and optional secondary categories. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": ANALYSIS_BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": posts_json}
             ],
+            response_format={"type": "json_schema", "json_schema": ANALYSIS_BATCH_SCHEMA},
             temperature=0.1,
-            max_tokens=250
+            max_tokens=ANALYSIS_MAX_TOKENS * len(batch)
         )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Parse JSON response
-        result = json.loads(content)
-        
-        # Validate primary category
-        category = result.get("category", "Other")
-        if category not in CATEGORY_LIST:
-            category_lower = category.lower()
-            for valid_cat in CATEGORY_LIST:
-                if valid_cat.lower() in category_lower or category_lower in valid_cat.lower():
-                    category = valid_cat
-                    break
-            else:
-                category = "Other"
-        
-        # Validate secondary categories
-        raw_secondary = result.get("secondary_categories", [])
-        secondary_categories = []
-        if isinstance(raw_secondary, list):
-            for sec in raw_secondary:
-                if sec in CATEGORY_LIST and sec != category:
-                    secondary_categories.append(sec)
-                else:
-                    # Try fuzzy match
-                    sec_lower = sec.lower() if isinstance(sec, str) else ""
-                    for valid_cat in CATEGORY_LIST:
-                        if valid_cat.lower() in sec_lower or sec_lower in valid_cat.lower():
-                            if valid_cat != category and valid_cat not in secondary_categories:
-                                secondary_categories.append(valid_cat)
-                            break
-        
-        return {
-            "category": category,
-            "secondary_categories": secondary_categories,
-            "location": result.get("location", "Unknown"),
-            "ai_features": result.get("features", {}),
-            "ai_processed": True
-        }
-        
+        for answer in json.loads(response.choices[0].message.content).get("results", []):
+            if isinstance(answer, dict):
+                answers.setdefault(str(answer.get("post_id")), answer)
     except Exception as e:
-        print(f"    [AI CLASSIFY] Error: {str(e)[:50]}")
-        return {
-            "category": "Other",
-            "secondary_categories": [],
-            "location": "Unknown",
-            "ai_features": {},
-            "ai_processed": False
-        }
+        print(f"    [AI BATCH] Error: {str(e)[:50]} - analyzing {len(batch)} posts one by one")
+    
+    cache = get_result_cache()
+    results = []
+    fallbacks = 0
+    for batch_id, title, text, key in batch:
+        answer = answers.get(batch_id)
+        if _is_valid_batch_answer(answer):
+            result = _analysis_from_answer(answer)
+            cache.put("analysis", key, result, source={"title": title, "text": text})
+        else:
+            fallbacks += 1
+            result = _analyze_with_ai(title, text, key)
+        results.append(result)
+    
+    if answers and fallbacks:
+        print(f"    [AI BATCH] {fallbacks}/{len(batch)} answers missing or invalid - re-analyzed one by one")
+    return results
+
+
+def _pack_batches(items: List[tuple], batch_size: int, token_budget: int) -> List[List[tuple]]:
+    """
+    Split (batch_id, title, text, key) items into batches of at most
+    batch_size posts and ~token_budget tokens of post content (~4 characters
+    per token). A post over the budget on its own gets a batch of one.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        tokens = (len(item[1]) + len(item[2])) // 4
+        if current and (len(current) >= batch_size or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def analyze_posts(posts: List[Dict], max_workers: int = AI_MAX_CONCURRENCY,
+                  batch_size: int = AI_BATCH_SIZE) -> List[Dict[str, any]]:
+    """
+    analyze_post() for a group of posts, batched and run concurrently.
+    
+    The pre-filter, the result cache and the local pre-classifier are
+    checked per post first. The remaining posts (identical texts analyzed
+    once) are packed into batches of up to batch_size posts /
+    AI_BATCH_TOKEN_BUDGET tokens, so the long system prompt is sent once
+    per batch rather than once per post. Batches
+    run on a bounded thread pool under the shared rate limiter, so a group
+    takes about as long as its slowest batch.
+    
+    Args:
+        posts: Post dicts with 'title', 'text' and 'post_id'
+        max_workers: Calls in flight at once
+        batch_size: Posts per call (1 = one call per post)
+    
+    Returns:
+        One analyze_post() result per post, in the same order as `posts`.
+    """
+    results: List[Optional[Dict[str, any]]] = [None] * len(posts)
+    cache = get_result_cache()
+    pending = {}  # cache key -> (batch_id, title, text, key)
+    waiting = {}  # cache key -> indexes of posts with that content
+    used_ids = set()
+    
+    for i, post in enumerate(posts):
+        title = post.get('title', '')
+        text = post.get('text', '')
+        if _is_obvious_offer(title, text):
+            results[i] = _analysis_result(is_request=False, rejected_by="pre-filter")
+            continue
+        key = _analysis_key(title, text)
+        if key in pending:
+            waiting[key].append(i)
+            continue
+        cached = cache.get("analysis", key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        local = _local_analysis(title, text)
+        if local is not None:
+            results[i] = local
+            continue
+        # The model echoes post_id back; fall back to the position if it's missing or repeated
+        batch_id = str(post.get('post_id') or "")
+        if not batch_id or batch_id in used_ids:
+            batch_id = f"#{i}"
+        used_ids.add(batch_id)
+        pending[key] = (batch_id, title, text, key)
+        waiting[key] = [i]
+    
+    batches = _pack_batches(list(pending.values()), max(1, batch_size), AI_BATCH_TOKEN_BUDGET)
+    workers = min(max_workers, len(batches))
+    if workers <= 1:
+        answered = [_analyze_batch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            answered = list(executor.map(_analyze_batch, batches))
+    
+    for batch, batch_results in zip(batches, answered):
+        for (_, _, _, key), result in zip(batch, batch_results):
+            for i in waiting[key]:
+                results[i] = result
+    return results
+
+
+def is_service_request(title: str, text: str) -> bool:
+    """
+    Determine if a post is a SERVICE REQUEST (someone needs help)
+    vs a SERVICE OFFER (someone offering their services).
+    
+    A view over analyze_post(): the pre-filter catches obvious offers, the
+    rest share one AI call with process_post_with_ai().
+    
+    Returns True if it's a request for service (we want to keep these).
+    Returns False if it's an offer/advertisement (we want to filter these out).
+    """
+    analysis = analyze_post(title, text)
+    if analysis["rejected_by"] == "pre-filter":
+        print(f"    [AI FILTER] Rejected as OFFER (pre-filter)")
+    elif analysis["rejected_by"] == "local":
+        print(f"    [AI FILTER] Rejected as OFFER (local model)")
+    elif analysis["rejected_by"] == "ai":
+        print(f"    [AI FILTER] Rejected as OFFER")
+    return analysis["is_request"]
+
+
+def process_post_with_ai(title: str, text: str, post_id: str) -> Dict[str, any]:
+    """
+    Use AI to classify a post into a category and extract location/features.
+    
+    A view over analyze_post(), so a post already checked with
+    is_service_request() costs no further API call.
+    
+    Args:
+        title: Post title
+        text: Post content
+        post_id: Post ID (for caching/tracking)
+    
+    Returns:
+        Dictionary with: category, secondary_categories, location, ai_features, ai_processed
+    """
+    analysis = analyze_post(title, text, post_id)
+    return {
+        "category": analysis["category"],
+        "secondary_categories": analysis["secondary_categories"],
+        "location": analysis["location"],
+        "ai_features": analysis["ai_features"],
+        "ai_processed": analysis["ai_processed"]
+    }
 
 
 def is_driving_job(title: str, text: str) -> bool:
@@ -331,7 +631,7 @@ def is_driving_job(title: str, text: str) -> bool:
     content = f"Title: {title}\n\nPost content:\n{text[:1500]}"
     
     try:
-        response = client.chat.completions.create(
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
                 {"role": "system", "content": """Determine if this post is a REQUEST for MOVING or TRANSPORT help.
@@ -375,7 +675,7 @@ def is_manual_labor_job(title: str, text: str) -> bool:
     content = f"Title: {title}\n\nPost content:\n{text[:1500]}"
     
     try:
-        response = client.chat.completions.create(
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
                 {"role": "system", "content": """Determine if this post is requesting MANUAL LABOR / PHYSICAL WORK.
@@ -422,11 +722,19 @@ def estimate_transport_job(title: str, text: str, category: str = "Transport / M
       - For transport: worker has a cargo vehicle (varebil)
       - For manual labor: worker is physically fit and available
     
+    Successful estimates are cached by content (result_cache.py).
+    
     Returns:
         Dictionary with: estimated_hours, total_price_nok, item_summary, distance_estimate, reasoning
     """
     is_transport = "transport" in category.lower() or "moving" in category.lower()
     
+    cache = get_result_cache()
+    key = cache_key("estimate", PROMPT_VERSIONS["estimate"], AI_MODEL, title, text, is_transport)
+    cached = cache.get("estimate", key)
+    if cached is not None:
+        return cached
+    
     if is_transport:
         role = "a Norwegian transport/moving worker with a cargo van (varebil)"
         considerations = """Consider:
@@ -468,7 +776,7 @@ Respond in JSON format only:
   "reasoning": "1-2 sentences explaining the estimate"
 }}"""
 
-        response = client.chat.completions.create(
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
                 {"role": "system", "content": f"You are {role}. Give realistic time and price estimates. Always respond with valid JSON only."},
@@ -484,13 +792,15 @@ Respond in JSON format only:
         hours = float(result.get("estimated_hours", 2))
         price = int(result.get("total_price_nok", hours * 400))
         
-        return {
+        estimate = {
             "estimated_hours": hours,
             "total_price_nok": price,
             "item_summary": result.get("item_summary", "jobb"),
             "distance_estimate": result.get("distance_estimate", "N/A"),
             "reasoning": result.get("reasoning", ""),
         }
+        cache.put("estimate", key, estimate)
+        return estimate
     except Exception as e:
         # Fallback: assume 2 hours
         return {
@@ -508,6 +818,7 @@ def generate_transport_message(title: str, text: str, estimate: Dict, category:
     
     The message should feel like a real person texting, not a bot.
     References their specific post, states the price, and asks if interested.
+    Generated messages are cached by content and estimate (result_cache.py).
     
     Args:
         title: Post title
@@ -523,6 +834,12 @@ def generate_transport_message(title: str, text: str, estimate: Dict, category:
     
     is_transport = "transport" in category.lower() or "moving" in category.lower()
     
+    cache = get_result_cache()
+    key = cache_key("message", PROMPT_VERSIONS["message"], AI_MODEL, title, text, is_transport, price, item_summary)
+    cached = cache.get("message", key)
+    if cached is not None:
+        return cached
+    
     extra_context = ""
     if is_transport:
         extra_context = "The sender has a cargo van (varebil) available."
@@ -548,7 +865,7 @@ RULES:
 - Do NOT sound like a bot or a company. Sound like a helpful person.
 - Write ONLY the message text, nothing else."""
 
-        response = client.chat.completions.create(
+        response = _chat_completion(
             model=AI_MODEL,
             messages=[
                 {"role": "system", "content": "You write short casual Norwegian messages. You sound like a real person texting on Facebook, not a company or bot."},
@@ -565,6 +882,7 @@ RULES:
         if message.startswith("'") and message.endswith("'"):
             message = message[1:-1]
         
+        cache.put("message", key, message)
         return message
         
     except Exception as e:
@@ -0,0 +1,254 @@
+"""
+Local pre-classifier: offer vs request and primary category, without an API call.
+
+Posts are turned into hashed word and character n-grams (no vocabulary to
+store) and scored by two linear models: OFFER/REQUEST, and the primary
+category for requests. Both are trained by scripts/train_local_classifier.py
+from posts the AI has already labeled, and saved as one JSON file. Pure
+Python on the CPU; no extra dependencies.
+
+analyze_post() asks this model after the regex pre-filter and the result
+cache: predictions at or above LOCAL_CLASSIFIER_THRESHOLD are used as the
+answer, anything less certain goes to OpenAI as before. Without a trained
+model file the stage is skipped.
+
+LOCAL_CLASSIFIER_SCOPE decides what may skip the AI:
+    offers  only confident offers (they're dropped, nothing else is needed)
+    all     confident requests too, with the local category (no location
+            or features: those stay "Unknown" / empty)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+import re
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+LOCAL_CLASSIFIER_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", str(PROJECT_ROOT / "data" / "local_classifier.json"))
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+LOCAL_CLASSIFIER_SCOPE = os.getenv("LOCAL_CLASSIFIER_SCOPE", "offers").lower()
+
+HASH_BUCKETS = 2 ** 18
+MODEL_VERSION = 1
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _bucket(feature: str) -> int:
+    # crc32, not hash(): str hashes are salted per process
+    return zlib.crc32(feature.encode("utf-8")) % HASH_BUCKETS
+
+
+def extract_features(title: str, text: str) -> dict[int, float]:
+    """
+    Hashed features of a post: words, word pairs and character 4-grams of
+    each word (Norwegian compounds like "flyttehjelp" share "flyt" with
+    "flytte"), log-scaled counts, L2-normalized.
+    """
+    words = _WORD_RE.findall(f"{title} {text}".lower())
+    counts: dict[int, float] = {}
+
+    def add(feature: str) -> None:
+        index = _bucket(feature)
+        counts[index] = counts.get(index, 0.0) + 1.0
+
+    for i, word in enumerate(words):
+        add(f"w:{word}")
+        if i:
+            add(f"b:{words[i - 1]} {word}")
+        padded = f"<{word}>"
+        for j in range(len(padded) - 3):
+            add(f"c:{padded[j:j + 4]}")
+
+    features = {index: 1.0 + math.log(count) for index, count in counts.items()}
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {index: value / norm for index, value in features.items()}
+
+
+class SoftmaxModel:
+    """Multinomial logistic regression over sparse hashed features, trained with SGD."""
+
+    def __init__(self, classes: list[str], weights: Optional[dict[int, list[float]]] = None,
+                 bias: Optional[list[float]] = None):
+        self.classes = list(classes)
+        self.weights = weights or {}
+        self.bias = bias or [0.0] * len(self.classes)
+
+    def probabilities(self, features: dict[int, float]) -> list[float]:
+        scores = list(self.bias)
+        for index, value in features.items():
+            row = self.weights.get(index)
+            if row:
+                for c, weight in enumerate(row):
+                    scores[c] += weight * value
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, features: dict[int, float]) -> tuple[str, float]:
+        """(most likely class, its probability)."""
+        probs = self.probabilities(features)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.classes[best], probs[best]
+
+    def fit(self, samples: list[tuple[dict[int, float], str]], epochs: int = 8,
+            learning_rate: float = 0.5, l2: float = 1e-5, seed: int = 0) -> None:
+        """SGD over (features, label) samples; the learning rate decays per epoch."""
+        k = len(self.classes)
+        targets = [(features, self.classes.index(label)) for features, label in samples]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(targets)
+            lr = learning_rate / (1 + epoch)
+            for features, target in targets:
+                probs = self.probabilities(features)
+                gradients = [p - (1.0 if c == target else 0.0) for c, p in enumerate(probs)]
+                for c in range(k):
+                    self.bias[c] -= lr * gradients[c]
+                for index, value in features.items():
+                    row = self.weights.get(index)
+                    if row is None:
+                        row = self.weights[index] = [0.0] * k
+                    for c in range(k):
+                        row[c] -= lr * (gradients[c] * value + l2 * row[c])
+
+    def to_dict(self) -> dict:
+        return {
+            "classes": self.classes,
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {str(index): [round(w, 5) for w in row] for index, row in self.weights.items()
+                        if any(abs(w) >= 1e-5 for w in row)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SoftmaxModel":
+        return cls(data["classes"], {int(index): row for index, row in data["weights"].items()}, data["bias"])
+
+
+def is_confident(prediction: dict, threshold: float = LOCAL_CLASSIFIER_THRESHOLD,
+                 scope: str = LOCAL_CLASSIFIER_SCOPE) -> bool:
+    """Whether a LocalClassifier.predict() result may replace the AI call."""
+    if prediction["request_confidence"] is None or prediction["request_confidence"] < threshold:
+        return False
+    if not prediction["is_request"]:
+        return True
+    return (scope == "all" and prediction["category_confidence"] is not None
+            and prediction["category_confidence"] >= threshold)
+
+
+class LocalClassifier:
+    """The offer/request model and the category model (either may be missing), plus training metadata."""
+
+    def __init__(self, offer_model: Optional[SoftmaxModel], category_model: Optional[SoftmaxModel],
+                 metadata: Optional[dict] = None):
+        self.offer_model = offer_model
+        self.category_model = category_model
+        self.metadata = metadata or {}
+        self._lock = threading.Lock()
+        self.decided = 0
+        self.passed = 0
+
+    def predict(self, title: str, text: str) -> dict:
+        """
+        Raw prediction: is_request / request_confidence (None without an
+        offer model), category / category_confidence (None without a
+        category model).
+        """
+        features = extract_features(title, text)
+        prediction = {"is_request": None, "request_confidence": None, "category": None, "category_confidence": None}
+        if self.offer_model:
+            label, confidence = self.offer_model.predict(features)
+            prediction["is_request"] = label == "REQUEST"
+            prediction["request_confidence"] = confidence
+        if self.category_model:
+            prediction["category"], prediction["category_confidence"] = self.category_model.predict(features)
+        return prediction
+
+    def confident_prediction(self, title: str, text: str, threshold: float = LOCAL_CLASSIFIER_THRESHOLD,
+                             scope: str = LOCAL_CLASSIFIER_SCOPE) -> Optional[dict]:
+        """
+        The prediction if it may replace the AI call (see LOCAL_CLASSIFIER_SCOPE),
+        else None. Counts decided / passed posts for stats().
+        """
+        prediction = self.predict(title, text)
+        confident = prediction if is_confident(prediction, threshold, scope) else None
+        with self._lock:
+            if confident:
+                self.decided += 1
+            else:
+                self.passed += 1
+        return confident
+
+    def stats(self) -> dict:
+        """Posts decided locally vs passed on to the AI since start."""
+        with self._lock:
+            total = self.decided + self.passed
+            return {"decided": self.decided, "passed": self.passed,
+                    "decided_rate": self.decided / total if total else 0.0}
+
+    def save(self, path: str = LOCAL_CLASSIFIER_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MODEL_VERSION,
+            "hash_buckets": HASH_BUCKETS,
+            "saved_at": datetime.utcnow().isoformat(),
+            "metadata": self.metadata,
+            "offer_model": self.offer_model.to_dict() if self.offer_model else None,
+            "category_model": self.category_model.to_dict() if self.category_model else None,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = LOCAL_CLASSIFIER_PATH) -> Optional["LocalClassifier"]:
+        """The saved classifier, or None if there is no (compatible) model file."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MODEL_VERSION or data.get("hash_buckets") != HASH_BUCKETS:
+                print(f"[LOCAL AI] {path} is from another model version - retrain with scripts/train_local_classifier.py")
+                return None
+            return cls(
+                SoftmaxModel.from_dict(data["offer_model"]) if data.get("offer_model") else None,
+                SoftmaxModel.from_dict(data["category_model"]) if data.get("category_model") else None,
+                data.get("metadata"),
+            )
+        except Exception as e:
+            print(f"[LOCAL AI] Could not load {path}: {str(e)[:50]}")
+            return None
+
+
+_classifier: Optional[LocalClassifier] = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """The trained classifier from LOCAL_CLASSIFIER_PATH (loaded once), or None."""
+    global _classifier, _classifier_loaded
+    with _classifier_lock:
+        if not _classifier_loaded:
+            _classifier = LocalClassifier.load()
+            _classifier_loaded = True
+        return _classifier
+
+
+def set_local_classifier(classifier: Optional[LocalClassifier]) -> None:
+    """Replace the shared classifier (None disables the local stage)."""
+    global _classifier, _classifier_loaded
+    with _classifier_lock:
+        _classifier = classifier
+        _classifier_loaded = True
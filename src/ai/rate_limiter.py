@@ -0,0 +1,144 @@
+"""
+Client-side rate limiting and retries for OpenAI calls.
+
+Posts are analyzed concurrently (analyze_posts), and parallel scrape modes
+run several groups at once, so every request goes through one shared
+limiter: a token bucket for requests per minute and one for tokens per
+minute, sized to the account's tier (OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT).
+Workers block in acquire() when the budget is spent, which is the
+backpressure: a burst of new posts queues up instead of turning into 429s.
+Calls that still hit a 429, a 5xx or a connection error are retried with
+jittered exponential backoff.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+import openai
+
+# gpt-4o-mini, usage tier 1
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# Burst allowance: how many seconds of budget the buckets can hold. OpenAI
+# may enforce limits over shorter windows than a minute, so the buckets hold
+# half a minute's budget rather than the full one (~35 post analyses at
+# tier 1, enough for one group's new posts at once).
+BURST_SECONDS = 30
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Refills at `rate` units per second up to `capacity`; acquire() blocks until enough are available."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._available = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Take `amount` units (capped at capacity), waiting if needed. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= amount:
+                    self._available -= amount
+                    return waited
+                delay = (amount - self._available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets shared by every OpenAI call."""
+
+    def __init__(self, rpm: int = OPENAI_RPM_LIMIT, tpm: int = OPENAI_TPM_LIMIT):
+        self.requests = TokenBucket(rpm / 60, max(1, rpm / 60 * BURST_SECONDS))
+        self.tokens = TokenBucket(tpm / 60, max(1, tpm / 60 * BURST_SECONDS))
+        self._stats_lock = threading.Lock()
+        self.waited_seconds = 0.0
+        self.retries = 0
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request and `tokens` tokens fit in the budget."""
+        waited = self.requests.acquire(1) + self.tokens.acquire(tokens)
+        if waited:
+            with self._stats_lock:
+                self.waited_seconds += waited
+
+    def record_retry(self) -> None:
+        with self._stats_lock:
+            self.retries += 1
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of a 429/5xx response, if the API sent one."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def call_with_retries(call: Callable[[], T], limiter: RateLimiter, tokens: int,
+                      max_retries: int = OPENAI_MAX_RETRIES) -> T:
+    """
+    Run one OpenAI call under the rate limiter, retrying 429s, 5xx responses
+    and connection errors with jittered backoff (or the server's Retry-After
+    when it's longer). Other errors, and the last retryable one, are raised.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire(tokens)
+        try:
+            return call()
+        except Exception as e:
+            if not _is_retryable(e) or attempt >= max_retries:
+                raise
+            delay = max(backoff_delay(attempt), _retry_after(e) or 0)
+            limiter.record_retry()
+            attempt += 1
+            time.sleep(delay)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The shared limiter (created on first use)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,203 @@
+"""
+Content-addressed cache of AI results (SQLite file with an in-memory LRU in front).
+
+Results are keyed on what the answer depends on: the normalized post text,
+the prompt version, the model and any extra inputs (category, price, ...),
+never on the post ID. A job reposted later, or cross-posted to several
+groups under new IDs, is answered from the cache instead of another API call.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+# The normalization behind posts.text_hash, so cache keys and dedup agree
+from ..database.post_rows import _normalize_text
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", str(PROJECT_ROOT / "data" / "ai_cache.db"))
+AI_CACHE_MEMORY_SIZE = int(os.getenv("AI_CACHE_MEMORY_SIZE", "2000"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "100000"))
+
+
+def cache_key(kind: str, prompt_version: int, model: str, title: str, text: str, *params: Any) -> str:
+    """
+    Content address of one AI call: sha256 over the result kind, prompt
+    version, model, normalized title and text, and any extra inputs.
+    """
+    payload = [kind, prompt_version, model, _normalize_text(title), _normalize_text(text), list(params)]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class AIResultCache:
+    """
+    Two-tier cache of JSON-serializable AI results.
+
+    get() checks a bounded in-memory LRU first, then the SQLite file (and
+    promotes disk hits into memory); put() writes through to both. The file
+    keeps at most max_entries results, evicting the least recently used.
+    Thread-safe: parallel scrape mode shares one instance across worker threads.
+    """
+
+    def __init__(self, path: str = AI_CACHE_PATH, memory_size: int = AI_CACHE_MEMORY_SIZE,
+                 max_entries: int = AI_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[str, int]] = {}
+        self.evictions = 0
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_results (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                source TEXT
+            )
+        """)
+        # Files created before the source column (training input for the local classifier)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ai_results)")}
+        if "source" not in columns:
+            self._conn.execute("ALTER TABLE ai_results ADD COLUMN source TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_results_last_used ON ai_results (last_used_at)")
+        self._disk_size = self._conn.execute("SELECT count(*) FROM ai_results").fetchone()[0]
+
+    def _count(self, kind: str, outcome: str) -> None:
+        counters = self._counters.setdefault(kind, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """The cached result, or None. Counts one memory hit, disk hit or miss for `kind`."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._count(kind, "memory_hits")
+                return self._memory[key]
+            row = self._conn.execute("SELECT value FROM ai_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(kind, "misses")
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE ai_results SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self._count(kind, "disk_hits")
+            return value
+
+    def put(self, kind: str, key: str, value: Any, source: Optional[dict] = None) -> None:
+        """
+        Store a result in memory and on disk, evicting the least recently used
+        beyond max_entries. `source` (e.g. the post's title and text) is kept
+        on disk only, as a labeled example for labeled().
+        """
+        now = time.time()
+        value_json = json.dumps(value, ensure_ascii=False)
+        source_json = json.dumps(source, ensure_ascii=False) if source is not None else None
+        with self._lock:
+            self._remember(key, value)
+            with self._conn:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO ai_results (key, kind, value, created_at, last_used_at, source) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, value_json, now, now, source_json)
+                ).rowcount
+                if not inserted:
+                    self._conn.execute(
+                        "UPDATE ai_results SET value = ?, last_used_at = ?, source = COALESCE(?, source) "
+                        "WHERE key = ?",
+                        (value_json, now, source_json, key)
+                    )
+                self._disk_size += inserted
+                # Evict in chunks (10% of the limit) so most puts don't pay for a delete
+                if self._disk_size > self.max_entries:
+                    excess = self._disk_size - self.max_entries + self.max_entries // 10
+                    evicted = self._conn.execute(
+                        "DELETE FROM ai_results WHERE key IN "
+                        "(SELECT key FROM ai_results ORDER BY last_used_at LIMIT ?)",
+                        (excess,)
+                    ).rowcount
+                    self._disk_size -= evicted
+                    self.evictions += evicted
+
+    def labeled(self, kind: str) -> list[tuple[dict, Any]]:
+        """(source, result) pairs of `kind` stored with a source, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, value FROM ai_results WHERE kind = ? AND source IS NOT NULL ORDER BY created_at",
+                (kind,)
+            ).fetchall()
+        return [(json.loads(source), json.loads(value)) for source, value in rows]
+
+    def clear(self) -> int:
+        """Drop every cached result (memory and disk). Returns the number dropped from disk."""
+        with self._lock:
+            self._memory.clear()
+            with self._conn:
+                dropped = self._conn.execute("DELETE FROM ai_results").rowcount
+            self._disk_size = 0
+            return dropped
+
+    def stats(self) -> dict:
+        """Sizes, evictions and hit/miss counters (overall and per result kind) for logging."""
+        with self._lock:
+            by_kind = {}
+            for kind, counters in sorted(self._counters.items()):
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                total = hits + counters["misses"]
+                by_kind[kind] = {**counters, "hit_rate": hits / total if total else 0.0}
+            hits = sum(c["memory_hits"] + c["disk_hits"] for c in self._counters.values())
+            misses = sum(c["misses"] for c in self._counters.values())
+            return {
+                "memory_size": len(self._memory),
+                "disk_size": self._disk_size,
+                "evictions": self.evictions,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "by_kind": by_kind,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[AIResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> AIResultCache:
+    """The shared cache (opened on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AIResultCache()
+        return _cache
+
+
+def set_result_cache(cache: AIResultCache) -> None:
+    """Replace the shared cache (e.g. with AIResultCache(":memory:") in benchmarks)."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
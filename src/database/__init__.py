@@ -1,31 +1,96 @@
-"""Database module - Supabase database operations."""
-
-from .supabase_db import (
-    save_post,
-    save_posts,
-    get_posts,
-    get_post_count,
-    post_exists,
-    is_duplicate_post,
-    find_duplicate_by_text,
-    get_existing_post,
-    mark_as_notified,
-    get_stats,
-    was_auto_message_sent,
-    mark_auto_message_sent,
-)
+"""
+Database module - post storage for the scraper.
+
+The backend is chosen with the STORAGE_BACKEND environment variable:
+  * supabase (default) - every call goes to Supabase (supabase_db.py)
+  * sqlite             - a local SQLite file with write-behind sync to
+                         Supabase (sqlite_db.py); works offline
+
+Both modules implement the same functions, re-exported below.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").strip().lower()
+
+if STORAGE_BACKEND == "sqlite":
+    from .sqlite_db import (
+        save_post,
+        save_posts,
+        get_posts,
+        get_post_count,
+        post_exists,
+        is_duplicate_post,
+        find_duplicates,
+        find_duplicate_by_text,
+        get_existing_post,
+        mark_as_notified,
+        get_stats,
+        was_auto_message_sent,
+        mark_auto_message_sent,
+        archive_old_posts,
+        size_connection_pool,
+        warm_known_post_cache,
+        clear_known_post_cache,
+        get_cache_stats,
+        start_background_sync,
+        stop_background_sync,
+    )
+elif STORAGE_BACKEND == "supabase":
+    from .supabase_db import (
+        save_post,
+        save_posts,
+        get_posts,
+        get_post_count,
+        post_exists,
+        is_duplicate_post,
+        find_duplicates,
+        find_duplicate_by_text,
+        get_existing_post,
+        mark_as_notified,
+        get_stats,
+        was_auto_message_sent,
+        mark_auto_message_sent,
+        archive_old_posts,
+        size_connection_pool,
+        warm_known_post_cache,
+        clear_known_post_cache,
+        get_cache_stats,
+        start_background_sync,
+        stop_background_sync,
+    )
+else:
+    raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'supabase' or 'sqlite')")
+
+from .post_rows import compute_text_hash
+from .supabase_client import get_latency_stats
 
 __all__ = [
+    'STORAGE_BACKEND',
     'save_post',
     'save_posts',
     'get_posts',
     'get_post_count',
     'post_exists',
     'is_duplicate_post',
+    'find_duplicates',
     'find_duplicate_by_text',
+    'compute_text_hash',
     'get_existing_post',
     'mark_as_notified',
     'get_stats',
     'was_auto_message_sent',
     'mark_auto_message_sent',
+    'archive_old_posts',
+    'size_connection_pool',
+    'warm_known_post_cache',
+    'clear_known_post_cache',
+    'get_cache_stats',
+    'start_background_sync',
+    'stop_background_sync',
+    'get_latency_stats',
 ]
@@ -0,0 +1,98 @@
+"""In-process cache of posts already known to be in the database."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class KnownPostCache:
+    """
+    Bounded, TTL-evicting set of keys (post IDs / text hashes).
+
+    Only positive answers are cached ("this post is in the DB"), so a miss
+    always falls through to Supabase and a stale entry can never hide a new post.
+    Thread-safe: parallel scrape mode shares one instance across worker threads.
+    """
+
+    def __init__(self, max_size: int = 50000, ttl_seconds: float = 24 * 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, *keys: str) -> None:
+        """Remember keys as known (empty keys are ignored)."""
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                if not key:
+                    continue
+                self._entries[key] = expires_at
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def lookup(self, *keys: str) -> bool:
+        """
+        Return True if any of the keys is known and not expired.
+        Counts one hit or one miss per call.
+        """
+        now = time.monotonic()
+        with self._lock:
+            found = False
+            for key in keys:
+                expires_at = self._entries.get(key) if key else None
+                if expires_at is None:
+                    continue
+                if expires_at < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found = True
+                break
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found
+
+    def clear(self) -> None:
+        """Forget all entries (e.g. after the posts table was cleared)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Size and hit/miss counters for logging."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def id_key(post_id: str) -> str:
+    """Cache key for a post ID ("" for missing/unknown IDs)."""
+    return f"id:{post_id}" if post_id and post_id != "unknown" else ""
+
+
+def hash_key(text_hash: str) -> str:
+    """Cache key for a normalized-text hash ("" if no hash)."""
+    return f"hash:{text_hash}" if text_hash else ""
+
+
+_MAX_SIZE = int(os.getenv("KNOWN_POST_CACHE_MAX", "50000"))
+_TTL_SECONDS = float(os.getenv("KNOWN_POST_CACHE_TTL_HOURS", "24")) * 3600
+
+# Posts saved in the database (by ID and by text hash)
+known_posts = KnownPostCache(_MAX_SIZE, _TTL_SECONDS)
+
+# Posts that already received an auto-message (by ID and by text hash)
+messaged_posts = KnownPostCache(_MAX_SIZE, _TTL_SECONDS)
@@ -0,0 +1,202 @@
+"""
+Write-behind for database writes: the persistent outbox queue (SQLite file)
+and the background flusher that pushes pending writes to Supabase.
+
+Both storage backends push through a BackgroundFlusher, so they share one
+retry and shutdown policy: supabase_db drains the outbox, sqlite_db the
+sync flags on its local rows.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", str(PROJECT_ROOT / "data" / "outbox.db"))
+
+BASE_BACKOFF_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 600.0
+LINGER_SECONDS = 1.0  # After a wake-up, wait this long so writes from the same cycle share a batch
+
+
+def backoff_delay(attempts: int, base: float = BASE_BACKOFF_SECONDS, maximum: float = MAX_BACKOFF_SECONDS) -> float:
+    """Jittered exponential backoff before retry number `attempts` (1, 2, ...)."""
+    delay = min(base * 2 ** (attempts - 1), maximum)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class OutboxEntry(NamedTuple):
+    id: int
+    kind: str
+    payload: Any
+    attempts: int
+
+
+class Outbox:
+    """
+    Append-only queue of pending writes that survives restarts.
+
+    An entry is deleted only after ack() (i.e. after the write succeeded), so
+    delivery is at-least-once; the writes queued here must be idempotent.
+    Failed entries are retried with jittered exponential backoff and never dropped.
+    Thread-safe: the scrape thread enqueues while the flusher thread drains.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH, base_backoff: float = BASE_BACKOFF_SECONDS,
+                 max_backoff: float = MAX_BACKOFF_SECONDS):
+        self.path = path
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+
+    def enqueue(self, kind: str, payload: Any) -> None:
+        """Persist one write (payload must be JSON-serializable)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO outbox (kind, payload) VALUES (?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False, default=str))
+            )
+
+    def due(self, limit: int = 500) -> list[OutboxEntry]:
+        """Oldest entries whose backoff has expired, in insertion order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+        return [OutboxEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def ack(self, entries: list[OutboxEntry]) -> None:
+        """Remove entries whose write succeeded."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(e.id,) for e in entries])
+
+    def retry_later(self, entries: list[OutboxEntry], error: str) -> None:
+        """Schedule failed entries for another attempt after a jittered exponential backoff."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                [
+                    (now + backoff_delay(e.attempts + 1, self.base_backoff, self.max_backoff), error[:500], e.id)
+                    for e in entries
+                ]
+            )
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM outbox").fetchone()[0]
+
+    def clear(self) -> int:
+        """Drop every queued entry. Returns the count."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM outbox").rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_outbox: Optional[Outbox] = None
+
+
+def get_outbox() -> Outbox:
+    """The process-wide outbox, opened on first use."""
+    global _outbox
+    if _outbox is None:
+        _outbox = Outbox()
+    return _outbox
+
+
+class BackgroundFlusher:
+    """
+    Daemon thread that calls flush() until it reports nothing left to push.
+
+    It runs when woken by a write (wake()) and at least every
+    interval_seconds, lingering LINGER_SECONDS first so writes from the same
+    cycle share a batch. flush() returns the number of writes pushed and may
+    raise: the round is then retried after backoff_delay(), and wake-ups are
+    ignored until then. stop() drains what is left, bounded by its timeout.
+    """
+
+    def __init__(self, flush: Callable[[], int], name: str):
+        self.flush = flush
+        self.name = name
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval_seconds: float) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, args=(interval_seconds,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Push soon (after the linger) instead of at the next interval."""
+        self._wake.set()
+
+    def _drain(self, deadline: Optional[float] = None) -> None:
+        while self.flush():
+            if self._stop.is_set() and deadline is None:
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+    def _run(self, interval_seconds: float) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            if failures:
+                if self._stop.wait(backoff_delay(failures)):
+                    return
+            else:
+                self._wake.wait(interval_seconds)
+                self._wake.clear()
+                if self._stop.wait(LINGER_SECONDS):
+                    return
+            try:
+                self._drain()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"    [DB] {self.name} failed (attempt {failures}, will retry): {str(e)[:80]}")
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stop the thread, then push what is still pending until `timeout` seconds have passed."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            self._drain(deadline)
+        except Exception as e:
+            print(f"    [DB] Final {self.name} failed: {str(e)[:80]}")
@@ -0,0 +1,104 @@
+"""Backend-independent helpers for turning scraped posts into database rows."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import TypedDict
+
+
+# Type definition for Post
+class Post(TypedDict):
+    post_id: str
+    title: str
+    text: str
+    url: str
+    timestamp: str
+    group_name: str
+    group_url: str
+
+
+# Column projections for lookups: existence checks only need the ID,
+# save_post() also compares categories
+EXISTS_COLUMNS = "post_id"
+DEDUP_COLUMNS = "post_id, category"
+
+
+def _normalize_text(text: str) -> str:
+    """Normalize post text for comparison: strip whitespace, collapse spaces."""
+    if not text:
+        return ""
+    return re.sub(r'\s+', ' ', text.strip())
+
+
+def normalize_group_name(name: str) -> str:
+    """Strip '(1) ', '(2) ', etc. prefixes from Facebook tab group names."""
+    return re.sub(r'^\(\d+\)\s*', '', name or "")
+
+
+def compute_text_hash(text: str) -> str:
+    """
+    Hash of the normalized post text (sha256 hex), stored in posts.text_hash.
+    Returns "" for empty text.
+    """
+    normalized = _normalize_text(text)
+    if not normalized:
+        return ""
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def dedup_text_hash(text: str) -> str:
+    """Text hash used for duplicate detection ("" for texts too short to compare)."""
+    return compute_text_hash(text) if text and len(text.strip()) >= 20 else ""
+
+
+def _build_insert_data(post: Post) -> dict:
+    """Build the posts row for a scraped post (shared by save_post and save_posts)."""
+    # Parse the Facebook timestamp to get actual posted time (naive UTC)
+    posted_at = None
+    try:
+        from src.scraper.timestamp_parser import parse_posted_at
+        parsed_time = parse_posted_at(post["timestamp"])
+        if parsed_time:
+            posted_at = parsed_time.isoformat()
+    except Exception:
+        pass
+
+    # Use category and location from post if already set (by main.py)
+    category = post.get("category", "General")
+    location = post.get("location")
+    secondary_categories = post.get("secondary_categories", [])
+
+    # Build insert data with basic columns
+    insert_data = {
+        "post_id": post["post_id"],
+        "title": post["title"],
+        "text": post["text"],
+        "url": post["url"],
+        "timestamp": post["timestamp"],
+        "group_name": post["group_name"],
+        "group_name_normalized": normalize_group_name(post["group_name"]),
+        "group_url": post["group_url"],
+        "category": category,
+        "notified": False
+    }
+
+    # Add normalized-text hash for duplicate detection
+    text_hash = compute_text_hash(post["text"])
+    if text_hash:
+        insert_data["text_hash"] = text_hash
+
+    # Add posted_at if we successfully parsed the timestamp
+    if posted_at:
+        insert_data["posted_at"] = posted_at
+
+    # Add location if available
+    if location:
+        insert_data["location"] = location
+
+    # Add secondary categories as JSON string
+    if secondary_categories:
+        insert_data["secondary_categories"] = json.dumps(secondary_categories)
+
+    return insert_data
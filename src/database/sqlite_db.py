@@ -0,0 +1,676 @@
+"""
+Local SQLite storage backend (STORAGE_BACKEND=sqlite).
+
+Same functions as supabase_db, answered from a local database file, so dedup
+checks and saves never wait on the network and the scraper also runs offline.
+
+When Supabase is configured:
+  * warm_known_post_cache() mirrors recently scraped Supabase rows into the
+    local file, so a fresh machine doesn't treat old posts as new
+  * a background thread (start_background_sync) pushes local writes to
+    Supabase in batches (write-behind); unsynced rows survive restarts
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict
+
+from .known_post_cache import known_posts, messaged_posts
+from .outbox import BackgroundFlusher
+from .post_rows import (
+    EXISTS_COLUMNS,
+    Post,
+    _build_insert_data,
+    dedup_text_hash,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", str(PROJECT_ROOT / "data" / "posts.db"))
+SYNC_BATCH_SIZE = int(os.getenv("SQLITE_SYNC_BATCH_SIZE", "200"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    text TEXT,
+    url TEXT,
+    timestamp TEXT,
+    group_name TEXT,
+    group_name_normalized TEXT,
+    group_url TEXT,
+    category TEXT DEFAULT 'General',
+    location TEXT,
+    secondary_categories TEXT,
+    text_hash TEXT,
+    posted_at TEXT,
+    scraped_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    notified INTEGER NOT NULL DEFAULT 0,
+    auto_message_sent INTEGER NOT NULL DEFAULT 0,
+    auto_message_text TEXT,
+    auto_message_price_nok INTEGER,
+    auto_message_hours REAL,
+    auto_message_item_summary TEXT,
+    auto_message_sent_at TEXT,
+    -- Write-behind state: what still has to be pushed to Supabase.
+    -- sync_seq changes on every local write so a push never clears a newer change.
+    sync_upsert INTEGER NOT NULL DEFAULT 1,
+    sync_notified INTEGER NOT NULL DEFAULT 0,
+    sync_auto_message INTEGER NOT NULL DEFAULT 0,
+    sync_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_posts_text_hash ON posts (text_hash);
+CREATE INDEX IF NOT EXISTS idx_posts_posted_at ON posts (posted_at DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_scraped_at ON posts (scraped_at);
+-- Same key as idx_posts_pending_notification in migrations/add_pending_indexes.sql
+-- (renamed: the first version here was keyed on scraped_at)
+DROP INDEX IF EXISTS idx_posts_pending_notification;
+CREATE INDEX IF NOT EXISTS idx_posts_pending_posted_at ON posts (posted_at DESC, id DESC)
+    WHERE notified = 0;
+CREATE INDEX IF NOT EXISTS idx_posts_messaged_text_hash ON posts (text_hash)
+    WHERE auto_message_sent = 1;
+CREATE INDEX IF NOT EXISTS idx_posts_sync_pending ON posts (id)
+    WHERE sync_upsert = 1 OR sync_notified = 1 OR sync_auto_message = 1;
+-- Posts moved out by archive_old_posts(): the whole row as JSON
+CREATE TABLE IF NOT EXISTS posts_archive (
+    post_id TEXT PRIMARY KEY,
+    scraped_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_archive_scraped_at ON posts_archive (scraped_at);
+"""
+
+SYNC_COLUMNS = ("sync_upsert", "sync_notified", "sync_auto_message", "sync_seq")
+BOOLEAN_COLUMNS = ("notified", "auto_message_sent")
+
+# Fields save_posts_batch() reads from each row (migrations/add_save_posts_batch_function.sql)
+BATCH_RPC_FIELDS = (
+    "post_id", "title", "text", "url", "timestamp", "group_name", "group_url",
+    "category", "location", "secondary_categories", "posted_at", "text_hash",
+)
+AUTO_MESSAGE_FIELDS = (
+    "auto_message_sent", "auto_message_text", "auto_message_price_nok",
+    "auto_message_hours", "auto_message_item_summary", "auto_message_sent_at",
+)
+
+_lock = threading.RLock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _db() -> sqlite3.Connection:
+    """The shared connection (WAL mode), opened and migrated on first use."""
+    global _conn
+    with _lock:
+        if _conn is None:
+            Path(SQLITE_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(SQLITE_DB_PATH, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _conn = conn
+        return _conn
+
+
+def _query(sql: str, params: tuple | list = ()) -> list[dict]:
+    with _lock:
+        return [_to_post(row) for row in _db().execute(sql, params).fetchall()]
+
+
+def _execute(sql: str, params: tuple | list = ()) -> int:
+    """Run one write statement in its own transaction; returns the affected row count."""
+    with _lock:
+        conn = _db()
+        with conn:
+            return conn.execute(sql, params).rowcount
+
+
+def _to_post(row: sqlite3.Row) -> dict:
+    post = dict(row)
+    for column in BOOLEAN_COLUMNS:
+        if column in post:
+            post[column] = bool(post[column])
+    return post
+
+
+def _placeholders(values: list) -> str:
+    return ",".join("?" * len(values))
+
+
+def _chunks(values: list, size: int = 500) -> list[list]:
+    """Split values to stay below SQLite's bound-parameter limit."""
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def get_existing_post(post_id: str, columns: str = "*") -> Optional[Dict]:
+    """
+    Get existing post data from the local database.
+    Returns post data (only `columns`) if exists, None otherwise.
+    """
+    if post_id == "unknown":
+        return None
+    rows = _query(f"SELECT {columns} FROM posts WHERE post_id = ?", (post_id,))
+    return rows[0] if rows else None
+
+
+def post_exists(post_id: str) -> bool:
+    """Check if a post already exists in the database (by ID only)."""
+    return get_existing_post(post_id, EXISTS_COLUMNS) is not None
+
+
+def find_duplicate_by_text(text: str, columns: str = "*") -> Optional[Dict]:
+    """
+    Find an existing post with the same (normalized) text content.
+    Returns the matching post dict (only `columns`) if found, None otherwise.
+    """
+    text_hash = dedup_text_hash(text)
+    if not text_hash:
+        return None
+    rows = _query(f"SELECT {columns} FROM posts WHERE text_hash = ? LIMIT 1", (text_hash,))
+    return rows[0] if rows else None
+
+
+def is_duplicate_post(post_id: str, text: str = "") -> bool:
+    """
+    Check if a post is a duplicate by ID, then by normalized text.
+    Returns True if the post already exists (duplicate).
+    """
+    if post_id and post_id != "unknown" and post_exists(post_id):
+        return True
+    duplicate = find_duplicate_by_text(text, EXISTS_COLUMNS)
+    if duplicate:
+        print(f"    [DEDUP] Text match found: new ID '{post_id}' matches existing '{duplicate.get('post_id', '?')}'")
+        return True
+    return False
+
+
+def find_duplicates(posts: list[Post]) -> set[str]:
+    """
+    Bulk version of is_duplicate_post() for a whole scraped batch.
+    Returns the set of post_ids from `posts` that already exist in the database.
+    """
+    duplicates: set[str] = set()
+    if not posts:
+        return duplicates
+
+    ids = list({p.get("post_id") for p in posts if p.get("post_id") and p.get("post_id") != "unknown"})
+    for chunk in _chunks(ids):
+        rows = _query(f"SELECT post_id FROM posts WHERE post_id IN ({_placeholders(chunk)})", chunk)
+        duplicates.update(row["post_id"] for row in rows)
+
+    by_hash: dict[str, list[str]] = {}
+    for post in posts:
+        text_hash = dedup_text_hash(post.get("text", ""))
+        if text_hash and post.get("post_id") not in duplicates:
+            by_hash.setdefault(text_hash, []).append(post.get("post_id"))
+
+    for chunk in _chunks(list(by_hash)):
+        rows = _query(f"SELECT post_id, text_hash FROM posts WHERE text_hash IN ({_placeholders(chunk)})", chunk)
+        for row in rows:
+            for post_id in by_hash.pop(row["text_hash"], []):
+                print(f"    [DEDUP] Text match found: new ID '{post_id}' matches existing '{row['post_id']}'")
+                duplicates.add(post_id)
+
+    return duplicates
+
+
+def _is_better_category(new_cat: Optional[str], old_cat: Optional[str]) -> bool:
+    """Same rule as save_post() in supabase_db: non-generic and different, or filling a missing one."""
+    if not new_cat:
+        return False
+    return (new_cat not in ("General", "Other") and new_cat != old_cat) or not old_cat
+
+
+def _insert_row(conn: sqlite3.Connection, row: dict) -> None:
+    columns = list(row)
+    conn.execute(
+        f"INSERT INTO posts ({', '.join(columns)}) VALUES ({_placeholders(columns)})",
+        [row[c] for c in columns]
+    )
+
+
+def _update_category(conn: sqlite3.Connection, post_id: str, post: Post) -> None:
+    update: dict = {"category": post.get("category")}
+    if post.get("location"):
+        update["location"] = post["location"]
+    if post.get("secondary_categories"):
+        update["secondary_categories"] = json.dumps(post["secondary_categories"])
+    assignments = ", ".join(f"{column} = ?" for column in update)
+    conn.execute(
+        f"UPDATE posts SET {assignments}, sync_upsert = 1, sync_seq = sync_seq + 1 WHERE post_id = ?",
+        [*update.values(), post_id]
+    )
+
+
+def _save_in_transaction(conn: sqlite3.Connection, post: Post) -> bool:
+    """save_post() body; the caller holds the lock and the transaction."""
+    existing = conn.execute("SELECT post_id, category FROM posts WHERE post_id = ?", (post["post_id"],)).fetchone()
+    if existing:
+        if _is_better_category(post.get("category"), existing["category"]):
+            _update_category(conn, post["post_id"], post)
+        return False
+
+    text_hash = dedup_text_hash(post.get("text", ""))
+    if text_hash:
+        text_dup = conn.execute(
+            "SELECT post_id, category FROM posts WHERE text_hash = ? LIMIT 1", (text_hash,)
+        ).fetchone()
+        if text_dup:
+            print(f"    [DEDUP] save_post: text match — new '{post['post_id']}' ≈ existing '{text_dup['post_id']}', skipping")
+            new_cat = post.get("category")
+            if new_cat and new_cat not in ("General", "Other") and new_cat != text_dup["category"]:
+                _update_category(conn, text_dup["post_id"], post)
+            return False
+
+    _insert_row(conn, _build_insert_data(post))
+    return True
+
+
+def save_post(post: Post, use_ai: bool = False) -> bool:
+    """
+    Save a post to the local database (pushed to Supabase by the background sync).
+
+    Returns:
+        True if the post was newly added, False if it already existed.
+    """
+    try:
+        with _lock:
+            conn = _db()
+            with conn:
+                return _save_in_transaction(conn, post)
+    except Exception as e:
+        print(f"Error saving post locally: {e}")
+        return False
+
+
+def save_posts(posts: list[Post]) -> tuple[int, int, int]:
+    """
+    Save multiple posts in one local transaction.
+
+    Returns (new_count, skipped_count, queued_count); queued_count is always
+    0 (the local file is written directly, see supabase_db.save_posts).
+    """
+    if not posts:
+        return 0, 0, 0
+    try:
+        with _lock:
+            conn = _db()
+            with conn:
+                new_count = sum(1 for post in posts if _save_in_transaction(conn, post))
+        return new_count, len(posts) - new_count, 0
+    except Exception as e:
+        print(f"Error saving posts locally: {e}")
+        return 0, len(posts), 0
+
+
+def _filter_clause(group_url: Optional[str], search: Optional[str], only_new: bool) -> tuple[str, list]:
+    clauses, params = [], []
+    if group_url:
+        clauses.append("group_url = ?")
+        params.append(group_url)
+    if search:
+        clauses.append("(title LIKE ? OR text LIKE ?)")
+        params += [f"%{search}%", f"%{search}%"]
+    if only_new:
+        clauses.append("notified = 0")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def get_posts(
+    limit: int = 100,
+    offset: int = 0,
+    group_url: Optional[str] = None,
+    search: Optional[str] = None,
+    only_new: bool = False,
+    columns: str = "*"
+) -> list[dict]:
+    """Retrieve posts, most recently scraped first (see supabase_db.get_posts)."""
+    try:
+        where, params = _filter_clause(group_url, search, only_new)
+        return _query(
+            f"SELECT {columns} FROM posts{where} ORDER BY scraped_at DESC, id DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset]
+        )
+    except Exception as e:
+        print(f"Error getting posts: {e}")
+        return []
+
+
+def get_post_count(
+    group_url: Optional[str] = None,
+    search: Optional[str] = None,
+    only_new: bool = False
+) -> int:
+    """Get total count of posts matching the filters."""
+    try:
+        where, params = _filter_clause(group_url, search, only_new)
+        with _lock:
+            return _db().execute(f"SELECT count(*) FROM posts{where}", params).fetchone()[0]
+    except Exception as e:
+        print(f"Error getting post count: {e}")
+        return 0
+
+
+def mark_as_notified(post_ids: list[str]) -> None:
+    """Mark posts as notified (email has been sent)."""
+    if not post_ids:
+        return
+    try:
+        for chunk in _chunks(list(post_ids)):
+            _execute(
+                f"UPDATE posts SET notified = 1, sync_notified = 1, sync_seq = sync_seq + 1 "
+                f"WHERE post_id IN ({_placeholders(chunk)})",
+                chunk
+            )
+    except Exception as e:
+        print(f"Error marking posts as notified: {e}")
+
+
+def was_auto_message_sent(post_id: str, text: str = "") -> bool:
+    """
+    Check if an auto-message has already been sent for this post
+    (by post_id, then by text content).
+    """
+    if post_id and post_id != "unknown":
+        existing = get_existing_post(post_id, "post_id, auto_message_sent")
+        if existing and existing.get("auto_message_sent"):
+            return True
+    duplicate = find_duplicate_by_text(text, "post_id, auto_message_sent")
+    if duplicate and duplicate.get("auto_message_sent"):
+        print(f"    [AUTO-MSG] Already messaged duplicate: '{duplicate.get('post_id', '?')}'")
+        return True
+    return False
+
+
+def mark_auto_message_sent(
+    post_id: str,
+    message_text: str,
+    price_nok: int,
+    hours: float,
+    item_summary: str = ""
+) -> bool:
+    """
+    Record that an auto-message was sent for a post.
+    Returns True if updated successfully.
+    """
+    try:
+        _execute(
+            "UPDATE posts SET auto_message_sent = 1, auto_message_text = ?, auto_message_price_nok = ?, "
+            "auto_message_hours = ?, auto_message_item_summary = ?, auto_message_sent_at = ?, "
+            "sync_auto_message = 1, sync_seq = sync_seq + 1 WHERE post_id = ?",
+            (message_text, price_nok, hours, item_summary, datetime.utcnow().isoformat(), post_id)
+        )
+        return True
+    except Exception as e:
+        print(f"    [AUTO-MSG] Error saving message record: {str(e)[:60]}")
+        return False
+
+
+def get_stats(days: int = 30) -> dict:
+    """
+    Get database statistics from the local file.
+
+    Returns:
+        Dict with total, new, by_group, by_category and by_day (last `days` days with posts)
+    """
+    try:
+        with _lock:
+            conn = _db()
+            total, new = conn.execute("SELECT count(*), coalesce(sum(notified = 0), 0) FROM posts").fetchone()
+            by_group = conn.execute(
+                "SELECT coalesce(group_name_normalized, 'Unknown') AS g, count(*) AS n FROM posts "
+                "GROUP BY g ORDER BY n DESC"
+            ).fetchall()
+            by_category = conn.execute(
+                "SELECT coalesce(nullif(category, ''), 'General') AS c, count(*) AS n FROM posts "
+                "GROUP BY c ORDER BY n DESC"
+            ).fetchall()
+            by_day = conn.execute(
+                "SELECT substr(coalesce(posted_at, scraped_at), 1, 10) AS d, count(*) AS n FROM posts "
+                "GROUP BY d ORDER BY d DESC LIMIT ?", (days,)
+            ).fetchall()
+        return {
+            "total": total,
+            "new": new,
+            "by_group": [{"group": g, "count": n} for g, n in by_group],
+            "by_category": [{"category": c, "count": n} for c, n in by_category],
+            "by_day": [{"day": d, "count": n} for d, n in by_day],
+        }
+    except Exception as e:
+        print(f"Error getting stats: {e}")
+        return {"total": 0, "new": 0, "by_group": [], "by_category": [], "by_day": []}
+
+
+def archive_old_posts(older_than_days: int, batch_size: int = 5000) -> int:
+    """
+    Move posts scraped more than `older_than_days` days ago from posts into the
+    local posts_archive table, one batch per transaction. Rows with changes not
+    yet pushed to Supabase stay until they are synced.
+
+    Archived posts no longer count for dedup, stats or the dashboard, so
+    keep `older_than_days` well above MAX_POST_AGE_HOURS.
+
+    Returns the number of posts moved.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+    moved = 0
+    try:
+        while True:
+            with _lock:
+                conn = _db()
+                with conn:
+                    rows = conn.execute(
+                        "SELECT * FROM posts WHERE scraped_at < ? "
+                        "AND sync_upsert = 0 AND sync_notified = 0 AND sync_auto_message = 0 "
+                        "ORDER BY scraped_at LIMIT ?",
+                        (cutoff, batch_size)
+                    ).fetchall()
+                    archived = []
+                    for row in rows:
+                        data = {k: v for k, v in _to_post(row).items() if k not in SYNC_COLUMNS}
+                        archived.append((row["post_id"], row["scraped_at"], json.dumps(data)))
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO posts_archive (post_id, scraped_at, data) VALUES (?, ?, ?)",
+                        archived
+                    )
+                    conn.executemany("DELETE FROM posts WHERE post_id = ?", [(a[0],) for a in archived])
+            moved += len(rows)
+            if len(rows) < batch_size:
+                break
+    except Exception as e:
+        print(f"Error archiving old posts: {e}")
+    return moved
+
+
+def clear_local_posts() -> int:
+    """Delete every post from the local file (unsynced changes included). Returns the count."""
+    return _execute("DELETE FROM posts")
+
+
+# --- Supabase mirror and write-behind sync ---
+
+_remote_client = None
+_remote_checked = False
+
+
+def _remote():
+    """The Supabase client, or None when running offline (not configured)."""
+    global _remote_client, _remote_checked
+    if not _remote_checked:
+        _remote_checked = True
+        try:
+            from .supabase_db import supabase
+            _remote_client = supabase
+        except Exception as e:
+            print(f"[DB] Supabase not available, running on the local database only: {e}")
+    return _remote_client
+
+
+def warm_known_post_cache(days: int = 3, page_size: int = 1000) -> int:
+    """
+    Mirror posts scraped in the last `days` days from Supabase into the local
+    file (existing local rows win), so dedup works on a fresh machine.
+    Lookups are local, so no in-process cache is needed.
+
+    Returns the number of local posts from that period.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    remote = _remote()
+    if remote is not None:
+        loaded = 0
+        try:
+            with _lock:
+                local_columns = [row[1] for row in _db().execute("PRAGMA table_info(posts)")]
+            mirror_columns = [c for c in local_columns if c != "id" and c not in SYNC_COLUMNS]
+            while True:
+                result = (
+                    remote.table("posts")
+                    .select("*")
+                    .gte("scraped_at", cutoff)
+                    .order("id")
+                    .range(loaded, loaded + page_size - 1)
+                    .execute()
+                )
+                rows = result.data or []
+                with _lock:
+                    conn = _db()
+                    with conn:
+                        conn.executemany(
+                            f"INSERT OR IGNORE INTO posts ({', '.join(mirror_columns)}, sync_upsert) "
+                            f"VALUES ({_placeholders(mirror_columns)}, 0)",
+                            [[_mirror_value(c, row.get(c)) for c in mirror_columns] for row in rows]
+                        )
+                loaded += len(rows)
+                if len(rows) < page_size:
+                    break
+            print(f"[DB] Mirrored {loaded} recent posts from Supabase into {SQLITE_DB_PATH}")
+        except Exception as e:
+            print(f"[DB] Could not mirror posts from Supabase (continuing with local data): {e}")
+
+    with _lock:
+        return _db().execute("SELECT count(*) FROM posts WHERE scraped_at >= ?", (cutoff,)).fetchone()[0]
+
+
+def _mirror_value(column: str, value):
+    """Convert a Supabase value for the local table (NOT NULL flags, JSON arrays)."""
+    if column in BOOLEAN_COLUMNS:
+        return bool(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def sync_pending(batch_size: int = SYNC_BATCH_SIZE) -> int:
+    """
+    Push up to batch_size pending local changes of each kind to Supabase.
+    Raises on network/API errors (the rows stay pending and are retried).
+
+    Returns the number of changes pushed.
+    """
+    remote = _remote()
+    if remote is None:
+        return 0
+    pushed = 0
+
+    # New rows and category changes, with the same rules as supabase_db.save_posts()
+    rows = _query("SELECT * FROM posts WHERE sync_upsert = 1 ORDER BY id LIMIT ?", (batch_size,))
+    if rows:
+        payload = [{field: row.get(field) for field in BATCH_RPC_FIELDS} for row in rows]
+        remote.rpc("save_posts_batch", {"new_posts": payload}).execute()
+        _clear_sync_flag("sync_upsert", rows)
+        pushed += len(rows)
+
+    # Notified flags, once the row itself exists remotely
+    rows = _query(
+        "SELECT post_id, sync_seq FROM posts WHERE sync_notified = 1 AND sync_upsert = 0 ORDER BY id LIMIT ?",
+        (batch_size,)
+    )
+    if rows:
+        remote.table("posts").update({"notified": True}).in_("post_id", [r["post_id"] for r in rows]).execute()
+        _clear_sync_flag("sync_notified", rows)
+        pushed += len(rows)
+
+    rows = _query(
+        "SELECT * FROM posts WHERE sync_auto_message = 1 AND sync_upsert = 0 ORDER BY id LIMIT ?",
+        (batch_size,)
+    )
+    for row in rows:
+        update = {field: row.get(field) for field in AUTO_MESSAGE_FIELDS}
+        remote.table("posts").update(update).eq("post_id", row["post_id"]).execute()
+        _clear_sync_flag("sync_auto_message", [row])
+        pushed += 1
+
+    return pushed
+
+
+def _clear_sync_flag(flag: str, rows: list[dict]) -> None:
+    """Mark rows as pushed unless they changed again in the meantime."""
+    with _lock:
+        conn = _db()
+        with conn:
+            conn.executemany(
+                f"UPDATE posts SET {flag} = 0 WHERE post_id = ? AND sync_seq = ?",
+                [(row["post_id"], row["sync_seq"]) for row in rows]
+            )
+
+
+def pending_sync_count() -> int:
+    """Number of rows with changes not yet pushed to Supabase."""
+    with _lock:
+        return _db().execute(
+            "SELECT count(*) FROM posts WHERE sync_upsert = 1 OR sync_notified = 1 OR sync_auto_message = 1"
+        ).fetchone()[0]
+
+
+# Same retry and shutdown policy as supabase_db's outbox flusher
+_sync = BackgroundFlusher(sync_pending, "sync to Supabase")
+
+
+def size_connection_pool(workers: int) -> int:
+    """
+    Scraper threads only use the local file; the background sync is the one
+    Supabase user, so its client keeps the default pool. Returns 0.
+    """
+    return 0
+
+
+def start_background_sync(interval_seconds: float = 30) -> bool:
+    """
+    Start the write-behind thread that pushes local changes to Supabase.
+    Returns False if Supabase isn't configured (local-only mode).
+    """
+    if _remote() is None:
+        return False
+    _sync.start(interval_seconds)
+    return True
+
+
+def stop_background_sync(timeout: float = 30) -> int:
+    """
+    Stop the sync thread and keep pushing what's pending until `timeout`
+    seconds have passed.
+    Returns the number of rows still unsynced (they are pushed on the next run).
+    """
+    _sync.stop(timeout)
+    return pending_sync_count()
+
+
+def clear_known_post_cache() -> None:
+    """Forget all cached known/messaged posts (call after deleting rows)."""
+    known_posts.clear()
+    messaged_posts.clear()
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters of the known-post caches (unused by this backend, kept for the shared interface)."""
+    return {
+        "known_posts": known_posts.stats(),
+        "messaged_posts": messaged_posts.stats(),
+    }
@@ -0,0 +1,25 @@
+"""
+Supabase client factory for the scraper.
+
+The factory (connection pool, HTTP/2, timeouts and latency stats) lives in
+backend/app/supabase_client.py, which the backend deploys on its own; this
+module re-exports it so both share one implementation.
+"""
+
+from backend.app.supabase_client import (
+    DEFAULT_POOL_SIZE,
+    LatencyHistogram,
+    acreate_supabase_client,
+    create_supabase_client,
+    get_latency_stats,
+    reset_latency_stats,
+)
+
+__all__ = [
+    "DEFAULT_POOL_SIZE",
+    "LatencyHistogram",
+    "acreate_supabase_client",
+    "create_supabase_client",
+    "get_latency_stats",
+    "reset_latency_stats",
+]
@@ -3,22 +3,22 @@
 from __future__ import annotations
 
 import os
-import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Dict
-from supabase import create_client, Client
+from supabase import Client
 from dotenv import load_dotenv
-from typing import TypedDict
-
-# Type definition for Post
-class Post(TypedDict):
-    post_id: str
-    title: str
-    text: str
-    url: str
-    timestamp: str
-    group_name: str
-    group_url: str
+
+from .supabase_client import DEFAULT_POOL_SIZE, create_supabase_client
+from .outbox import BackgroundFlusher, OutboxEntry, get_outbox
+from .known_post_cache import known_posts, messaged_posts, id_key, hash_key
+from .post_rows import (
+    DEDUP_COLUMNS,
+    EXISTS_COLUMNS,
+    Post,
+    _build_insert_data,
+    compute_text_hash,
+    dedup_text_hash,
+)
 
 # Load environment variables
 load_dotenv()
@@ -35,19 +35,40 @@ SUPABASE_KEY = (
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_KEY (or SUPABASE_SERVICE_KEY) must be set in .env file")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# main.py sizes the pool to its worker threads with size_connection_pool()
+supabase: Client = create_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+_pool_size = int(os.getenv("SUPABASE_POOL_SIZE") or DEFAULT_POOL_SIZE)
+
+
+def size_connection_pool(workers: int) -> int:
+    """
+    Rebuild the client with one connection per worker thread plus one for
+    the outbox flusher, so no thread waits for a free connection.
+    SUPABASE_POOL_SIZE, if set, is used instead. Call it before the worker
+    threads (and the background sync) start.
+    
+    Returns the pool size.
+    """
+    global supabase, _pool_size
+    pool_size = int(os.getenv("SUPABASE_POOL_SIZE") or workers + 1)
+    if pool_size != _pool_size:
+        previous = supabase
+        supabase = create_supabase_client(SUPABASE_URL, SUPABASE_KEY, pool_size=pool_size)
+        _pool_size = pool_size
+        previous.options.httpx_client.close()
+    return pool_size
 
 
-def get_existing_post(post_id: str) -> Optional[Dict]:
+def get_existing_post(post_id: str, columns: str = "*") -> Optional[Dict]:
     """
     Get existing post data from the database.
-    Returns post data if exists, None otherwise.
+    Returns post data (only `columns`) if exists, None otherwise.
     """
     if post_id == "unknown":
         return None
     
     try:
-        result = supabase.table("posts").select("*").eq("post_id", post_id).execute()
+        result = supabase.table("posts").select(columns).eq("post_id", post_id).execute()
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error checking if post exists: {e}")
@@ -56,30 +77,31 @@ def get_existing_post(post_id: str) -> Optional[Dict]:
 
 def post_exists(post_id: str) -> bool:
     """Check if a post already exists in the database (by ID only)."""
-    return get_existing_post(post_id) is not None
+    return get_existing_post(post_id, EXISTS_COLUMNS) is not None
 
 
-def _normalize_text(text: str) -> str:
-    """Normalize post text for comparison: strip whitespace, collapse spaces."""
-    if not text:
-        return ""
-    return re.sub(r'\s+', ' ', text.strip())
+def _report_text_hash_error(e: Exception) -> None:
+    """Print a text-dedup query error, with a hint if the migration hasn't been run."""
+    if "text_hash" in str(e):
+        print("    [DEDUP] text_hash column not yet created. Run migrations/add_text_hash_column.sql")
+    else:
+        print(f"Error checking text duplicate: {e}")
 
 
-def find_duplicate_by_text(text: str) -> Optional[Dict]:
+def find_duplicate_by_text(text: str, columns: str = "*") -> Optional[Dict]:
     """
-    Find an existing post with the exact same text content.
+    Find an existing post with the same (normalized) text content.
     
-    Does a direct exact-match query on the text column.
+    Looks up the indexed text_hash column instead of comparing full post bodies.
     
-    Returns the matching post dict if found, None otherwise.
+    Returns the matching post dict (only `columns`) if found, None otherwise.
     """
     if not text or len(text.strip()) < 20:
         return None
     
     try:
-        result = supabase.table("posts").select("*").eq(
-            "text", text
+        result = supabase.table("posts").select(columns).eq(
+            "text_hash", compute_text_hash(text)
         ).limit(1).execute()
         
         if result.data:
@@ -87,7 +109,7 @@ def find_duplicate_by_text(text: str) -> Optional[Dict]:
         
         return None
     except Exception as e:
-        print(f"Error checking text duplicate: {e}")
+        _report_text_hash_error(e)
         return None
 
 
@@ -99,23 +121,117 @@ def is_duplicate_post(post_id: str, text: str = "") -> bool:
     falls back to text-based comparison to catch posts scraped with
     different IDs (e.g. hash-based vs real Facebook ID).
     
+    Posts already seen this session are answered from the known-post cache.
+    
     Returns True if the post already exists (duplicate).
     """
+    text_hash = dedup_text_hash(text)
+    if known_posts.lookup(id_key(post_id), hash_key(text_hash)):
+        return True
+    
     # Step 1: Check by post ID
     if post_id and post_id != "unknown" and post_exists(post_id):
+        known_posts.add(id_key(post_id))
         return True
     
     # Step 2: Check by text content (catches same post with different IDs)
     if text:
-        duplicate = find_duplicate_by_text(text)
+        duplicate = find_duplicate_by_text(text, EXISTS_COLUMNS)
         if duplicate:
             dup_id = duplicate.get("post_id", "?")
             print(f"    [DEDUP] Text match found: new ID '{post_id}' matches existing '{dup_id}'")
+            known_posts.add(hash_key(text_hash))
             return True
     
     return False
 
 
+# PostgREST puts `in.(...)` filters in the URL query string, so large batches
+# are split to stay well below proxy/URL length limits.
+IN_FILTER_MAX_ITEMS = 100
+IN_FILTER_MAX_CHARS = 6000
+
+
+def _chunk_for_in_filter(values: list[str]) -> list[list[str]]:
+    """Split values into chunks small enough for a single `in` filter."""
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    current_chars = 0
+    for value in values:
+        if current and (len(current) >= IN_FILTER_MAX_ITEMS or current_chars + len(value) > IN_FILTER_MAX_CHARS):
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(value)
+        current_chars += len(value)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def find_duplicates(posts: list[Post]) -> set[str]:
+    """
+    Bulk version of is_duplicate_post() for a whole scraped batch.
+
+    Resolves all post IDs with one `in` query on post_id and all texts with
+    one `in` query on text_hash (split into chunks only for very large
+    batches), instead of up to two round trips per post.
+
+    Posts found in the known-post cache are resolved without a query.
+
+    Returns the set of post_ids from `posts` that already exist in the database.
+    """
+    duplicates: set[str] = set()
+    if not posts:
+        return duplicates
+
+    # Step 0: Answer what we can from the known-post cache
+    text_hashes: dict[str, str] = {}
+    for post in posts:
+        post_id = post.get("post_id")
+        text = post.get("text", "")
+        text_hash = dedup_text_hash(text)
+        text_hashes[post_id] = text_hash
+        if known_posts.lookup(id_key(post_id), hash_key(text_hash)):
+            duplicates.add(post_id)
+
+    # Step 1: Check by post ID
+    ids = list({p.get("post_id") for p in posts
+                if p.get("post_id") and p.get("post_id") != "unknown" and p.get("post_id") not in duplicates})
+    try:
+        for chunk in _chunk_for_in_filter(ids):
+            result = supabase.table("posts").select("post_id").in_("post_id", chunk).execute()
+            for row in result.data or []:
+                duplicates.add(row["post_id"])
+                known_posts.add(id_key(row["post_id"]))
+    except Exception as e:
+        print(f"Error checking existing post IDs: {e}")
+
+    # Step 2: Check remaining posts by text hash (same rules as find_duplicate_by_text)
+    by_hash: dict[str, list[str]] = {}
+    for post_id, text_hash in text_hashes.items():
+        if post_id in duplicates or not text_hash:
+            continue
+        by_hash.setdefault(text_hash, []).append(post_id)
+
+    try:
+        for chunk in _chunk_for_in_filter(list(by_hash)):
+            result = supabase.table("posts").select("post_id, text_hash").in_("text_hash", chunk).execute()
+            for row in result.data or []:
+                known_posts.add(hash_key(row.get("text_hash")))
+                for post_id in by_hash.pop(row.get("text_hash"), []):
+                    print(f"    [DEDUP] Text match found: new ID '{post_id}' matches existing '{row.get('post_id', '?')}'")
+                    duplicates.add(post_id)
+    except Exception as e:
+        _report_text_hash_error(e)
+
+    return duplicates
+
+
+def _remember_post(post_id: str, text: str) -> None:
+    """Record a post as known in the in-process cache (by ID and text hash)."""
+    known_posts.add(id_key(post_id), hash_key(compute_text_hash(text)))
+
+
 def save_post(post: Post, use_ai: bool = False) -> bool:
     """
     Save a post to the database.
@@ -128,7 +244,7 @@ def save_post(post: Post, use_ai: bool = False) -> bool:
         True if the post was newly added, False if it already existed.
     """
     # Check if post already exists (by ID)
-    existing = get_existing_post(post["post_id"])
+    existing = get_existing_post(post["post_id"], DEDUP_COLUMNS)
     
     if existing:
         # Post already exists — update category if we have a better one
@@ -149,10 +265,11 @@ def save_post(post: Post, use_ai: bool = False) -> bool:
                 post.get("location"),
                 post.get("secondary_categories", [])
             )
+        _remember_post(post["post_id"], post.get("text", ""))
         return False  # Post already existed
     
     # Also check by text content (catches same post with different IDs)
-    text_dup = find_duplicate_by_text(post.get("text", ""))
+    text_dup = find_duplicate_by_text(post.get("text", ""), DEDUP_COLUMNS)
     if text_dup:
         dup_id = text_dup.get("post_id", "?")
         print(f"    [DEDUP] save_post: text match — new '{post['post_id']}' ≈ existing '{dup_id}', skipping")
@@ -166,56 +283,19 @@ def save_post(post: Post, use_ai: bool = False) -> bool:
                 post.get("location"),
                 post.get("secondary_categories", [])
             )
+        _remember_post(post["post_id"], post.get("text", ""))
         return False
     
     try:
-        # Parse the Facebook timestamp to get actual posted time
-        posted_at = None
-        try:
-            from src.scraper.timestamp_parser import parse_facebook_timestamp
-            parsed_time = parse_facebook_timestamp(post["timestamp"])
-            if parsed_time:
-                posted_at = parsed_time.isoformat()
-        except Exception:
-            pass
-        
-        # Use category and location from post if already set (by main.py)
-        category = post.get("category", "General")
-        location = post.get("location")
-        secondary_categories = post.get("secondary_categories", [])
-        
-        # Build insert data with basic columns
-        insert_data = {
-            "post_id": post["post_id"],
-            "title": post["title"],
-            "text": post["text"],
-            "url": post["url"],
-            "timestamp": post["timestamp"],
-            "group_name": post["group_name"],
-            "group_url": post["group_url"],
-            "category": category,
-            "notified": False
-        }
-        
-        # Add posted_at if we successfully parsed the timestamp
-        if posted_at:
-            insert_data["posted_at"] = posted_at
-        
-        # Add location if available
-        if location:
-            insert_data["location"] = location
-        
-        # Add secondary categories as JSON string
-        if secondary_categories:
-            import json as _json
-            insert_data["secondary_categories"] = _json.dumps(secondary_categories)
-        
+        insert_data = _build_insert_data(post)
         supabase.table("posts").insert(insert_data).execute()
+        _remember_post(post["post_id"], post["text"])
         return True
     except Exception as e:
         error_str = str(e)
-        # If category or posted_at column doesn't exist, try without them
-        if "category" in error_str or "posted_at" in error_str:
+        # If category, posted_at, text_hash or group_name_normalized column doesn't exist, try without them
+        if ("category" in error_str or "posted_at" in error_str
+                or "text_hash" in error_str or "group_name_normalized" in error_str):
             try:
                 insert_data_basic = {
                     "post_id": post["post_id"],
@@ -228,6 +308,7 @@ def save_post(post: Post, use_ai: bool = False) -> bool:
                     "notified": False
                 }
                 supabase.table("posts").insert(insert_data_basic).execute()
+                _remember_post(post["post_id"], post["text"])
                 return True
             except Exception:
                 return False
@@ -260,11 +341,93 @@ def update_post_category(post_id: str, category: str, location: Optional[str] =
         return False
 
 
-def save_posts(posts: list[Post]) -> tuple[int, int]:
+# Set to False once the save_posts_batch RPC turns out to be missing,
+# so later cycles go straight to the per-post fallback.
+_batch_rpc_available = True
+
+
+def _dedup_rows(rows: list[dict]) -> list[dict]:
+    """
+    Drop in-batch duplicates (same post_id, or same text for texts long enough
+    to compare). The RPC only checks text duplicates against rows that already
+    exist in the table.
+    """
+    unique = []
+    seen_ids: set[str] = set()
+    seen_hashes: set[str] = set()
+    for row in rows:
+        text_hash = row.get("text_hash")
+        dedup_by_text = text_hash and len(row["text"].strip()) >= 20
+        if row["post_id"] in seen_ids or (dedup_by_text and text_hash in seen_hashes):
+            continue
+        seen_ids.add(row["post_id"])
+        if dedup_by_text:
+            seen_hashes.add(text_hash)
+        unique.append(row)
+    return unique
+
+
+def _batch_rows(posts: list[Post]) -> list[dict]:
+    """Rows for the save_posts_batch RPC, in-batch duplicates removed."""
+    rows = []
+    for post in posts:
+        row = _build_insert_data(post)
+        row["category"] = post.get("category")  # NULL = keep existing / default to General
+        rows.append(row)
+    return _dedup_rows(rows)
+
+
+def _remember_saved(rows: list[dict]) -> None:
+    """Add rows Supabase has accepted to the known-post cache."""
+    for row in rows:
+        known_posts.add(id_key(row["post_id"]), hash_key(row.get("text_hash", "")))
+
+
+def _report_missing_batch_rpc() -> None:
+    global _batch_rpc_available
+    print("    [DB] save_posts_batch function not yet created. Run migrations/add_save_posts_batch_function.sql")
+    _batch_rpc_available = False
+
+
+def save_posts(posts: list[Post]) -> tuple[int, int, int]:
     """
     Save multiple posts to the database.
-    Returns (new_count, skipped_count).
+    
+    Sends the whole batch in one request to the save_posts_batch RPC
+    (migrations/add_save_posts_batch_function.sql), which upserts on post_id
+    and applies the same rules as save_post(): skip text duplicates and
+    only replace a category with a better one.
+    Falls back to one save_post() per post if the function isn't installed.
+    
+    While the write-behind flusher runs (start_background_sync()), the batch is
+    queued in the outbox instead: nothing is saved yet, so new_count is 0 and
+    queued_count is the number of posts left after in-batch deduplication.
+    They join the known-post cache once the flusher has written them.
+    
+    Returns (new_count, skipped_count, queued_count).
     """
+    if not posts:
+        return 0, 0, 0
+    
+    if _flusher.running:
+        payload = _batch_rows(posts)
+        get_outbox().enqueue("save_posts", payload)
+        _flusher.wake()
+        return 0, len(posts) - len(payload), len(payload)
+    
+    if _batch_rpc_available:
+        payload = _batch_rows(posts)
+        try:
+            result = supabase.rpc("save_posts_batch", {"new_posts": payload}).execute()
+            new_count = int(result.data or 0)
+            _remember_saved(payload)
+            return new_count, len(posts) - new_count, 0
+        except Exception as e:
+            if "save_posts_batch" in str(e):
+                _report_missing_batch_rpc()
+            else:
+                print(f"    [DB] Batch save failed, saving posts one by one: {str(e)[:80]}")
+    
     new_count = 0
     skipped_count = 0
     
@@ -274,7 +437,7 @@ def save_posts(posts: list[Post]) -> tuple[int, int]:
         else:
             skipped_count += 1
     
-    return new_count, skipped_count
+    return new_count, skipped_count, 0
 
 
 def get_posts(
@@ -282,7 +445,8 @@ def get_posts(
     offset: int = 0,
     group_url: Optional[str] = None,
     search: Optional[str] = None,
-    only_new: bool = False
+    only_new: bool = False,
+    columns: str = "*"
 ) -> list[dict]:
     """
     Retrieve posts from the database with optional filtering.
@@ -293,12 +457,13 @@ def get_posts(
         group_url: Filter by specific Facebook group
         search: Search term to filter posts (searches title and text)
         only_new: Only return posts that haven't been notified about
+        columns: Columns to return (PostgREST select list)
     
     Returns:
         List of post dictionaries
     """
     try:
-        query = supabase.table("posts").select("*")
+        query = supabase.table("posts").select(columns)
         
         if group_url:
             query = query.eq("group_url", group_url)
@@ -353,8 +518,17 @@ def mark_as_notified(post_ids: list[str]) -> None:
     if not post_ids:
         return
     
+    if _flusher.running:
+        get_outbox().enqueue("notified", list(post_ids))
+        for post_id in post_ids:
+            known_posts.add(id_key(post_id))
+        _flusher.wake()
+        return
+    
     try:
-        supabase.table("posts").update({"notified": True}).in_("post_id", post_ids).execute()
+        result = supabase.table("posts").update({"notified": True}).in_("post_id", post_ids).execute()
+        for row in result.data or []:
+            known_posts.add(id_key(row.get("post_id")), hash_key(row.get("text_hash")))
     except Exception as e:
         print(f"Error marking posts as notified: {e}")
 
@@ -362,25 +536,40 @@ def mark_as_notified(post_ids: list[str]) -> None:
 def was_auto_message_sent(post_id: str, text: str = "") -> bool:
     """
     Check if an auto-message has already been sent for this post.
-    Checks by post_id first, then by text content (catches duplicates with different IDs).
+    Checks by post_id and by text content (catches duplicates with different IDs)
+    in one query over the messaged posts only (partial index, see
+    migrations/add_pending_indexes.sql).
     
     Returns True if a message was already sent.
     """
-    # Step 1: Check by post ID
+    text_hash = dedup_text_hash(text)
+    if messaged_posts.lookup(id_key(post_id), hash_key(text_hash)):
+        return True
+    
+    conditions = []
     if post_id and post_id != "unknown":
-        existing = get_existing_post(post_id)
-        if existing and existing.get("auto_message_sent"):
-            return True
+        conditions.append(f'post_id.eq."{post_id}"')
+    if text_hash:
+        conditions.append(f"text_hash.eq.{text_hash}")
+    if not conditions:
+        return False
     
-    # Step 2: Check by text content (catches same post with different IDs)
-    if text:
-        duplicate = find_duplicate_by_text(text)
-        if duplicate and duplicate.get("auto_message_sent"):
-            dup_id = duplicate.get("post_id", "?")
-            print(f"    [AUTO-MSG] Already messaged duplicate: '{dup_id}'")
-            return True
+    try:
+        result = supabase.table("posts").select("post_id, text_hash").eq(
+            "auto_message_sent", True
+        ).or_(",".join(conditions)).limit(2).execute()
+    except Exception as e:
+        print(f"Error checking auto-message status: {e}")
+        return False
     
-    return False
+    rows = result.data or []
+    for row in rows:
+        messaged_posts.add(id_key(row.get("post_id")), hash_key(row.get("text_hash")))
+    if not rows:
+        return False
+    if not any(row.get("post_id") == post_id for row in rows):
+        print(f"    [AUTO-MSG] Already messaged duplicate: '{rows[0].get('post_id', '?')}'")
+    return True
 
 
 def mark_auto_message_sent(
@@ -394,7 +583,8 @@ def mark_auto_message_sent(
     Record that an auto-message was sent for a post.
     Updates the post record with message details.
     
-    Returns True if updated successfully.
+    Returns True if updated successfully (or queued, while the write-behind
+    flusher runs).
     """
     try:
         update_data = {
@@ -406,7 +596,16 @@ def mark_auto_message_sent(
             "auto_message_sent_at": datetime.utcnow().isoformat(),
         }
         
-        supabase.table("posts").update(update_data).eq("post_id", post_id).execute()
+        if _flusher.running:
+            get_outbox().enqueue("auto_message", {"post_id": post_id, "update": update_data})
+            messaged_posts.add(id_key(post_id))
+            _flusher.wake()
+            return True
+        
+        result = supabase.table("posts").update(update_data).eq("post_id", post_id).execute()
+        messaged_posts.add(id_key(post_id))
+        for row in result.data or []:
+            messaged_posts.add(hash_key(row.get("text_hash")))
         return True
     except Exception as e:
         error_str = str(e)
@@ -418,39 +617,231 @@ def mark_auto_message_sent(
         return False
 
 
-def get_stats() -> dict:
-    """Get database statistics."""
+def warm_known_post_cache(days: int = 3, page_size: int = 1000) -> int:
+    """
+    Load posts scraped in the last `days` days into the known-post cache,
+    so the first cycle after startup doesn't re-check the whole feed over the network.
+    
+    Returns the number of posts loaded.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    loaded = 0
     try:
-        # Total posts
-        total_result = supabase.table("posts").select("id", count="exact").execute()
-        total = total_result.count if total_result.count else 0
-        
-        # New posts (not notified)
-        new_result = supabase.table("posts").select("id", count="exact").eq("notified", False).execute()
-        new_posts = new_result.count if new_result.count else 0
-        
-        # Posts by group - use RPC or raw SQL for grouping
-        # For now, get all posts and group in Python (not efficient for large datasets)
-        all_posts = supabase.table("posts").select("group_name").execute()
-        
-        group_counts = {}
-        for post in all_posts.data:
-            group_name = post.get("group_name", "Unknown")
-            # Normalize group name: strip "(1) ", "(2) ", etc. prefixes from Facebook tab titles
-            group_name = re.sub(r'^\(\d+\)\s*', '', group_name)
-            group_counts[group_name] = group_counts.get(group_name, 0) + 1
-        
-        by_group = [{"group": group, "count": count} for group, count in group_counts.items()]
-        by_group.sort(key=lambda x: x["count"], reverse=True)
-        
-        return {
-            "total": total,
-            "new": new_posts,
-            "by_group": by_group
-        }
+        while True:
+            result = (
+                supabase.table("posts")
+                .select("post_id, text_hash, auto_message_sent")
+                .gte("scraped_at", cutoff)
+                .order("id")
+                .range(loaded, loaded + page_size - 1)
+                .execute()
+            )
+            rows = result.data or []
+            for row in rows:
+                keys = (id_key(row.get("post_id")), hash_key(row.get("text_hash")))
+                known_posts.add(*keys)
+                if row.get("auto_message_sent"):
+                    messaged_posts.add(*keys)
+            loaded += len(rows)
+            if len(rows) < page_size:
+                break
+    except Exception as e:
+        print(f"Error warming known-post cache: {e}")
+    return loaded
+
+
+def clear_known_post_cache() -> None:
+    """Forget all cached known/messaged posts (call after deleting rows)."""
+    known_posts.clear()
+    messaged_posts.clear()
+
+
+def get_cache_stats() -> dict:
+    """Hit/miss counters of the known-post caches, for logging."""
+    return {
+        "known_posts": known_posts.stats(),
+        "messaged_posts": messaged_posts.stats(),
+    }
+
+
+# --- Write-behind outbox ---
+#
+# While the flusher runs, save_posts(), mark_as_notified() and
+# mark_auto_message_sent() only append to the persistent outbox (a local
+# SQLite file), so the scrape loop never waits on Supabase. Saved posts
+# join the known-post cache once the flusher has written them. The flusher
+# thread (outbox.BackgroundFlusher, shared with sqlite_db) coalesces queued
+# writes into one batch per round and deletes them only once Supabase has
+# accepted them.
+
+OUTBOX_BATCH_SIZE = 500  # Queued writes applied per flush round
+OUTBOX_ISOLATE_AFTER_ATTEMPTS = 3  # Writes that keep failing are retried alone, so they can't hold back the rest
+
+
+def _save_rows(rows: list[dict]) -> None:
+    """Upsert batch rows; raises on failure so the outbox retries them."""
+    if _batch_rpc_available:
+        try:
+            supabase.rpc("save_posts_batch", {"new_posts": rows}).execute()
+            return
+        except Exception as e:
+            if "save_posts_batch" not in str(e):
+                raise
+            _report_missing_batch_rpc()
+    # Without the RPC: plain insert, existing rows are left untouched
+    rows = [{**row, "category": row["category"] or "General"} for row in rows]
+    supabase.table("posts").upsert(rows, on_conflict="post_id", ignore_duplicates=True).execute()
+
+
+def _apply_writes(entries: list[OutboxEntry]) -> None:
+    """
+    Apply queued writes in as few requests as possible: one upsert for all
+    saved posts, one update per IN-filter chunk of notified IDs, then the
+    auto-message records. Saves go first, so flags set on a post in the same
+    cycle it was saved find its row. Every write is idempotent.
+    """
+    rows = []
+    notified_ids: list[str] = []
+    auto_messages = []
+    for entry in entries:
+        if entry.kind == "save_posts":
+            rows.extend(entry.payload)
+        elif entry.kind == "notified":
+            notified_ids.extend(entry.payload)
+        elif entry.kind == "auto_message":
+            auto_messages.append(entry.payload)
+    
+    if rows:
+        rows = _dedup_rows(rows)
+        _save_rows(rows)
+        _remember_saved(rows)
+    for chunk in _chunk_for_in_filter(list(dict.fromkeys(notified_ids))):
+        supabase.table("posts").update({"notified": True}).in_("post_id", chunk).execute()
+    for message in auto_messages:
+        try:
+            supabase.table("posts").update(message["update"]).eq("post_id", message["post_id"]).execute()
+        except Exception as e:
+            # Same as mark_auto_message_sent(): without the columns there is nothing to retry
+            if "auto_message" not in str(e):
+                raise
+            print(f"    [AUTO-MSG] DB columns not yet created. Run migration.")
+
+
+def flush_outbox(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Apply the queued writes that are due. Failed writes stay queued and are
+    retried with backoff.
+    
+    Returns the number of queued writes delivered.
+    """
+    outbox = get_outbox()
+    entries = outbox.due(limit)
+    fresh = [e for e in entries if e.attempts < OUTBOX_ISOLATE_AFTER_ATTEMPTS]
+    groups = ([fresh] if fresh else []) + [[e] for e in entries if e.attempts >= OUTBOX_ISOLATE_AFTER_ATTEMPTS]
+    
+    delivered = 0
+    for group in groups:
+        try:
+            _apply_writes(group)
+        except Exception as e:
+            outbox.retry_later(group, str(e))
+            print(f"    [DB] Write-behind flush failed ({len(group)} queued writes, will retry): {str(e)[:80]}")
+            continue
+        outbox.ack(group)
+        delivered += len(group)
+    return delivered
+
+
+_flusher = BackgroundFlusher(flush_outbox, "write-behind flush")
+
+
+def start_background_sync(interval_seconds: float = 30) -> bool:
+    """
+    Start the write-behind flusher: from now on writes are queued in the
+    outbox and pushed to Supabase by a background thread, woken by each write
+    and at least every interval_seconds (for retries). Writes left in the
+    outbox by a previous run are flushed first.
+    
+    Returns True if the flusher is running.
+    """
+    if _flusher.running:
+        return True
+    
+    try:
+        get_outbox()
+    except Exception as e:
+        print(f"[DB] Could not open the write-behind outbox, writing to Supabase directly: {e}")
+        return False
+    
+    _flusher.start(interval_seconds)
+    return True
+
+
+def stop_background_sync(timeout: float = 30) -> int:
+    """
+    Stop the flusher, then push whatever is still queued, giving up once
+    `timeout` seconds have passed. Later writes go straight to Supabase again.
+    
+    Returns the number of writes still queued (kept for the next start).
+    """
+    if not _flusher.running:
+        return 0
+    
+    _flusher.stop(timeout)
+    return get_outbox().pending_count()
+
+
+def clear_outbox() -> int:
+    """Drop every queued write (used when the database is cleared). Returns the count."""
+    return get_outbox().clear()
+
+
+def archive_old_posts(older_than_days: int, batch_size: int = 5000) -> int:
+    """
+    Move posts scraped more than `older_than_days` days ago out of the posts
+    table into posts_archive (monthly partitions, see
+    migrations/add_posts_archive.sql), one batch per RPC call.
+
+    Archived posts no longer count for dedup, stats or the dashboard, so
+    keep `older_than_days` well above MAX_POST_AGE_HOURS.
+
+    Returns the number of posts moved.
+    """
+    moved = 0
+    try:
+        while True:
+            result = supabase.rpc("archive_old_posts", {
+                "older_than_days": older_than_days,
+                "batch_size": batch_size,
+            }).execute()
+            batch = result.data or 0
+            moved += batch
+            if batch < batch_size:
+                break
+    except Exception as e:
+        if "archive_old_posts" in str(e):
+            print("    [DB] archive_old_posts function missing. Run migrations/add_posts_archive.sql.")
+        else:
+            print(f"Error archiving old posts: {e}")
+    return moved
+
+
+def get_stats(days: int = 30) -> dict:
+    """
+    Get database statistics in one round trip.
+    
+    Reads the trigger-maintained counters through the get_post_stats RPC
+    (migrations/add_post_stats.sql).
+    
+    Returns:
+        Dict with total, new, by_group, by_category and by_day (last `days` days with posts)
+    """
+    try:
+        result = supabase.rpc("get_post_stats", {"days": days}).execute()
+        return result.data
     except Exception as e:
         print(f"Error getting stats: {e}")
-        return {"total": 0, "new": 0, "by_group": []}
+        return {"total": 0, "new": 0, "by_group": [], "by_category": [], "by_day": []}
 
 
 if __name__ == "__main__":
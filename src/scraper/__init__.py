@@ -1,11 +1,12 @@
 """Scraping module - Facebook group scraper with browser automation."""
 
 from .scraper import scrape_facebook_group, filter_posts_by_keywords, print_posts
-from .timestamp_parser import parse_facebook_timestamp
+from .timestamp_parser import parse_facebook_timestamp, parse_posted_at
 
 __all__ = [
     'scrape_facebook_group',
     'filter_posts_by_keywords',
     'print_posts',
-    'parse_facebook_timestamp'
+    'parse_facebook_timestamp',
+    'parse_posted_at'
 ]
@@ -1,7 +1,7 @@
 """Parse Facebook timestamp formats to Python datetime."""
 
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 
@@ -25,7 +25,7 @@ MONTHS = {
 NORWEGIAN_DAYS = ['mandag', 'tirsdag', 'onsdag', 'torsdag', 'fredag', 'lørdag', 'søndag']
 
 
-def parse_facebook_timestamp(timestamp_str: str) -> Optional[datetime]:
+def parse_facebook_timestamp(timestamp_str: str, now: Optional[datetime] = None) -> Optional[datetime]:
     """
     Parse Facebook timestamp formats to datetime.
     
@@ -41,11 +41,13 @@ def parse_facebook_timestamp(timestamp_str: str) -> Optional[datetime]:
     
     Args:
         timestamp_str: Facebook timestamp string
+        now: Reference time for relative formats ("7h", "Yesterday", ...).
+             Defaults to the current time; pass scraped_at when re-parsing stored rows.
     
     Returns:
         datetime object or None if parsing fails
     """
-    now = datetime.now()
+    now = now or datetime.now()
     timestamp_str = timestamp_str.strip()
     
     # Format: "Sunday 1 February 2026 at 13:56" (full tooltip format with day name)
@@ -178,6 +180,29 @@ def parse_facebook_timestamp(timestamp_str: str) -> Optional[datetime]:
     return None
 
 
+def parse_posted_at(timestamp_str: str, scraped_at: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    When a post was made, as naive UTC (the posts.posted_at convention).
+    
+    Facebook shows times in the browser's local timezone, so timestamp_str is
+    parsed in local time, with relative formats ("7h", "Yesterday") counted
+    back from scraped_at.
+    
+    Args:
+        timestamp_str: Facebook timestamp string
+        scraped_at: When the post was scraped, naive UTC (default: now)
+    
+    Returns:
+        Naive UTC datetime, or None if the timestamp can't be parsed
+    """
+    scraped_at = scraped_at or datetime.utcnow()
+    local_now = scraped_at.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    parsed = parse_facebook_timestamp(timestamp_str or "", now=local_now)
+    if parsed is None:
+        return None
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 if __name__ == "__main__":
     # Test cases
     test_cases = [